@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+# make the checkout importable when running the benchmarks without installing
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from version_tests.git_repo import git, make_repo  # noqa: E402
+from version_tests.conftest import isolated_cache_dir  # noqa: E402,F401
+from version_tests.dists import write_dist  # noqa: E402
+from version_tests.index_server import StandInIndex  # noqa: E402
+
+
+def dist_name(number):
+    return "fake-package-{0}".format(number)
+
+
+def dist_version(number):
+    return "1.{0}.{1}".format(number // 100, number % 100)
+
+
+@pytest.fixture(scope="session")
+def site_packages(tmp_path_factory):
+    """Factory building (once) a fake site-packages with ``count`` dist-infos."""
+    sites = {}
+
+    def make(count):
+        if count not in sites:
+            site = str(tmp_path_factory.mktemp("site-%d" % count))
+            for number in range(count):
+                write_dist(site, dist_name(number), dist_version(number))
+            sites[count] = site
+        return sites[count]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def wheelhouse(tmp_path_factory):
+    """Factory building (once) a PEP 503 tree of ``count`` projects, 3 files each."""
+    trees = {}
+
+    def make(count):
+        if count not in trees:
+            root = str(tmp_path_factory.mktemp("wheelhouse-%d" % count))
+            for number in range(count):
+                name = dist_name(number)
+                project = os.path.join(root, name)
+                os.mkdir(project)
+                for version in ("0.9", "1.0", dist_version(number)):
+                    filename = "{0}-{1}-py3-none-any.whl".format(
+                        name.replace("-", "_"), version
+                    )
+                    open(os.path.join(project, filename), "w").close()
+            trees[count] = root
+        return trees[count]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def tagged_repo(tmp_path_factory):
+    """Factory building (once) a repository with ``count`` tags on HEAD~1."""
+    repos = {}
+
+    def make(count, packed=False):
+        key = (count, packed)
+        if key not in repos:
+            path = str(tmp_path_factory.mktemp("repo-%d" % count))
+            git_dir = make_repo(path, commits=2)
+            sha = git(path, "rev-parse", "HEAD~1")
+            lines = "".join(
+                "create refs/tags/v0.{0}.{1} {2}\n".format(n // 1000, n % 1000, sha)
+                for n in range(count)
+            )
+            env = dict(os.environ, GIT_DIR=git_dir)
+            import subprocess
+
+            subprocess.run(
+                ["git", "update-ref", "--stdin"],
+                input=lines.encode("ascii"),
+                env=env,
+                check=True,
+            )
+            if packed:
+                git(path, "pack-refs", "--all")
+            repos[key] = path
+        return repos[key]
+
+    return make
+
+
+@pytest.fixture
+def stand_in_index():
+    projects = {
+        dist_name(n): [dist_version(v) for v in range(n % 20 + 1)] for n in range(200)
+    }
+    with StandInIndex(projects) as index:
+        yield index
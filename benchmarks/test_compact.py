@@ -0,0 +1,44 @@
+"""Benchmarks of the compact version type against packaging."""
+
+from packaging.version import parse as packaging_parse
+
+from version import compact
+
+# 20000 strings over 2000 distinct versions, as in a dependency graph
+VERSIONS = [
+    "{0}.{1}.{2}{3}".format(n % 5, n % 11, n % 40, ("", "rc1", ".post1")[n % 3])
+    for n in range(2000)
+] * 10
+
+
+def test_parse_packaging(benchmark):
+    benchmark.group = "parse 20000 version strings"
+    assert len(benchmark(lambda: [packaging_parse(v) for v in VERSIONS])) == 20000
+
+
+def test_parse_compact_cold(benchmark):
+    benchmark.group = "parse 20000 version strings"
+
+    def run():
+        compact.intern_clear()
+        return compact.parse_many(VERSIONS)
+
+    assert len(benchmark(run)) == 20000
+
+
+def test_parse_compact_warm(benchmark):
+    benchmark.group = "parse 20000 version strings"
+    compact.parse_many(VERSIONS)
+    assert len(benchmark(compact.parse_many, VERSIONS)) == 20000
+
+
+def test_sort_packaging(benchmark):
+    benchmark.group = "sort 20000 parsed versions"
+    parsed = [packaging_parse(v) for v in VERSIONS]
+    assert len(benchmark(sorted, parsed)) == 20000
+
+
+def test_sort_compact(benchmark):
+    benchmark.group = "sort 20000 parsed versions"
+    parsed = compact.parse_many(VERSIONS)
+    assert len(benchmark(sorted, parsed)) == 20000
@@ -0,0 +1,58 @@
+"""Benchmarks of the increment engine."""
+
+import pytest
+
+from version import bump
+
+VERSIONS = ["{0}.{1}.{2}".format(n % 7, n % 13, n) for n in range(1000)] + [
+    "1!2.0.0rc1",
+    "1.2.3.post4.dev5",
+    "2014b",
+    "2.1.3.45.654",
+]
+
+
+@pytest.mark.parametrize("release_type", bump.RELEASE_TYPES)
+def test_increment_cold(benchmark, release_type):
+    benchmark.group = "increment_many, 1004 versions, cold cache"
+
+    def run():
+        bump.cache_clear()
+        return bump.increment_many(VERSIONS, release_type)
+
+    assert len(benchmark(run)) == len(VERSIONS)
+
+
+@pytest.mark.parametrize("release_type", bump.RELEASE_TYPES)
+def test_increment_warm(benchmark, release_type):
+    benchmark.group = "increment_many, 1004 versions, warm cache"
+    bump.increment_many(VERSIONS, release_type)
+    assert len(benchmark(bump.increment_many, VERSIONS, release_type)) == len(VERSIONS)
+
+
+def test_increment_matrix(benchmark):
+    benchmark.group = "increment matrix, every version x every release type"
+    versions = [v for v in VERSIONS for _ in bump.RELEASE_TYPES]
+    release_types = list(bump.RELEASE_TYPES) * len(VERSIONS)
+
+    def run():
+        bump.cache_clear()
+        return bump.increment_many(versions, release_types)
+
+    assert len(benchmark(run)) == len(versions)
+
+
+def test_plan_releases(benchmark):
+    benchmark.group = "plan_releases, 1004 packages x every release type"
+    from version.planning import plan_releases
+
+    names = ["pkg%d" % n for n in range(len(VERSIONS))]
+    current = dict(zip(names, VERSIONS))
+    # a known current version for every package: no version source is asked
+    requests = [(name, t) for name in names for t in bump.RELEASE_TYPES]
+
+    def run():
+        bump.cache_clear()
+        return plan_releases(requests, current=current)
+
+    assert len(benchmark(run)) == len(requests)
@@ -0,0 +1,95 @@
+"""Benchmarks of version resolution against synthetic environments."""
+
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+from benchmarks.conftest import dist_name, dist_version
+from version.cache import get_release_cache
+from version.distributions import DistributionIndex
+from version.index import get_index_client
+from version.version import VersionUtils
+from version.wheelhouse import get_wheelhouse_index
+
+SIZES = [100, 1000, 10000]
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_index_build(benchmark, site_packages, count):
+    site = site_packages(count)
+    benchmark.group = "distribution index build"
+    index = benchmark(lambda: DistributionIndex([site]).refresh())
+    assert len(index) == count
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_get_version_installed(benchmark, site_packages, count):
+    site = site_packages(count)
+    benchmark.group = "get_version (installed, warm index)"
+    name = dist_name(count // 2)
+    with mock.patch.object(sys, "path", [site]):
+        VersionUtils.get_version(name, sources="pip")
+        version = benchmark(VersionUtils.get_version, name, sources="pip")
+    assert str(version) == dist_version(count // 2)
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_get_versions_bulk(benchmark, site_packages, count):
+    site = site_packages(count)
+    benchmark.group = "get_versions (100 installed names)"
+    names = [dist_name(n) for n in range(0, count, max(1, count // 100))]
+    with mock.patch.object(sys, "path", [site]):
+        versions = benchmark(VersionUtils.get_versions, names, sources="pip")
+    assert len(versions) == len(names)
+
+
+def test_get_version_from_index(benchmark, stand_in_index, tmp_path):
+    benchmark.group = "get_version_from_pypi (local index)"
+    env = {
+        "PYVERSION_INDEX_URL": stand_in_index.url,
+        "PYVERSION_CACHE_DIR": str(tmp_path),
+        "PYVERSION_CACHE_TTL": "0",
+    }
+    with mock.patch.dict(os.environ, env):
+        version = benchmark(VersionUtils.get_version_from_pypi, dist_name(19))
+        get_index_client().close()
+        get_release_cache().close()
+    assert version == dist_version(19)
+
+
+def test_get_versions_from_index(benchmark, stand_in_index, tmp_path):
+    benchmark.group = "get_versions_from_pypi (200 names, local index)"
+    names = [dist_name(n) for n in range(200)]
+    env = {
+        "PYVERSION_INDEX_URL": stand_in_index.url,
+        "PYVERSION_CACHE_DIR": str(tmp_path),
+        "PYVERSION_CACHE_TTL": "0",
+    }
+    with mock.patch.dict(os.environ, env):
+        versions = benchmark(VersionUtils.get_versions_from_pypi, names)
+        get_index_client().close()
+        get_release_cache().close()
+    assert all(versions.values())
+
+
+@pytest.mark.parametrize("count", [100, 3000])
+def test_get_versions_from_wheelhouse(benchmark, wheelhouse, count):
+    root = wheelhouse(count)
+    benchmark.group = "get_versions_from_wheelhouse (1000 names, checked each call)"
+    names = [dist_name(n * count // 1000) for n in range(1000)]
+    index = get_wheelhouse_index([root])
+    with mock.patch.dict(os.environ, {"PYVERSION_WHEELHOUSE": root}), mock.patch.object(
+        index, "check_interval", 0
+    ):
+        versions = benchmark(VersionUtils.get_versions_from_wheelhouse, names)
+    assert versions[names[-1]] == dist_version((999 * count) // 1000)
+
+
+def test_get_version_from_wheelhouse(benchmark, wheelhouse):
+    root = wheelhouse(3000)
+    benchmark.group = "get_version_from_wheelhouse (3000 projects, warm index)"
+    with mock.patch.dict(os.environ, {"PYVERSION_WHEELHOUSE": root}):
+        version = benchmark(VersionUtils.get_version_from_wheelhouse, dist_name(1500))
+    assert version == dist_version(1500)
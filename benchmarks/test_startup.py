@@ -0,0 +1,86 @@
+"""Startup time regression benchmarks for ``import version`` and ``pyversion``.
+
+Run with ``tox -e bench``. The budgets are in milliseconds on top of a bare
+interpreter start and can be tuned with ``PYVERSION_BENCH_IMPORT_BUDGET`` and
+``PYVERSION_BENCH_CLI_BUDGET`` on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = (
+    "pkg_resources",
+    "packaging",
+    "loguru",
+    "sqlite3",
+    "http.client",
+    "xmlrpc.client",
+    "importlib.metadata",
+    "subprocess",
+    "concurrent.futures",
+)
+RUNS = 5
+
+
+def budget(name, default):
+    return float(os.environ.get("PYVERSION_BENCH_%s_BUDGET" % name, default))
+
+
+def importtime(code):
+    """Return ``{module: cumulative microseconds}`` as reported by -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def best_wall_time(args):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def test_import_version_loads_no_heavy_modules():
+    baseline = importtime("pass")
+    imported = set(importtime("import version")) - set(baseline)
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_import_version_time():
+    cumulative = importtime("import version")["version"] / 1000.0
+    print("import version: %.1fms" % cumulative)
+    assert cumulative < budget("IMPORT", 50)
+
+
+def test_cli_help_time():
+    interpreter = best_wall_time([sys.executable, "-c", "pass"])
+    cli = best_wall_time([sys.executable, "-m", "version.cli", "--help"])
+    print("pyversion --help: %.1fms (interpreter %.1fms)" % (cli, interpreter))
+    assert cli - interpreter < budget("CLI", 150)
+
+
+def test_cli_cold_start(benchmark):
+    benchmark.group = "cli cold start"
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-m", "version.cli", "pytest"],),
+        kwargs={"cwd": ROOT, "stdout": subprocess.DEVNULL, "check": True},
+        rounds=RUNS,
+    )
@@ -0,0 +1,97 @@
+"""Benchmarks of the tag lookups on repositories with many tags."""
+
+import os
+
+import pytest
+from setuptools.dist import Distribution
+
+from version.git import GitRepository
+from version.tag_command import tag, tag_many
+from version.version import VersionUtils
+from version_tests.git_repo import GIT_ENV, git, make_repo
+
+COUNT = 10000
+
+
+@pytest.mark.parametrize("packed", [False, True], ids=["loose", "packed"])
+def test_has_tag(benchmark, tagged_repo, packed):
+    path = tagged_repo(COUNT, packed)
+    benchmark.group = "has_tag + resolve_tag, %d tags" % COUNT
+
+    def run():
+        repo = GitRepository(os.path.join(path, ".git"))
+        return repo.has_tag("v0.9.999") and repo.resolve_tag("v0.9.999")
+
+    assert benchmark(run)
+
+
+def test_git_tag_listing_reference(benchmark, tagged_repo):
+    """The previous approach: sort the 'git tag' output and scan it."""
+    git_dir = os.path.join(tagged_repo(COUNT, True), ".git")
+    benchmark.group = "has_tag + resolve_tag, %d tags" % COUNT
+
+    def run():
+        tags = sorted(VersionUtils.run_git_command(["tag"], git_dir).splitlines())
+        return "v0.9.999" in tags and VersionUtils.run_git_command(
+            ["rev-parse", "v0.9.999"], git_dir
+        )
+
+    assert benchmark(run)
+
+
+def test_tag_command_existing_tag(benchmark, tagged_repo, monkeypatch):
+    path = tagged_repo(COUNT, True)
+    monkeypatch.chdir(path)
+    benchmark.group = "tag command on an existing tag, %d tags" % COUNT
+
+    def run():
+        command = tag(Distribution({"name": "foo", "version": "v0.9.999"}))
+        command.dry_run = True
+        command.ensure_finalized()
+        command.run()
+
+    benchmark(run)
+
+
+BATCH = 50
+
+
+def _release_train(tmp_path, monkeypatch):
+    for key, value in GIT_ENV.items():
+        monkeypatch.setenv(key, value)
+    path = str(tmp_path / "work")
+    os.makedirs(path)
+    make_repo(path)
+    remote = str(tmp_path / "remote.git")
+    git(path, "init", "-q", "--bare", remote)
+    git(path, "remote", "add", "origin", remote)
+    return GitRepository.discover(path)
+
+
+def test_tag_many(benchmark, tmp_path, monkeypatch):
+    repo = _release_train(tmp_path, monkeypatch)
+    benchmark.group = "create and push %d tags to a local remote" % BATCH
+    rounds = iter(range(1000))
+
+    def run():
+        n = next(rounds)
+        pairs = [("p%d-%d.0" % (i, n), "HEAD") for i in range(BATCH)]
+        tag_many(repo, pairs)
+
+    benchmark.pedantic(run, rounds=3)
+
+
+def test_tag_and_push_each_reference(benchmark, tmp_path, monkeypatch):
+    """The previous approach: one 'git tag' and one 'git push' per tag."""
+    repo = _release_train(tmp_path, monkeypatch)
+    benchmark.group = "create and push %d tags to a local remote" % BATCH
+    rounds = iter(range(1000))
+
+    def run():
+        n = next(rounds)
+        for i in range(BATCH):
+            name = "p%d-%d.0" % (i, n)
+            repo.git(["tag", "-m", '""', name, "HEAD"], throw_on_error=True)
+            repo.git(["push", "origin", name], throw_on_error=True)
+
+    benchmark.pedantic(run, rounds=3)
@@ -0,0 +1,167 @@
+"""asyncio counterparts of the blocking helpers in :mod:`version.version`."""
+
+import asyncio
+import contextvars
+import functools
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import tracing
+from .log import logger
+from .version import (
+    DEFAULT_VERSION,
+    NETWORK_SOURCES,
+    SOURCES,
+    VersionUtils,
+    parse_version,
+)
+
+__all__ = [
+    "aget_version",
+    "aresolve",
+    "aget_versions",
+    "run_shell_command",
+]
+
+MAX_CONCURRENCY = 32
+# threads running the blocking source lookups
+MAX_WORKERS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="pyversion-aio"
+            )
+        return _executor
+
+
+async def run_shell_command(cmd, throw_on_error=False, env=None, timeout=None):
+    """Run ``cmd`` without blocking the event loop, see VersionUtils.run_shell_command
+
+    The process is killed when it does not finish within ``timeout`` seconds
+    or when the calling task is cancelled.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if throw_on_error else subprocess.DEVNULL,
+        env=VersionUtils._command_env(env),
+    )
+    try:
+        out, err = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode and throw_on_error:
+        message = "%s returned %d" % (cmd, process.returncode)
+        if err:
+            message += ": " + err.decode("utf-8", "replace").strip()
+        raise Exception(message)
+    return out.decode("utf-8").strip() if out else ""
+
+
+async def _run_source(resolution, name, timeout):
+    loop = asyncio.get_running_loop()
+    func = functools.partial(
+        tracing.run_source, resolution, name, getattr(VersionUtils, SOURCES[name])
+    )
+    start = time.perf_counter()
+    try:
+        # run in a copy of the context so spans nest under the resolve span;
+        # a lookup that times out keeps its worker until it returns
+        context = contextvars.copy_context()
+        return await asyncio.wait_for(
+            loop.run_in_executor(_get_executor(), context.run, func), timeout
+        )
+    except asyncio.TimeoutError as err:
+        logger.warning(
+            f"{name} lookup of {resolution.package} timed out after {timeout}s"
+        )
+        tracing.record_attempt(resolution, name, time.perf_counter() - start, err)
+        return None
+    except Exception as err:
+        # recorded by run_source; a failing source is a miss, as in fanout.race
+        logger.warning(f"{name} lookup of {resolution.package} failed: {err}")
+        return None
+
+
+async def aresolve(package, sources=None, timeout=None, source_timeouts=None):
+    """Resolve ``package`` without blocking the event loop.
+
+    Returns a version.tracing.Resolution, see VersionUtils.resolve. The local
+    sources run concurrently and the first one in priority order that
+    answers wins, network sources (the index) are only queried when none of
+    them knows the package. ``sources`` is as for VersionUtils.get_sources.
+    ``timeout`` bounds each source and ``source_timeouts`` overrides it per
+    source name. Pending lookups are cancelled once a result is known or when
+    the caller is cancelled.
+
+    The lookups themselves are blocking calls run on a pool of
+    ``MAX_WORKERS`` threads: a lookup that times out or is cancelled is
+    abandoned, not stopped, and holds its thread until it returns.
+    """
+    source_timeouts = source_timeouts or {}
+    sources = VersionUtils.get_sources(sources)
+
+    with tracing.resolving(package) as resolution:
+
+        def start(name):
+            return asyncio.ensure_future(
+                _run_source(resolution, name, source_timeouts.get(name, timeout))
+            )
+
+        async def first(names, tasks):
+            try:
+                for name, task in zip(names, tasks):
+                    version = await task
+                    if version:
+                        return name, version
+            finally:
+                for task in tasks:
+                    task.cancel()
+            return None, None
+
+        local = [name for name in sources if name not in NETWORK_SOURCES]
+        source, version = await first(local, [start(name) for name in local])
+        for name in sources:
+            if version:
+                break
+            if name in NETWORK_SOURCES:
+                source, version = await first([name], [start(name)])
+        resolution.source = source
+        resolution.version = parse_version(version or DEFAULT_VERSION)
+    return resolution
+
+
+async def aget_version(package, **kwargs):
+    """Resolve the version of ``package`` without blocking the event loop.
+
+    Keyword arguments are as for :func:`aresolve`.
+    """
+    return (await aresolve(package, **kwargs)).version
+
+
+async def aget_versions(packages, concurrency=MAX_CONCURRENCY, **kwargs):
+    """Resolve many packages concurrently, returning a ``{package: version}`` map.
+
+    At most ``concurrency`` packages are resolved at the same time, other
+    keyword arguments are passed on to :func:`aget_version`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(package):
+        async with semaphore:
+            return await aget_version(package, **kwargs)
+
+    packages = list(dict.fromkeys(packages))
+    versions = await asyncio.gather(*[resolve(package) for package in packages])
+    return dict(zip(packages, versions))
@@ -0,0 +1,189 @@
+"""Streaming annotation of requirement and lock files with version information."""
+
+import itertools
+import json
+import re
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .distributions import normalize_name
+from .log import logger
+from .version import NETWORK_SOURCES, VersionUtils
+
+__all__ = ["Pin", "Record", "annotate", "read_pins"]
+
+MAX_WORKERS = 16
+# lookups remembered per run, so repeated names across files cost nothing
+MEMO_SIZE = 4096
+
+_PIN_RE = re.compile(
+    r"""^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*
+    (?:\[[^\]]*\])?\s*
+    (?:(?P<op>===|==|~=|!=|<=|>=|<|>)\s*(?P<version>[^\s,;#]+))?
+    """,
+    re.VERBOSE,
+)
+
+
+class Pin(namedtuple("Pin", "name version line")):
+    """A requirement read from a file.
+
+    ``version`` is the pinned version (``==`` or ``===``) or None, ``line``
+    the line number it was read from.
+    """
+
+    __slots__ = ()
+
+
+class Record(namedtuple("Record", "name pinned installed latest next line")):
+    """A Pin annotated with the installed, latest and next versions."""
+
+    __slots__ = ()
+
+    def as_dict(self):
+        return dict(self._asdict())
+
+
+def _logical_lines(lines):
+    """Join backslash continued lines, yielding ``(line number, text)``."""
+    pending, start = "", None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if start is None:
+            start = number
+        if line.endswith("\\"):
+            pending += line[:-1] + " "
+            continue
+        yield start, pending + line
+        pending, start = "", None
+    if start is not None:
+        yield start, pending
+
+
+def _pins_from_requirements(lines):
+    for number, line in _logical_lines(lines):
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")) or "://" in line.split(";")[0]:
+            continue
+        match = _PIN_RE.match(line)
+        if match is None:
+            logger.debug(f"line {number}: not a requirement: {line}")
+            continue
+        pinned = match.group("op") in ("==", "===")
+        yield Pin(
+            match.group("name"), match.group("version") if pinned else None, number
+        )
+
+
+def _pins_from_pipfile_lock(lines):
+    # a Pipfile.lock is one JSON document: it is parsed whole, only its
+    # entries are streamed
+    data = json.loads("".join(lines))
+    for section in ("default", "develop"):
+        for name, entry in (data.get(section) or {}).items():
+            version = (entry or {}).get("version") or ""
+            yield Pin(name, version.lstrip("=") or None, None)
+
+
+def read_pins(fh):
+    """Yield the Pins of an open requirements, pip freeze or Pipfile.lock file.
+
+    A file whose first non-blank character is ``{`` is a Pipfile.lock,
+    whatever its name, so lock files can be piped too; it is read whole
+    (its size is bounded by the dependencies of one project). Requirement
+    files are read one line at a time; options (``-r``, ``--hash``, ...),
+    URLs and editable installs are skipped.
+    """
+    head = []
+    for line in fh:
+        head.append(line)
+        if line.strip():
+            break
+    lines = itertools.chain(head, fh)
+    if head and head[-1].lstrip().startswith("{"):
+        yield from _pins_from_pipfile_lock(lines)
+    else:
+        yield from _pins_from_requirements(lines)
+
+
+class _Memo(object):
+    """A bounded, least recently used ``{name: future}`` map."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+
+    def get(self, key, factory):
+        future = self._items.get(key)
+        if future is None:
+            future = self._items[key] = factory()
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return future
+
+
+def _resolve(name, sources):
+    if not sources:
+        return None
+    resolution = VersionUtils.resolve(name, sources, parallel=False)
+    return str(resolution.version) if resolution.source else None
+
+
+def _lookup(name, local, network):
+    return _resolve(name, local), _resolve(name, network)
+
+
+def annotate(
+    pins, sources=None, release_type="micro", max_workers=MAX_WORKERS, window=None
+):
+    """Yield a Record per Pin of ``pins``, in order, as soon as it is resolved.
+
+    The installed version is resolved from the local ``sources`` and the
+    latest from the network ones, the index (see VersionUtils.get_sources
+    and VersionUtils.resolve), through the persistent release cache.
+    ``next`` is the installed, or else latest, version incremented by
+    ``release_type``. At most ``max_workers`` lookups run at once, no more
+    than the index client has pooled connections when it is asked, and at
+    most ``window`` (default four times that) pins are held, so memory stays
+    flat whatever the input size.
+    """
+    from .bump import increment
+
+    sources = VersionUtils.get_sources(sources)
+    local = [name for name in sources if name not in NETWORK_SOURCES]
+    network = [name for name in sources if name in NETWORK_SOURCES]
+    if network:
+        from .index import MAX_WORKERS as POOL_SIZE
+
+        # more lookups than pooled connections would open throwaway ones
+        max_workers = min(max_workers, POOL_SIZE)
+    window = window or 4 * max_workers
+    memo = _Memo(MEMO_SIZE)
+    pending = deque()
+
+    def record(pin, future):
+        try:
+            installed, newest = future.result()
+        except Exception as err:
+            logger.error(f"{pin.name}: {err}")
+            installed = newest = None
+        current = installed or newest
+        try:
+            following = increment(current, release_type) if current else None
+        except Exception as err:
+            logger.warning(f"{pin.name}: cannot increment {current}: {err}")
+            following = None
+        return Record(pin.name, pin.version, installed, newest, following, pin.line)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for pin in pins:
+            future = memo.get(
+                normalize_name(pin.name),
+                lambda: executor.submit(_lookup, pin.name, local, network),
+            )
+            pending.append((pin, future))
+            if len(pending) >= window:
+                yield record(*pending.popleft())
+        while pending:
+            yield record(*pending.popleft())
@@ -0,0 +1,129 @@
+"""Table driven, memoized version increment engine."""
+
+from functools import lru_cache
+from .version import VersionUtils, parse_version
+
+__all__ = ["RELEASE_TYPES", "increment", "increment_many"]
+
+CACHE_SIZE = 8192
+
+# release type -> (bump function, version parts it reads and returns, in order)
+BUMPS = {
+    "epoch": (
+        VersionUtils.process_epoch,
+        ("dev", "epoch", "major", "micro", "minor", "post", "pre"),
+    ),
+    "major": (
+        VersionUtils.process_major,
+        ("dev", "major", "micro", "minor", "post", "pre"),
+    ),
+    "minor": (VersionUtils.process_minor, ("dev", "micro", "minor", "post", "pre")),
+    "micro": (VersionUtils.process_micro, ("dev", "micro", "minor", "post", "pre")),
+    "pre": (VersionUtils.process_pre, ("micro", "post", "pre")),
+    "post": (VersionUtils.process_post, ("dev", "post")),
+    "dev": (lambda dev: (VersionUtils.process_dev(dev),), ("dev",)),
+}
+RELEASE_TYPES = tuple(BUMPS)
+# release types dropping the release segments after micro, e.g. 2.1.3.45
+_TRUNCATING = ("epoch", "major", "minor", "micro", "pre")
+
+
+def _check_pep440(version):
+    try:
+        from packaging.version import LegacyVersion
+    except ImportError:  # packaging >= 22 only knows PEP 440 versions
+        return
+    if isinstance(version, LegacyVersion):
+        msg = """{0} is considered a legacy version and does not
+        support automatic incrementing.  Please bring your version
+        numbering into PEP440 standards and then it can be
+        automatically incremented.
+        """
+        raise Exception(msg.format(version))
+
+
+def _split(version):
+    release = version.release
+    return {
+        "epoch": version.epoch,
+        "major": release[0],
+        "minor": release[1] if len(release) > 1 else None,
+        "micro": release[2] if len(release) > 2 else None,
+        "extra": list(release[3:]),
+        "pre_name": version.pre[0] if version.pre else "pre",
+        "pre": version.pre[1] if version.pre else None,
+        "post": version.post,
+        "dev": version.dev,
+        # the local segment is appended without its separators
+        "local": version.local.replace(".", "") if version.local else None,
+    }
+
+
+def _join(parts, release_type):
+    version_list = [parts["major"], parts["minor"], parts["micro"]]
+    if release_type not in _TRUNCATING:
+        version_list += parts["extra"]
+    version_string = ".".join([str(x) for x in version_list if x or x == 0])
+    if parts["epoch"]:
+        version_string = str(parts["epoch"]) + "!" + version_string
+    if parts["pre"] is not None:
+        version_string = VersionUtils.calc_pre_version_string(
+            parts["pre"], parts["pre_name"], version_string
+        )
+    if parts["post"] is not None:
+        version_string += ".post" + str(parts["post"])
+    if parts["dev"] is not None:
+        version_string += ".dev" + str(parts["dev"])
+    if parts["local"] is not None:
+        version_string += "." + parts["local"]
+    return version_string
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _increment(version, release_type):
+    parsed = parse_version(version)
+    _check_pep440(parsed)
+    parts = _split(parsed)
+    if release_type in BUMPS:
+        bump, names = BUMPS[release_type]
+        parts.update(zip(names, bump(*[parts[name] for name in names])))
+    return _join(parts, release_type)
+
+
+def increment(version, release_type="micro"):
+    """Return ``version`` (a string or parsed version) incremented by ``release_type``.
+
+    Unlike VersionUtils.increment nothing is read from the environment.
+    Results are memoized on ``(version, release_type)``.
+    """
+    if release_type not in BUMPS:
+        raise ValueError(
+            "unknown release type '%s', expected one of %s"
+            % (release_type, ", ".join(RELEASE_TYPES))
+        )
+    return _increment(str(version), release_type)
+
+
+def increment_many(versions, release_type="micro"):
+    """Increment many versions at once, returning a list in the same order.
+
+    ``release_type`` is either one release type for all versions or a
+    sequence with one release type per version. Each distinct
+    ``(version, release_type)`` pair is only computed once.
+    """
+    versions = [str(version) for version in versions]
+    if isinstance(release_type, str):
+        release_types = [release_type] * len(versions)
+    else:
+        release_types = list(release_type)
+        if len(release_types) != len(versions):
+            raise ValueError("expected one release type per version")
+    results = {}
+    for pair in zip(versions, release_types):
+        if pair not in results:
+            results[pair] = increment(*pair)
+    return [results[pair] for pair in zip(versions, release_types)]
+
+
+cache_info = _increment.cache_info
+cache_clear = _increment.cache_clear
@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from .config import env_flag, env_seconds, get_cache_dir
+from .distributions import normalize_name
+from .tracing import record_cache
+
+__all__ = [
+    "CacheEntry",
+    "NotModified",
+    "ReleaseCache",
+    "get_cache_dir",
+    "get_release_cache",
+    "is_offline",
+]
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_NEGATIVE_TTL = 10 * 60
+
+
+def is_offline():
+    """Whether ``PYVERSION_OFFLINE`` asks to never touch the network."""
+    return env_flag("PYVERSION_OFFLINE")
+
+
+class NotModified(Exception):
+    """Raised by a fetch function when the cached releases are still current."""
+
+
+class CacheEntry(namedtuple("CacheEntry", "name versions etag fetched")):
+    """The releases known for ``name``; ``versions`` is None for unknown names."""
+
+    __slots__ = ()
+
+    @property
+    def found(self):
+        return self.versions is not None
+
+    def is_fresh(self, ttl, negative_ttl, now=None):
+        age = (time.time() if now is None else now) - self.fetched
+        return age < (ttl if self.found else negative_ttl)
+
+
+class ReleaseCache(object):
+    """sqlite backed cache of the releases published for each package.
+
+    Entries are keyed by normalized package name and expire after ``ttl``
+    seconds (``negative_ttl`` for names the index does not know). Expired
+    entries are revalidated with their ETag so an unchanged project costs a
+    single ``304 Not Modified`` round trip.
+    """
+
+    def __init__(self, path=None, ttl=None, negative_ttl=None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), "releases.sqlite")
+        self.path = path
+        self.ttl = (
+            env_seconds("PYVERSION_CACHE_TTL", DEFAULT_TTL) if ttl is None else ttl
+        )
+        self.negative_ttl = (
+            env_seconds("PYVERSION_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)
+            if negative_ttl is None
+            else negative_ttl
+        )
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            path = self.path
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+                connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            except (OSError, sqlite3.Error):
+                # an unwritable cache dir should not break version lookups
+                connection = sqlite3.connect(":memory:", check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS releases ("
+                "name TEXT PRIMARY KEY, versions TEXT, etag TEXT, fetched REAL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, name):
+        name = normalize_name(name)
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT versions, etag, fetched FROM releases WHERE name = ?",
+                    (name,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        versions, etag, fetched = row
+        return CacheEntry(
+            name, None if versions is None else json.loads(versions), etag, fetched
+        )
+
+    def set(self, name, versions, etag=None, fetched=None):
+        entry = CacheEntry(
+            normalize_name(name),
+            None if versions is None else list(versions),
+            etag,
+            time.time() if fetched is None else fetched,
+        )
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?)",
+                (
+                    entry.name,
+                    None if entry.versions is None else json.dumps(entry.versions),
+                    entry.etag,
+                    entry.fetched,
+                ),
+            )
+        return entry
+
+    def clear(self):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM releases")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def lookup(self, name, fetch, offline=None):
+        """Return the cached releases for ``name``, calling ``fetch`` when stale.
+
+        ``fetch(name, etag)`` returns a ``(versions, etag)`` tuple, with
+        ``versions`` set to None for an unknown package, or raises
+        :class:`NotModified`. In offline mode only the cache is consulted.
+        """
+        entry = self.get(name)
+        if offline is None:
+            offline = is_offline()
+        if offline:
+            record_cache("offline hit" if entry else "offline miss")
+            return entry.versions if entry else None
+        if entry and entry.is_fresh(self.ttl, self.negative_ttl):
+            record_cache("hit")
+            return entry.versions
+        try:
+            versions, etag = fetch(name, entry.etag if entry else None)
+        except NotModified:
+            record_cache("revalidated")
+            return self.set(name, entry.versions, entry.etag).versions
+        except Exception:
+            if entry is None:
+                raise
+            # serve stale data rather than nothing when the index is unreachable
+            record_cache("stale")
+            return entry.versions
+        record_cache("miss")
+        return self.set(name, versions, etag).versions
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_release_cache():
+    """Return the shared release cache for the current cache directory."""
+    path = os.path.join(get_cache_dir(), "releases.sqlite")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ReleaseCache(path)
+        return cache
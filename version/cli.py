@@ -1,18 +1,505 @@
+import argparse
+import csv
+import json
+import os
+import re
 import sys
+from version.config import env_flag
 from version.version import VersionUtils
 
+_REQUIREMENT_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
 
-def main(args):
-    version = VersionUtils.get_version(args[0])
-    if len(args) > 1 and args[1] == "increment":
-        print(VersionUtils.increment(version))
+
+def read_requirement_names(path):
+    """Return the project names listed in a requirements style file."""
+    names = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith("-"):
+                continue
+            match = _REQUIREMENT_NAME_RE.match(line)
+            if match:
+                names.append(match.group(1))
+    return names
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion",
+        description="returns the current version of the package name(s)",
+        epilog="commands: annotate, workspace, scan, snapshot, diff and serve "
+        "(see pyversion COMMAND --help); use pyversion -- NAME to query a "
+        "package named like a command",
+    )
+    parser.add_argument("names", nargs="*", metavar="name", help="package name")
+    parser.add_argument(
+        "-r",
+        "--from-file",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="read package names from a requirements file",
+    )
+    parser.add_argument(
+        "-i",
+        "--increment",
+        action="store_true",
+        help="also print the incremented version (see RELEASE_TYPE)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print which source answered and per source timings to stderr",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="never touch the network, the index is only read from the cache "
+        "(same as PYVERSION_OFFLINE=1)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format (default: text)",
+    )
+    return parser
+
+
+def get_serve_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion serve",
+        description="answer version queries over a Unix socket, keeping caches warm",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="socket to listen on (default: PYVERSION_SOCKET or pyversion.sock "
+        "in the runtime or cache directory)",
+    )
+    return parser
+
+
+def get_workspace_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion workspace",
+        description="plan the next version of every project under a directory",
+    )
+    parser.add_argument(
+        "root", nargs="?", default=".", help="workspace root (default: .)"
+    )
+    parser.add_argument(
+        "-t",
+        "--release-type",
+        default=os.environ.get("RELEASE_TYPE", "micro"),
+        help="release type to increment by (default: RELEASE_TYPE or micro)",
+    )
+    parser.add_argument(
+        "--tag-format",
+        default="{name}-{version}",
+        help="tag name, formatted with name and version (default: {name}-{version})",
+    )
+    parser.add_argument(
+        "--tag",
+        action="store_true",
+        help="tag HEAD with the planned tags and push them",
+    )
+    parser.add_argument(
+        "--remote",
+        default=os.environ.get("GIT_REMOTE", "origin"),
+        help="remote to push tags to (default: GIT_REMOTE or origin)",
+    )
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="only show what --tag would do"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format (default: text)",
+    )
+    return parser
+
+
+def workspace(args):
+    """The ``pyversion workspace`` command."""
+    from version import workspace
+
+    options = get_workspace_parser().parse_args(args)
+    entries = workspace.plan(
+        options.root, options.release_type, tag_format=options.tag_format
+    )
+    header = ["path", "name", "version", "next", "tag", "tag_exists"]
+    rows = [
+        [os.path.relpath(entry.path, options.root)] + list(entry[1:])
+        for entry in entries
+    ]
+    if options.format == "json":
+        print(json.dumps([dict(zip(header, row)) for row in rows], indent=2))
+    elif options.format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
     else:
-        print(version)
+        for row in rows:
+            print(" ".join(str(v) for v in row[:5]) + (" (exists)" if row[5] else ""))
+    if options.tag or options.dry_run:
+        from version.git import GitRepository
 
+        repo = GitRepository.discover(options.root)
+        actions = workspace.tag_plan(
+            entries, repo, options.remote, dry_run=options.dry_run
+        )
+        if options.dry_run and options.format == "text":
+            for action in actions:
+                print(action.action, action.tag, action.sha)
+    return 0
 
-if __name__ == "__main__":
-    if len(sys.argv) <= 1:
-        print("usage: cli.py <package name>")
-        print("returns the current version of the package name")
+
+def get_annotate_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion annotate",
+        description="annotate requirement and lock files with the installed, "
+        "latest and next versions of each package",
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        metavar="file",
+        help="requirements.txt, pip freeze output or Pipfile.lock, - for stdin",
+    )
+    parser.add_argument(
+        "-t",
+        "--release-type",
+        default=os.environ.get("RELEASE_TYPE", "micro"),
+        help="release type of the next version (default: RELEASE_TYPE or micro)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=16,
+        help="lookups running at the same time (default: 16)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format, json is one object per line (default: text)",
+    )
+    return parser
+
+
+def _read_all_pins(paths):
+    from version.annotate import read_pins
+
+    for path in paths:
+        if path == "-":
+            yield from read_pins(sys.stdin)
+            continue
+        with open(path) as fh:
+            yield from read_pins(fh)
+
+
+def annotate(args):
+    """The ``pyversion annotate`` command, writing records as they come."""
+    from version.annotate import Record, annotate
+
+    options = get_annotate_parser().parse_args(args)
+    records = annotate(
+        _read_all_pins(options.files),
+        release_type=options.release_type,
+        max_workers=options.jobs,
+    )
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    if options.format == "csv":
+        writer.writerow(Record._fields)
+    for record in records:
+        if options.format == "json":
+            print(json.dumps(record.as_dict()))
+        elif options.format == "csv":
+            writer.writerow(record)
+        else:
+            print(
+                " ".join("-" if value is None else str(value) for value in record[:5])
+            )
+    return 0
+
+
+def get_scan_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion scan",
+        description="list the installed versions of other environments "
+        "without running their interpreters",
+    )
+    parser.add_argument(
+        "roots",
+        nargs="+",
+        metavar="root",
+        help="virtualenv, prefix, site-packages directory or unpacked image layer",
+    )
+    parser.add_argument(
+        "-p",
+        "--package",
+        action="append",
+        dest="packages",
+        metavar="NAME",
+        help="only report this package (repeatable)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="environments scanned at the same time (default: one per cpu)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format (default: text)",
+    )
+    return parser
+
+
+def scan(args):
+    """The ``pyversion scan`` command."""
+    options = get_scan_parser().parse_args(args)
+    scanned = VersionUtils.get_versions_from_environments(
+        options.roots, options.packages, options.jobs
+    )
+    if options.format == "json":
+        print(json.dumps(scanned, indent=2, sort_keys=options.packages is None))
+        return 0
+    rows = [
+        (root, name, version)
+        for root, versions in scanned.items()
+        for name, version in sorted(versions.items(), key=lambda item: item[0])
+    ]
+    if options.format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(["root", "name", "version"])
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            print(" ".join("-" if value is None else value for value in row))
+    return 0
+
+
+def get_snapshot_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion snapshot",
+        description="record the installed versions of environments in a file, "
+        "reading only what changed since the file was last written",
+    )
+    parser.add_argument(
+        "roots",
+        nargs="*",
+        metavar="root",
+        help="environments as for pyversion scan (default: the roots of the "
+        "existing snapshot, else this interpreter's site-packages)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="pyversion-snapshot.json",
+        help="snapshot file (default: pyversion-snapshot.json)",
+    )
+    return parser
+
+
+def get_diff_parser():
+    parser = argparse.ArgumentParser(
+        prog="pyversion diff",
+        description="list the distributions added, removed and changed between "
+        "two snapshots, or since a snapshot",
+    )
+    parser.add_argument("old", help="snapshot file")
+    parser.add_argument(
+        "new", nargs="?", help="snapshot file (default: the environments now)"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format (default: text)",
+    )
+    return parser
+
+
+def snapshot(args):
+    """The ``pyversion snapshot`` command."""
+    from version.snapshot import Snapshot, take_snapshot
+
+    options = get_snapshot_parser().parse_args(args)
+    previous = None
+    if os.path.exists(options.output):
+        previous = Snapshot.load(options.output)
+    current = take_snapshot(options.roots or None, previous)
+    current.save(options.output)
+    versions = current.versions()
+    print(
+        "%s: %d environment(s), %d distribution(s)"
+        % (options.output, len(versions), sum(len(v) for v in versions.values()))
+    )
+    return 0
+
+
+def diff(args):
+    """The ``pyversion diff`` command."""
+    from version.snapshot import Change, Snapshot
+
+    options = get_diff_parser().parse_args(args)
+    old = Snapshot.load(options.old)
+    new = Snapshot.load(options.new) if options.new else old.refresh()
+    changes = old.diff(new)
+    if options.format == "json":
+        print(json.dumps([change.as_dict() for change in changes], indent=2))
+    elif options.format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(Change._fields + ("kind",))
+        writer.writerows(change + (change.kind,) for change in changes)
+    else:
+        for change in changes:
+            print(
+                change.kind,
+                change.root,
+                change.name,
+                change.old or "-",
+                change.new or "-",
+            )
+    return 0
+
+
+def query_server(names, increment=False):
+    """Return ``(name, version, next version)`` rows from a running server.
+
+    Returns None when there is no server to ask, see version.server.
+    """
+    from version.server import query_versions
+
+    release_type = os.environ.get("RELEASE_TYPE", "micro")
+    result = query_versions(
+        list(dict.fromkeys(names)), VersionUtils.get_sources(), increment, release_type
+    )
+    if result is None:
+        return None
+    release_version = os.environ.get("RELEASE_VERSION")
+    return [
+        (name, version, release_version or next_version)
+        for name, (version, next_version) in result.items()
+    ]
+
+
+def write_versions(rows, output_format, increment=False, single=False):
+    """Print ``(name, version, next version)`` rows in the requested format."""
+    header = ["name", "version", "next"] if increment else ["name", "version"]
+    rows = [list(row[: len(header)]) for row in rows]
+    if output_format == "json":
+        if increment:
+            data = {name: {"version": v, "next": n} for name, v, n in rows}
+        else:
+            data = {name: v for name, v in rows}
+        print(json.dumps(data, indent=2))
+    elif output_format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+    elif single:
+        # keep the historical one package output: just the version
+        print(rows[0][-1])
+    else:
+        for row in rows:
+            print(" ".join(row))
+
+
+def resolve_rows(names, increment=False, profile=False):
+    """Return ``(name, version, next version)`` rows resolved in-process."""
+    if profile:
+        versions = {}
+        for name in dict.fromkeys(names):
+            resolution = VersionUtils.resolve(name)
+            print(resolution.format(), file=sys.stderr)
+            versions[name] = resolution.version
     else:
-        main(sys.argv[1:])
+        versions = VersionUtils.get_versions(names)
+    rows = []
+    for name, version in versions.items():
+        next_version = VersionUtils.increment(version) if increment else None
+        rows.append((name, str(version), next_version and str(next_version)))
+    return rows
+
+
+def serve(args):
+    """The ``pyversion serve`` command."""
+    from version.server import serve
+
+    serve(get_serve_parser().parse_args(args).socket)
+    return 0
+
+
+COMMANDS = {
+    "annotate": annotate,
+    "workspace": workspace,
+    "scan": scan,
+    "snapshot": snapshot,
+    "diff": diff,
+    "serve": serve,
+}
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    # support the historical ``pyversion <name> increment`` form
+    if len(args) == 2 and args[1] == "increment":
+        args = ["--increment", "--", args[0]]
+    # ``pyversion -- <name>`` queries packages named like a command
+    if args and args[0] in COMMANDS:
+        return COMMANDS[args[0]](args[1:])
+    parser = get_parser()
+    options = parser.parse_args(args)
+    if not options.offline:
+        return query(parser, options)
+    # the sources read PYVERSION_OFFLINE, set it for this call only
+    previous = os.environ.get("PYVERSION_OFFLINE")
+    os.environ["PYVERSION_OFFLINE"] = "1"
+    try:
+        return query(parser, options)
+    finally:
+        if previous is None:
+            del os.environ["PYVERSION_OFFLINE"]
+        else:
+            os.environ["PYVERSION_OFFLINE"] = previous
+
+
+def query(parser, options):
+    """Print the versions of the packages named in ``options``."""
+    names = list(options.names)
+    for path in options.from_file:
+        names.extend(read_requirement_names(path))
+    if not names:
+        parser.print_usage()
+        return 1
+
+    rows = None
+    if not options.profile and not env_flag("PYVERSION_NO_SERVER"):
+        rows = query_server(names, options.increment)
+    if rows is None:
+        rows = resolve_rows(names, options.increment, options.profile)
+    write_versions(
+        rows,
+        options.format,
+        increment=options.increment,
+        single=len(options.names) == 1 and not options.from_file,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
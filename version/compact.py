@@ -0,0 +1,287 @@
+"""A small, interned PEP 440 version value for holding many versions at once."""
+
+import re
+import threading
+
+__all__ = [
+    "CompactVersion",
+    "InvalidVersion",
+    "intern_clear",
+    "parse",
+    "parse_many",
+    "sort_key",
+    "sort_versions",
+]
+
+# PEP 440, as in packaging.version.VERSION_PATTERN
+_VERSION_RE = re.compile(
+    r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_l>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?P<post>(?:-(?P<post_n1>[0-9]+))|(?:[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?))?
+    (?P<dev>[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_PRE_LETTERS = {"a": "a", "alpha": "a", "b": "b", "beta": "b"}
+_LOCAL_SEPARATORS = re.compile(r"[-_.]")
+_INFINITY = float("inf")
+
+_lock = threading.Lock()
+_interned = {}
+
+
+class InvalidVersion(ValueError):
+    """The string is not a PEP 440 version."""
+
+
+def _parts(string):
+    match = _VERSION_RE.match(string)
+    if match is None:
+        raise InvalidVersion("invalid version: %r" % (string,))
+    pre = post = dev = None
+    if match.group("pre_l"):
+        letter = match.group("pre_l").lower()
+        pre = (_PRE_LETTERS.get(letter, "rc"), int(match.group("pre_n") or 0))
+    if match.group("post"):
+        post = int(match.group("post_n1") or match.group("post_n2") or 0)
+    if match.group("dev"):
+        dev = int(match.group("dev_n") or 0)
+    local = match.group("local")
+    if local:
+        local = tuple(
+            int(part) if part.isdigit() else part.lower()
+            for part in _LOCAL_SEPARATORS.split(local)
+        )
+    return (
+        int(match.group("epoch") or 0),
+        tuple(int(part) for part in match.group("release").split(".")),
+        pre,
+        post,
+        dev,
+        local or None,
+    )
+
+
+def _normalize(epoch, release, pre, post, dev, local):
+    string = "%d!" % epoch if epoch else ""
+    string += ".".join(map(str, release))
+    if pre is not None:
+        string += "%s%d" % pre
+    if post is not None:
+        string += ".post%d" % post
+    if dev is not None:
+        string += ".dev%d" % dev
+    if local is not None:
+        string += "+" + ".".join(map(str, local))
+    return string
+
+
+def _key(epoch, release, pre, post, dev, local):
+    """The packaging.version precedence as a tuple of plain values."""
+    release = list(release)
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    if pre is not None:
+        pre_key = (1,) + pre
+    elif post is None and dev is not None:
+        # 1.0.dev0 sorts before 1.0a0
+        pre_key = (0,)
+    else:
+        pre_key = (2,)
+    return (
+        epoch,
+        tuple(release),
+        pre_key,
+        -1 if post is None else post,
+        _INFINITY if dev is None else dev,
+        (
+            ()
+            if local is None
+            else tuple(
+                (1, part, "") if isinstance(part, int) else (0, 0, part)
+                for part in local
+            )
+        ),
+    )
+
+
+class CompactVersion(object):
+    """An immutable PEP 440 version holding only its normalized string and sort key.
+
+    Instances are interned: parsing the same (or an equivalent) string again
+    returns the same object, so large collections of versions share them.
+    Comparisons and hashing only touch the precomputed key. The version
+    parts are parsed again from the string when asked for.
+    """
+
+    __slots__ = ("_string", "_key", "_hash")
+
+    def __init__(self, string, key):
+        self._string = string
+        self._key = key
+        self._hash = hash(key)
+
+    @classmethod
+    def from_packaging(cls, version):
+        """Return the CompactVersion of a ``packaging.version.Version``."""
+        return parse(str(version))
+
+    def to_packaging(self):
+        from packaging.version import Version
+
+        return Version(self._string)
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def epoch(self):
+        return _parts(self._string)[0]
+
+    @property
+    def release(self):
+        return _parts(self._string)[1]
+
+    @property
+    def pre(self):
+        return _parts(self._string)[2]
+
+    @property
+    def post(self):
+        return _parts(self._string)[3]
+
+    @property
+    def dev(self):
+        return _parts(self._string)[4]
+
+    @property
+    def local(self):
+        local = _parts(self._string)[5]
+        return None if local is None else ".".join(map(str, local))
+
+    @property
+    def public(self):
+        return self._string.split("+", 1)[0]
+
+    @property
+    def is_prerelease(self):
+        return self._key[2][0] != 2 or self._key[4] != _INFINITY
+
+    @property
+    def is_postrelease(self):
+        return self._key[3] != -1
+
+    @property
+    def is_devrelease(self):
+        return self._key[4] != _INFINITY
+
+    def __str__(self):
+        return self._string
+
+    def __repr__(self):
+        return "<CompactVersion(%r)>" % self._string
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self is other or self._key == other._key
+
+    def __ne__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self._key != other._key
+
+    def __lt__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self._key < other._key
+
+    def __le__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self._key <= other._key
+
+    def __gt__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self._key > other._key
+
+    def __ge__(self, other):
+        if not isinstance(other, CompactVersion):
+            return NotImplemented
+        return self._key >= other._key
+
+    def __reduce__(self):
+        return parse, (self._string,)
+
+
+def parse(version):
+    """Return the interned CompactVersion of ``version``.
+
+    ``version`` is a string, a ``packaging`` version or a CompactVersion.
+    Raises InvalidVersion for strings that are not PEP 440 versions.
+    """
+    if isinstance(version, CompactVersion):
+        return version
+    string = str(version)
+    compact = _interned.get(string)
+    if compact is None:
+        parts = _parts(string)
+        normalized = _normalize(*parts)
+        with _lock:
+            compact = _interned.get(normalized)
+            if compact is None:
+                compact = CompactVersion(normalized, _key(*parts))
+                _interned[normalized] = compact
+            _interned[string] = compact
+    return compact
+
+
+def parse_many(versions, strict=True):
+    """Parse a list of version strings, returning CompactVersions in the same order.
+
+    Invalid versions raise InvalidVersion, or become None unless ``strict``.
+    """
+    get = _interned.get
+    result = []
+    for version in versions:
+        compact = get(version) if isinstance(version, str) else None
+        if compact is None:
+            try:
+                compact = parse(version)
+            except InvalidVersion:
+                if strict:
+                    raise
+        result.append(compact)
+    return result
+
+
+def sort_key(version):
+    """Return the precedence key of ``version``, usable as a ``sort`` key."""
+    return parse(version)._key
+
+
+def sort_versions(versions, reverse=False):
+    """Return the version strings in ``versions`` sorted by PEP 440 precedence.
+
+    Versions that do not parse are dropped.
+    """
+    pairs = zip(parse_many(versions, strict=False), versions)
+    pairs = [(compact._key, version) for compact, version in pairs if compact]
+    pairs.sort(key=lambda pair: pair[0], reverse=reverse)
+    return [version for _, version in pairs]
+
+
+def intern_clear():
+    """Forget the interned versions, existing instances stay valid."""
+    with _lock:
+        _interned.clear()
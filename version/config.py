@@ -0,0 +1,38 @@
+"""Helpers reading pyversion settings from the environment."""
+
+import os
+
+__all__ = ["env_flag", "env_seconds", "get_cache_dir"]
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def env_flag(name, default=False):
+    """Whether the environment variable ``name`` is set to a true value."""
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in _TRUE_VALUES
+
+
+def env_seconds(name, default=None):
+    """Return the environment variable ``name`` as a number of seconds."""
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def get_cache_dir():
+    """Return the directory pyversion keeps its persistent caches in.
+
+    ``PYVERSION_CACHE_DIR`` wins, then ``$XDG_CACHE_HOME/pyversion`` and
+    finally ``~/.cache/pyversion``.
+    """
+    path = os.environ.get("PYVERSION_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        path = os.path.join(base, "pyversion")
+    return path
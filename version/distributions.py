@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import threading
+from .tracing import record_cache
+
+__all__ = ["DistributionIndex", "get_distribution_index", "normalize_name"]
+
+_NORMALIZE_RE = re.compile(r"[-_.]+")
+
+
+def _importlib_metadata():
+    try:
+        from importlib import metadata
+    except ImportError:  # python < 3.8
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            metadata = None
+    return metadata
+
+
+def normalize_name(name):
+    """Normalize a project name as described in PEP 503."""
+    return _NORMALIZE_RE.sub("-", name).lower()
+
+
+class DistributionIndex(object):
+    """Maps normalized project names to the versions installed on a path.
+
+    The index is built once and only rebuilt when the path entries or their
+    modification times change, so lookups are plain dictionary accesses.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._versions = {}
+
+    @property
+    def path(self):
+        return list(sys.path if self._path is None else self._path)
+
+    @staticmethod
+    def fingerprint(path):
+        """Return a hashable snapshot of the path entries and their mtimes."""
+        key = []
+        for entry in path:
+            try:
+                mtime = os.stat(entry or os.curdir).st_mtime_ns
+            except OSError:
+                mtime = None
+            key.append((entry, mtime))
+        return tuple(key)
+
+    @staticmethod
+    def scan(path):
+        """Return a ``{normalized name: version}`` map for the given path."""
+        versions = {}
+        importlib_metadata = _importlib_metadata()
+        if importlib_metadata is not None:
+            for dist in importlib_metadata.distributions(path=path):
+                name = dist.metadata["Name"]
+                if name:
+                    # the first entry on the path wins, as it does on import
+                    versions.setdefault(normalize_name(name), dist.version)
+        else:
+            import pkg_resources
+
+            for dist in pkg_resources.WorkingSet(path):
+                versions.setdefault(normalize_name(dist.project_name), dist.version)
+        return versions
+
+    def refresh(self):
+        """Rebuild the index if the path changed since it was last built."""
+        path = self.path
+        fingerprint = self.fingerprint(path)
+        if fingerprint != self._fingerprint:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._versions = self.scan(path)
+                    self._fingerprint = fingerprint
+                    record_cache("miss")
+                    return self._versions
+        record_cache("hit")
+        return self._versions
+
+    def invalidate(self):
+        with self._lock:
+            self._fingerprint = None
+
+    def get(self, name, default=None):
+        return self.refresh().get(normalize_name(name), default)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.refresh()
+
+    def __len__(self):
+        return len(self.refresh())
+
+
+_default_index = DistributionIndex()
+
+
+def get_distribution_index():
+    """Return the shared index over the distributions on ``sys.path``."""
+    return _default_index
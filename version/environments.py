@@ -0,0 +1,187 @@
+"""Reading the installed versions of other environments, without running them."""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .distributions import normalize_name
+from .log import logger
+
+__all__ = [
+    "find_site_dirs",
+    "read_distribution",
+    "read_metadata_header",
+    "read_site_dir",
+    "scan_environments",
+    "scan_root",
+    "scan_site_dir",
+]
+
+# where site directories live below a virtualenv, prefix or image layer root
+SITE_PATTERNS = (
+    "lib/python*/site-packages",
+    "lib64/python*/site-packages",
+    "lib/python*/dist-packages",
+    "Lib/site-packages",
+    "usr/lib/python*/site-packages",
+    "usr/lib/python*/dist-packages",
+    "usr/lib64/python*/site-packages",
+    "usr/local/lib/python*/site-packages",
+    "usr/local/lib/python*/dist-packages",
+)
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+# headers are small, a metadata file is read in chunks of this size until the
+# name and version are known
+_CHUNK_SIZE = 1024
+
+
+def _is_site_dir(path):
+    try:
+        return any(entry.endswith(METADATA_SUFFIXES) for entry in os.listdir(path))
+    except OSError:
+        return False
+
+
+def find_site_dirs(root):
+    """Return the site directories of ``root``, in import order.
+
+    ``root`` is a site directory itself, or a virtualenv, installation
+    prefix or unpacked image layer holding some below it.
+    """
+    if _is_site_dir(root):
+        return [root]
+    found = []
+    for pattern in SITE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            # lib64 is often a symlink to lib
+            if os.path.isdir(path) and os.path.realpath(path) not in found:
+                found.append(os.path.realpath(path))
+    return found
+
+
+def read_metadata_header(path):
+    """Return ``(name, version)`` from the headers of a METADATA or PKG-INFO file.
+
+    Only the bytes up to both fields (or the end of the headers) are read,
+    never the long description following them.
+    """
+    name = version = None
+    data = b""
+    with open(path, "rb") as fh:
+        while name is None or version is None:
+            chunk = fh.read(_CHUNK_SIZE)
+            data += chunk
+            lines = data.split(b"\n")
+            # the last line may be incomplete, unless the file ended
+            data = lines.pop() if chunk else b""
+            for line in lines:
+                line = line.rstrip(b"\r")
+                if not line:
+                    # end of the headers
+                    return name, version
+                key, _, value = line.partition(b":")
+                key = key.strip().lower()
+                if key == b"name" and name is None:
+                    name = value.strip().decode("utf-8", "replace")
+                elif key == b"version" and version is None:
+                    version = value.strip().decode("utf-8", "replace")
+            if not chunk:
+                break
+    return name, version
+
+
+def _metadata_file(path):
+    if path.endswith(".dist-info"):
+        return os.path.join(path, "METADATA")
+    if os.path.isdir(path):
+        return os.path.join(path, "PKG-INFO")
+    # a distutils egg-info file holds PKG-INFO itself
+    return path
+
+
+def read_distribution(path):
+    """Return ``(name, version)`` of a .dist-info or .egg-info entry, or None."""
+    try:
+        name, version = read_metadata_header(_metadata_file(path))
+    except OSError:
+        name = version = None
+    if name and version:
+        return name, version
+    # name-version.dist-info, name-version-pyX.Y.egg-info
+    parts = os.path.splitext(os.path.basename(path))[0].split("-")
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    return None
+
+
+def scan_site_dir(path):
+    """Return ``{normalized name: version}`` for the distributions in ``path``."""
+    versions = {}
+    try:
+        entries = sorted(os.listdir(path))
+    except OSError as err:
+        logger.warning(f"unable to list {path}: {err}")
+        return versions
+    for entry in entries:
+        if not entry.endswith(METADATA_SUFFIXES):
+            continue
+        found = read_distribution(os.path.join(path, entry))
+        if found:
+            versions.setdefault(normalize_name(found[0]), found[1])
+    return versions
+
+
+def read_site_dir(path, known=None):
+    """Return ``{entry: [mtime, normalized name, version]}`` for the distributions in ``path``.
+
+    Entries of ``known``, an earlier result for ``path``, whose mtime did
+    not change are reused instead of being read again.
+    """
+    known = known or {}
+    entries = {}
+    with os.scandir(path) as scanner:
+        for entry in scanner:
+            if not entry.name.endswith(METADATA_SUFFIXES):
+                continue
+            try:
+                mtime = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+            found = known.get(entry.name)
+            if found is None or found[0] != mtime:
+                distribution = read_distribution(entry.path)
+                if distribution is None:
+                    continue
+                name, version = distribution
+                found = [mtime, normalize_name(name), version]
+            entries[entry.name] = found
+    return entries
+
+
+def scan_root(root):
+    """Return ``{normalized name: version}`` for all site directories of ``root``.
+
+    The first site directory knowing a distribution wins, as on import.
+    """
+    versions = {}
+    site_dirs = find_site_dirs(root)
+    if not site_dirs:
+        logger.warning(f"no site directory found in {root}")
+    for site_dir in site_dirs:
+        for name, version in scan_site_dir(site_dir).items():
+            versions.setdefault(name, version)
+    return versions
+
+
+def scan_environments(roots, max_workers=None):
+    """Return ``{root: {normalized name: version}}`` for many environments.
+
+    Each root is scanned in a worker process (see scan_root), so hundreds
+    of environments are read in parallel without starting their
+    interpreters; a single root is scanned in-process.
+    """
+    roots = list(dict.fromkeys(roots))
+    if len(roots) <= 1 or max_workers == 1:
+        return {root: scan_root(root) for root in roots}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(scan_root, roots, chunksize=4)
+        return dict(zip(roots, results))
@@ -0,0 +1,96 @@
+"""Racing the version sources against each other instead of asking them in turn."""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, wait
+from . import tracing
+from .config import env_seconds
+from .log import logger
+from .version import DEFAULT_VERSION, SOURCES, VersionUtils, parse_version
+
+__all__ = ["race"]
+
+
+def _start(func, *args):
+    """Call ``func(*args)`` on a daemon thread, returning a Future of its result.
+
+    Daemon threads rather than an executor: a source stuck past its timeout
+    must not keep the interpreter from exiting.
+    """
+    future = Future()
+    # run in a copy of the context so spans nest under the resolve span
+    context = contextvars.copy_context()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(func, *args))
+        except BaseException as err:
+            future.set_exception(err)
+
+    threading.Thread(target=run, name="pyversion-source", daemon=True).start()
+    return future
+
+
+def _remaining(*limits):
+    limits = [limit for limit in limits if limit is not None]
+    if not limits:
+        return None
+    return max(min(limits) - time.perf_counter(), 0)
+
+
+def race(package, sources=None, timeout=None, source_timeouts=None, deadline=None):
+    """Resolve ``package`` asking all sources at once, see VersionUtils.resolve.
+
+    The first source in priority order (the order of ``sources``) with an
+    answer wins: a lower priority answer is held until every source before
+    it missed, failed or timed out, so the result is the one the sequential
+    resolution gives, only without paying for each source in turn.
+    ``timeout`` bounds each source (default ``PYVERSION_SOURCE_TIMEOUT``),
+    ``source_timeouts`` overrides it per source name and ``deadline`` bounds
+    the whole resolution (default ``PYVERSION_DEADLINE``), all in seconds.
+    Sources still running when the result is known are left to finish in
+    the background and their outcome is ignored.
+    """
+    if timeout is None:
+        timeout = env_seconds("PYVERSION_SOURCE_TIMEOUT")
+    if deadline is None:
+        deadline = env_seconds("PYVERSION_DEADLINE")
+    source_timeouts = source_timeouts or {}
+    sources = VersionUtils.get_sources(sources)
+
+    with tracing.resolving(package) as resolution:
+        started = time.perf_counter()
+        end = None if deadline is None else started + deadline
+        running = []
+        for name in sources:
+            # each source records into its own Resolution, copied over once
+            # waited for, so late finishers do not show up after the fact
+            own = tracing.Resolution(package)
+            method = getattr(VersionUtils, SOURCES[name])
+            future = _start(tracing.run_source, own, name, method)
+            running.append((name, own, future))
+
+        version = None
+        for name, own, future in running:
+            limit = source_timeouts.get(name, timeout)
+            wait([future], _remaining(end, None if limit is None else started + limit))
+            if not future.done():
+                error = TimeoutError(f"{name} lookup of {package} timed out")
+                logger.warning(str(error))
+                elapsed = time.perf_counter() - started
+                tracing.record_attempt(resolution, name, elapsed, error)
+                continue
+            resolution.attempts.extend(own.attempts)
+            try:
+                version = future.result()
+            except Exception as err:
+                logger.warning(f"{name} lookup of {package} failed: {err}")
+                continue
+            if version:
+                resolution.source = name
+                break
+        resolution.version = parse_version(version or DEFAULT_VERSION)
+    return resolution
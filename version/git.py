@@ -0,0 +1,689 @@
+"""Read-only access to git refs without forking a git process per question."""
+
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from .distributions import normalize_name
+from .log import logger
+from .version import VersionUtils
+
+__all__ = [
+    "GitObjectReader",
+    "GitRepository",
+    "TagAction",
+    "describe_to_version",
+    "find_git_dir",
+    "find_repository",
+]
+
+TAGS_PREFIX = "refs/tags/"
+_MAX_PEEL = 10
+# tags looking like versions, with or without a leading v
+DESCRIBE_PATTERNS = ("[0-9]*", "v[0-9]*")
+# the message `setup.py tag` has always given its annotated tags
+DEFAULT_TAG_MESSAGE = '""'
+# the project part of ``{name}-{version}`` tags
+_PROJECT_TAG_RE = re.compile(r"^(?P<name>.+?)-(?=[0-9])")
+
+# (git dir, HEAD, tag refs, index mtime, patterns) -> (time, describe result)
+_described = OrderedDict()
+_described_lock = threading.Lock()
+DESCRIBE_CACHE_SIZE = 64
+# seconds a describe result is trusted, ``--dirty`` cannot be checked cheaply
+DESCRIBE_TTL = 1.0
+
+
+class TagAction(namedtuple("TagAction", "tag sha action")):
+    """What creating tag ``tag`` on object ``sha`` amounts to.
+
+    ``action`` is ``create``, ``exists`` when the tag already points to the
+    same commit or ``conflict`` when it points elsewhere.
+    """
+
+    __slots__ = ()
+
+
+def find_repository(path=None):
+    """Return the ``(work tree, git directory)`` containing ``path``.
+
+    Walks up from ``path`` (default: the current directory) looking for a
+    ``.git`` directory or a ``.git`` file pointing to one, as used by
+    worktrees and submodules. Returns ``(None, None)`` outside of a
+    repository.
+    """
+    path = os.path.abspath(path or os.curdir)
+    while True:
+        candidate = os.path.join(path, ".git")
+        if os.path.isdir(candidate):
+            return path, candidate
+        if os.path.isfile(candidate):
+            with open(candidate) as fh:
+                content = fh.read().strip()
+            if content.startswith("gitdir:"):
+                git_dir = content.split(":", 1)[1].strip()
+                return path, os.path.normpath(os.path.join(path, git_dir))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None, None
+        path = parent
+
+
+def find_git_dir(path=None):
+    """Return the git directory containing ``path``, see find_repository."""
+    return find_repository(path)[1]
+
+
+def describe_to_version(tag, distance=0, sha=None, dirty=False):
+    """Turn ``git describe`` output parts into a PEP 440 version string.
+
+    A clean checkout of the tag gives the tag version. Commits on top of it
+    give the next micro (or pre-release) version as a ``.devN`` release, N
+    being the distance, and the abbreviated sha and dirty state go into the
+    local segment, e.g. ``1.2.4.dev3+g1a2b3c4.dirty``.
+    Returns None when the tag is not a PEP 440 version.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        version = Version(tag[1:] if tag[:1] in "vV" else tag)
+    except InvalidVersion:
+        return None
+    if not distance and not dirty:
+        return str(version)
+    epoch = "%d!" % version.epoch if version.epoch else ""
+    release = list(version.release)
+    if version.pre:
+        letter, number = version.pre
+        pre = "%s%d" % (letter, number + 1)
+    else:
+        release += [0] * (3 - len(release))
+        release[-1] += 1
+        pre = ""
+    local = ["g" + sha] if sha else []
+    if dirty:
+        local.append("dirty")
+    result = "%s%s%s.dev%d" % (epoch, ".".join(map(str, release)), pre, distance)
+    if local:
+        result += "+" + ".".join(local)
+    return result
+
+
+def _stop_coprocess(process):
+    process.stdin.close()
+    try:
+        process.wait(1)
+    except Exception:
+        process.kill()
+        process.wait()
+    process.stdout.close()
+
+
+class GitObjectReader(object):
+    """Answers object queries through one long running ``git cat-file --batch``.
+
+    Asking about many objects costs a line written to and read from a pipe
+    each instead of a git process each. The coprocess is started on first
+    use and stopped by close, or when the reader is garbage collected.
+    """
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self._lock = threading.Lock()
+        self._process = None
+        self._finalizer = None
+
+    def _start(self):
+        import subprocess
+        import weakref
+
+        self._process = subprocess.Popen(
+            ["git", "--git-dir=%s" % self.git_dir, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._finalizer = weakref.finalize(self, _stop_coprocess, self._process)
+
+    def read(self, name):
+        """Return ``(sha, type, content)`` of the object ``name``, or None.
+
+        ``name`` is anything git understands, e.g. ``v1.0^{commit}``.
+        """
+        if "\n" in name:
+            raise ValueError("object names cannot contain newlines")
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            self._process.stdin.write(name.encode("utf-8") + b"\n")
+            self._process.stdin.flush()
+            header = self._process.stdout.readline().split()
+            if not header:
+                raise Exception("git cat-file --batch exited unexpectedly")
+            if len(header) != 3:
+                # "<name> missing" or "<name> ambiguous"
+                return None
+            sha, kind, size = header
+            # the content is followed by a newline
+            content = self._process.stdout.read(int(size) + 1)[:-1]
+        return sha.decode("ascii"), kind.decode("ascii"), content
+
+    def info(self, name):
+        """Return ``(sha, type)`` of the object ``name``, or None."""
+        found = self.read(name)
+        return found and found[:2]
+
+    def close(self):
+        with self._lock:
+            if self._finalizer is not None:
+                self._finalizer()
+            self._process = self._finalizer = None
+
+
+class GitRepository(object):
+    """Answers ref questions (HEAD, tags) for a git directory.
+
+    Refs are read straight from ``packed-refs`` and the loose ref files; git
+    is only run for what cannot be read directly (peeling a packed annotated
+    tag object, or repositories using the reftable backend), and then with a
+    single command. The tag index is built once per instance.
+    """
+
+    def __init__(self, git_dir, work_tree=None):
+        self.git_dir = os.path.abspath(git_dir)
+        self.work_tree = work_tree
+        commondir = os.path.join(self.git_dir, "commondir")
+        if os.path.isfile(commondir):
+            with open(commondir) as fh:
+                self.common_dir = os.path.normpath(
+                    os.path.join(self.git_dir, fh.read().strip())
+                )
+        else:
+            self.common_dir = self.git_dir
+        self._lock = threading.Lock()
+        self._packed_text = None
+        self._packed = None
+        self._tags = None
+        self._objects = None
+
+    @classmethod
+    def discover(cls, path=None):
+        work_tree, git_dir = find_repository(path)
+        if git_dir is None:
+            git_dir = VersionUtils.get_git_directory()
+        if not git_dir:
+            raise Exception("%s is not inside a git repository" % (path or os.getcwd()))
+        return cls(git_dir, work_tree)
+
+    @property
+    def uses_reftable(self):
+        return os.path.isdir(os.path.join(self.common_dir, "reftable"))
+
+    def git(self, cmd, **kwargs):
+        return VersionUtils.run_git_command(cmd, self.git_dir, **kwargs)
+
+    @property
+    def objects(self):
+        """The GitObjectReader of this repository, shared by all lookups."""
+        with self._lock:
+            if self._objects is None:
+                self._objects = GitObjectReader(self.git_dir)
+            return self._objects
+
+    def close(self):
+        """Stop the git coprocess, if one was started."""
+        if self._objects is not None:
+            self._objects.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def invalidate(self):
+        """Forget cached refs, e.g. after creating tags."""
+        with self._lock:
+            self._packed_text = None
+            self._packed = None
+            self._tags = None
+        with _described_lock:
+            for key in [key for key in _described if key[0] == self.common_dir]:
+                del _described[key]
+        # the coprocess caches refs too
+        self.close()
+
+    def _read_packed_text(self):
+        text = self._packed_text
+        if text is None:
+            try:
+                with open(os.path.join(self.common_dir, "packed-refs")) as fh:
+                    text = fh.read()
+            except (IOError, OSError):
+                text = ""
+            if text and not text.endswith("\n"):
+                text += "\n"
+            self._packed_text = text
+        return text
+
+    @staticmethod
+    def _is_fully_peeled(text):
+        if text.startswith("# pack-refs with:"):
+            header = text.split("\n", 1)[0]
+            return "fully-peeled" in header.split(":", 1)[1].split()
+        return False
+
+    def packed_refs(self):
+        """Return ``{refname: (sha, peeled sha or None)}`` from packed-refs."""
+        with self._lock:
+            if self._packed is None:
+                self._packed = self._parse_packed_refs(self._read_packed_text())
+            return self._packed
+
+    def _parse_packed_refs(self, text):
+        refs = {}
+        last = None
+        # with fully-peeled, refs without a ^ line are not tag objects
+        fully_peeled = self._is_fully_peeled(text)
+        for line in text.splitlines():
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("^"):
+                if last is not None:
+                    refs[last] = (refs[last][0], line[1:])
+                continue
+            sha, _, refname = line.partition(" ")
+            refs[refname] = (sha, sha if fully_peeled else None)
+            last = refname
+        return refs
+
+    def packed_ref(self, refname):
+        """Return ``(sha, peeled sha or None)`` for one packed ref, or None.
+
+        Searches the raw packed-refs content instead of parsing every line,
+        which is what makes single lookups cheap in repositories with
+        thousands of tags.
+        """
+        if self._packed is not None:
+            return self._packed.get(refname)
+        with self._lock:
+            text = self._read_packed_text()
+        needle = " " + refname + "\n"
+        position = text.find(needle)
+        while position != -1:
+            line_start = text.rfind("\n", 0, position) + 1
+            sha = text[line_start:position]
+            if sha and " " not in sha and not sha.startswith(("#", "^")):
+                break
+            position = text.find(needle, position + 1)
+        else:
+            return None
+        following = position + len(needle)
+        if text.startswith("^", following):
+            start, end = following + 1, text.find("\n", following)
+            return sha, text[start:end]
+        return sha, sha if self._is_fully_peeled(text) else None
+
+    def _loose_ref_path(self, refname):
+        base = self.git_dir if refname == "HEAD" else self.common_dir
+        return os.path.join(base, *refname.split("/"))
+
+    def read_ref(self, refname):
+        """Return the sha ``refname`` points to, following symbolic refs."""
+        for _ in range(_MAX_PEEL):
+            try:
+                with open(self._loose_ref_path(refname)) as fh:
+                    value = fh.read().strip()
+            except (IOError, OSError):
+                packed = self.packed_ref(refname)
+                return packed[0] if packed else None
+            if not value.startswith("ref:"):
+                return value or None
+            refname = value.split(":", 1)[1].strip()
+        return None
+
+    def head(self):
+        """Return the sha of the commit checked out in the work tree."""
+        sha = None if self.uses_reftable else self.read_ref("HEAD")
+        if sha is None:
+            sha = self.git(["rev-parse", "HEAD"]) or None
+        return sha
+
+    def _read_loose_object(self, sha):
+        path = os.path.join(self.common_dir, "objects", sha[:2], sha[2:])
+        try:
+            with open(path, "rb") as fh:
+                data = zlib.decompress(fh.read())
+        except (IOError, OSError, zlib.error):
+            return None, None
+        header, _, body = data.partition(b"\0")
+        return header.split(b" ", 1)[0].decode("ascii"), body
+
+    def peel(self, sha):
+        """Return the commit an (annotated) tag object ultimately points to."""
+        for _ in range(_MAX_PEEL):
+            kind, body = self._read_loose_object(sha)
+            if kind is None:
+                found = self.objects.info(sha + "^{commit}")
+                return found[0] if found else ""
+            if kind != "tag":
+                return sha
+            sha = body.split(b"\n", 1)[0].split(b" ", 1)[1].decode("ascii")
+        return sha
+
+    def _scan_tags(self):
+        if self.uses_reftable:
+            return self._scan_tags_with_git()
+        tags = {}
+        for refname, (sha, peeled) in self.packed_refs().items():
+            if refname.startswith(TAGS_PREFIX):
+                tags[refname.replace(TAGS_PREFIX, "", 1)] = (sha, peeled)
+        root = os.path.join(self.common_dir, "refs", "tags")
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                with open(path) as fh:
+                    # loose refs take precedence over packed ones
+                    tags[name] = (fh.read().strip(), None)
+        return tags
+
+    def _scan_tags_with_git(self):
+        lines = VersionUtils.iter_git_command(
+            [
+                "for-each-ref",
+                "--format=%(refname:strip=2) %(objectname) %(*objectname)",
+                TAGS_PREFIX,
+            ],
+            self.git_dir,
+        )
+        tags = {}
+        for line in lines:
+            name, sha, peeled = (line.split(" ") + [""])[:3]
+            tags[name] = (sha, peeled or sha)
+        return tags
+
+    def tag_index(self):
+        """Return ``{tag name: (sha, peeled sha or None)}`` for all tags."""
+        tags = self._tags
+        if tags is None:
+            tags = self._scan_tags()
+            with self._lock:
+                self._tags = tags
+        return tags
+
+    def tags(self):
+        """Return the set of tag names."""
+        return set(self.tag_index())
+
+    def has_tag(self, name):
+        if self._tags is not None or self.uses_reftable:
+            return name in self.tag_index()
+        refname = TAGS_PREFIX + name
+        return os.path.isfile(self._loose_ref_path(refname)) or bool(
+            self.packed_ref(refname)
+        )
+
+    def resolve_tag(self, name):
+        """Return the commit sha ``name`` points to, or None if there is no such tag."""
+        if self._tags is not None or self.uses_reftable:
+            entry = self.tag_index().get(name)
+        else:
+            refname = TAGS_PREFIX + name
+            try:
+                with open(self._loose_ref_path(refname)) as fh:
+                    entry = (fh.read().strip(), None)
+            except (IOError, OSError):
+                entry = self.packed_ref(refname)
+        if entry is None:
+            return None
+        sha, peeled = entry
+        return peeled or self.peel(sha)
+
+    def describe(self, match=DESCRIBE_PATTERNS):
+        """Return ``(tag, distance, sha, dirty)`` for the nearest matching tag.
+
+        A single ``git describe`` call; returns None when no tag is reachable.
+        """
+        cmd = ["describe", "--tags", "--long", "--abbrev=7"]
+        for pattern in match:
+            cmd += ["--match", pattern]
+        if self.work_tree:
+            output = VersionUtils.run_shell_command(
+                ["git", "-C", self.work_tree] + cmd + ["--dirty"]
+            )
+        else:
+            output = self.git(cmd)
+        if not output:
+            return None
+        dirty = output.endswith("-dirty")
+        if dirty:
+            output = output.rsplit("-", 1)[0]
+        tag, distance, sha = output.rsplit("-", 2)
+        return tag, int(distance), sha[1:], dirty
+
+    def describe_version(self, match=DESCRIBE_PATTERNS):
+        """Return the version derived from describe, see describe_to_version."""
+        described = self.describe(match)
+        if described is None:
+            return None
+        return describe_to_version(*described)
+
+    def tags_stamp(self):
+        """Return the mtimes of packed-refs, refs/tags and the reftable.
+
+        Creating or deleting tags changes at least one of them (tags in
+        sub-directories of refs/tags aside), which makes it a cheap
+        freshness check for anything derived from the tags.
+        """
+        stamp = []
+        for parts in (("packed-refs",), ("refs", "tags"), ("reftable",)):
+            try:
+                stamp.append(os.stat(os.path.join(self.common_dir, *parts)).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def describe_cached(self, match=DESCRIBE_PATTERNS):
+        """describe, remembered per HEAD, tag refs and index state.
+
+        At most DESCRIBE_CACHE_SIZE results are kept, each for DESCRIBE_TTL
+        seconds, so work tree changes (``--dirty``) are picked up quickly.
+        """
+        try:
+            index_mtime = os.stat(os.path.join(self.git_dir, "index")).st_mtime_ns
+        except OSError:
+            index_mtime = None
+        key = (
+            self.common_dir,
+            self.head(),
+            self.tags_stamp(),
+            index_mtime,
+            tuple(match),
+        )
+        now = time.monotonic()
+        with _described_lock:
+            found = _described.get(key)
+            if found is not None and now - found[0] < DESCRIBE_TTL:
+                _described.move_to_end(key)
+                return found[1]
+        described = self.describe(match)
+        with _described_lock:
+            _described[key] = (now, described)
+            _described.move_to_end(key)
+            while len(_described) > DESCRIBE_CACHE_SIZE:
+                _described.popitem(last=False)
+        return described
+
+    def project_tag_prefixes(self):
+        """Return ``{normalized name: tag prefix}`` of the ``{name}-{version}`` tags."""
+        prefixes = {}
+        for tag in self.tag_index():
+            match = _PROJECT_TAG_RE.match(tag)
+            if match:
+                name = match.group("name")
+                prefixes.setdefault(normalize_name(name), name + "-")
+        return prefixes
+
+    def package_versions(self, packages, project=None):
+        """Return ``{package: version}`` derived from the tags of this repository.
+
+        The ``project`` of the checkout is versioned by its plain version
+        tags (see describe_version), other packages by their own
+        ``{name}-{version}`` tags, as created by ``pyversion workspace``.
+        Packages with neither map to None. ``git describe`` runs once per
+        package with tags and is remembered per HEAD, see describe_cached.
+        """
+        project = normalize_name(project) if project else None
+        prefixes = None
+        versions = {}
+        for package in packages:
+            name = normalize_name(package)
+            if name == project:
+                prefix = ""
+            else:
+                if prefixes is None:
+                    prefixes = self.project_tag_prefixes()
+                prefix = prefixes.get(name)
+            if prefix is None:
+                versions[package] = None
+                continue
+            match = (prefix + "[0-9]*",) if prefix else DESCRIBE_PATTERNS
+            described = self.describe_cached(match)
+            if described is None:
+                versions[package] = None
+                continue
+            tag, distance, sha, dirty = described
+            versions[package] = describe_to_version(
+                tag.replace(prefix, "", 1), distance, sha, dirty
+            )
+        return versions
+
+    def _object_info(self, names):
+        """Return ``(sha, type)`` for each object name."""
+        info = []
+        for name in names:
+            found = self.objects.info(name)
+            if found is None:
+                raise Exception("%s is not a git object" % name)
+            info.append(found)
+        return info
+
+    def plan_tags(self, pairs):
+        """Return a TagAction per ``(tag, object name)`` pair.
+
+        Object names may be anything git understands (full or abbreviated
+        shas, ``HEAD``, ...), the plan holds the full shas.
+        """
+        return self._plan_tags(pairs)[0]
+
+    def _plan_tags(self, pairs):
+        pairs = list(pairs)
+        info = self._object_info([sha for _, sha in pairs])
+        actions = []
+        for (tag, _), (sha, kind) in zip(pairs, info):
+            current = self.resolve_tag(tag)
+            if current is None:
+                action = "create"
+            else:
+                commit = self.peel(sha) if kind == "tag" else sha
+                action = "exists" if current == commit else "conflict"
+            actions.append(TagAction(tag, sha, action))
+        return actions, dict(info)
+
+    def create_tags(self, pairs, message=DEFAULT_TAG_MESSAGE, annotated=True):
+        """Create many tags in a single reference transaction.
+
+        All annotated tag objects are written with one ``git hash-object``
+        call and all refs created with one ``git update-ref --stdin``
+        transaction: either every tag is created or none is. Tags that
+        already point to the right commit are left alone and a conflicting
+        one raises before anything is written. ``pairs`` may also be the
+        TagActions of plan_tags, which are then not planned again; a tag
+        created since fails the transaction. Returns the plan.
+        """
+        pairs = list(pairs)
+        if pairs and all(isinstance(pair, TagAction) for pair in pairs):
+            actions = pairs
+            created = [action.sha for action in actions if action.action == "create"]
+            kinds = dict(self._object_info(created)) if annotated else {}
+        else:
+            actions, kinds = self._plan_tags(pairs)
+        conflicts = [action.tag for action in actions if action.action == "conflict"]
+        if conflicts:
+            raise Exception(
+                "tag(s) %s already exist on other commits" % ", ".join(conflicts)
+            )
+        todo = [action for action in actions if action.action == "create"]
+        if not todo:
+            return actions
+        targets = [action.sha for action in todo]
+        if annotated:
+            targets = self._write_tag_objects(todo, kinds, message)
+        transaction = ["start"]
+        for action, target in zip(todo, targets):
+            transaction.append("create %s%s %s" % (TAGS_PREFIX, action.tag, target))
+        transaction += ["prepare", "commit"]
+        self.git(
+            ["update-ref", "--stdin"],
+            input="\n".join(transaction) + "\n",
+            throw_on_error=True,
+        )
+        self.invalidate()
+        return actions
+
+    def _write_tag_objects(self, actions, kinds, message):
+        import tempfile
+
+        tagger = self.git(["var", "GIT_COMMITTER_IDENT"], throw_on_error=True)
+        if not message.endswith("\n"):
+            message += "\n"
+        with tempfile.TemporaryDirectory(prefix="pyversion-tags-") as tmp:
+            paths = []
+            for number, action in enumerate(actions):
+                path = os.path.join(tmp, str(number))
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write(
+                        "object %s\ntype %s\ntag %s\ntagger %s\n\n%s"
+                        % (action.sha, kinds[action.sha], action.tag, tagger, message)
+                    )
+                paths.append(path)
+            output = self.git(
+                ["hash-object", "-t", "tag", "-w", "--stdin-paths"],
+                input="".join(path + "\n" for path in paths),
+                throw_on_error=True,
+            )
+        return output.split()
+
+    def push_tags(self, remote, tags, atomic=None, allow_non_atomic=False):
+        """Push ``tags`` to ``remote`` in one ``git push``, all or none with ``atomic``.
+
+        ``atomic`` defaults to pushing more than one tag. A remote that does
+        not support atomic pushes is an error, unless ``allow_non_atomic``
+        accepts a plain push instead, where some tags may be pushed and
+        others not.
+        """
+        if not tags:
+            return
+        if atomic is None:
+            atomic = len(tags) > 1
+        refs = [TAGS_PREFIX + tag for tag in tags]
+        if atomic:
+            try:
+                self.git(["push", "--atomic", remote] + refs, throw_on_error=True)
+                return
+            except Exception as err:
+                if "atomic" not in str(err):
+                    raise
+                if not allow_non_atomic:
+                    raise Exception(
+                        f"{remote} does not support atomic pushes, nothing was"
+                        f" pushed (allow a non atomic push to push anyway): {err}"
+                    )
+                logger.warning(
+                    f"{remote} does not support atomic pushes, pushing"
+                    f" {len(tags)} tags without --atomic: {err}"
+                )
+        self.git(["push", remote] + refs, throw_on_error=True)
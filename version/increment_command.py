@@ -1,7 +1,9 @@
 import os
 import setuptools.command.egg_info as orig
-from loguru import logger
-from .version import VersionUtils
+from .bump import RELEASE_TYPES, _increment
+from .log import logger
+from .planning import plan_releases
+from .version import build_version
 
 __all__ = ["increment"]
 
@@ -28,10 +30,22 @@ class increment(orig.egg_info):
         orig.egg_info.finalize_options(self)
 
     def tagged_version(self):
-        os.environ["RELEASE_TYPE"] = self.release_type
         if self.release_version is None:
-            version = VersionUtils.get_version(self.distribution.get_name())
-            self.release_version = VersionUtils.increment(version)
+            name = self.distribution.get_name()
+            version = build_version(name)
+            if self.release_type in RELEASE_TYPES:
+                planned = plan_releases(
+                    [(name, self.release_type)], current={name: version}
+                )
+                self.release_version = planned[0].next_version
+            else:
+                # as VersionUtils.increment: an unknown type changes nothing
+                logger.warning(
+                    "Unknown release type {0}, keeping version {1}".format(
+                        self.release_type, version
+                    )
+                )
+                self.release_version = _increment(str(version), self.release_type)
         logger.info(
             "Automatically Setting Version to: {0}".format(self.release_version)
         )
@@ -0,0 +1,319 @@
+import http.client
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+from packaging.version import parse as parse_version
+from .cache import NotModified
+from .distributions import normalize_name
+
+__all__ = [
+    "ConnectionPool",
+    "IndexClient",
+    "IndexServerError",
+    "JsonIndexClient",
+    "SimpleIndexClient",
+    "get_index_client",
+    "parse_filename",
+    "select_latest",
+    "sort_versions",
+]
+
+DEFAULT_INDEX_URL = "https://pypi.org"
+DEFAULT_INDEX_API = "json"
+INDEX_TIMEOUT = 10
+MAX_WORKERS = 8
+MAX_REDIRECTS = 5
+
+_ARCHIVE_EXTENSIONS = (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".zip", ".tar")
+_VERSION_START_RE = re.compile(r"-(?=\d)")
+
+
+class IndexServerError(Exception):
+    """The index answered with an unexpected HTTP status."""
+
+    def __init__(self, url, status):
+        super(IndexServerError, self).__init__("%s returned %d" % (url, status))
+        self.url = url
+        self.status = status
+
+
+def parse_filename(filename, name=None):
+    """Return the ``(name, version)`` encoded in a wheel, egg or sdist filename.
+
+    Sdist names are ambiguous as both parts may contain dashes; when the
+    project ``name`` is known it is used to split them, otherwise the version
+    is assumed to start at the first dash followed by a digit. Returns None
+    for anything that is not a distribution filename.
+    """
+    filename = os.path.basename(filename)
+    if filename.endswith((".whl", ".egg")):
+        parts = filename[:-4].split("-")
+        if len(parts) < 2:
+            return None
+        return parts[0], parts[1]
+    for extension in _ARCHIVE_EXTENSIONS:
+        if filename.endswith(extension):
+            base = filename[: -len(extension)]
+            break
+    else:
+        return None
+    if name is not None:
+        wanted = normalize_name(name)
+        for index, char in enumerate(base):
+            if char == "-" and normalize_name(base[:index]) == wanted:
+                return base[:index], base[index:][1:]
+        return None
+    match = _VERSION_START_RE.search(base)
+    if match is None:
+        return None
+    start = match.start()
+    return base[:start], base[start:][1:]
+
+
+def _version_key(version):
+    try:
+        return parse_version(version)
+    except Exception:
+        return None
+
+
+def select_latest(versions, prereleases=False):
+    """Return the highest PEP 440 version in ``versions``.
+
+    Pre and dev releases are only considered when ``prereleases`` is set or
+    when no final release exists. Unparsable versions are ignored.
+    """
+    parsed = [(_version_key(v), v) for v in versions]
+    parsed = [(key, v) for key, v in parsed if key is not None]
+    if not prereleases:
+        final = [(key, v) for key, v in parsed if not key.is_prerelease]
+        parsed = final or parsed
+    if not parsed:
+        return None
+    return max(parsed, key=lambda item: item[0])[1]
+
+
+def sort_versions(versions, reverse=False):
+    """Return ``versions`` sorted by PEP 440 precedence, unparsable ones dropped."""
+    parsed = [(_version_key(v), v) for v in versions]
+    parsed = [item for item in parsed if item[0] is not None]
+    parsed.sort(key=lambda item: item[0], reverse=reverse)
+    return [v for _, v in parsed]
+
+
+class ConnectionPool(object):
+    """Keeps idle keep-alive HTTP(S) connections around for reuse, per host."""
+
+    def __init__(self, maxsize=MAX_WORKERS, timeout=INDEX_TIMEOUT):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _proxy_for(scheme, netloc):
+        proxy = getproxies().get(scheme)
+        if proxy and not proxy_bypass(netloc.split(":")[0]):
+            return urlsplit(proxy)
+        return None
+
+    def _new_connection(self, scheme, netloc):
+        cls = (
+            http.client.HTTPSConnection
+            if scheme == "https"
+            else http.client.HTTPConnection
+        )
+        proxy = self._proxy_for(scheme, netloc)
+        if proxy is None:
+            return cls(netloc, timeout=self.timeout)
+        connection = cls(proxy.hostname, proxy.port, timeout=self.timeout)
+        if scheme == "https":
+            host, _, port = netloc.partition(":")
+            connection.set_tunnel(host, int(port) if port else None)
+        return connection
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(*key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, method, url, headers=None):
+        """Perform a request, returning ``(status, headers, body)``."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        if parts.scheme == "http" and self._proxy_for(parts.scheme, parts.netloc):
+            # plain http proxies expect the absolute uri in the request line
+            path = url
+        while True:
+            connection, reused = self._acquire(key)
+            try:
+                connection.request(method, path, headers=headers or {})
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                if reused:
+                    # the server closed an idle keep-alive connection, retry
+                    continue
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return response.status, response.headers, body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class IndexClient(object):
+    """Base class of the clients looking up the releases of a project."""
+
+    accept = "application/json"
+
+    def __init__(self, url=None, pool=None, max_workers=MAX_WORKERS):
+        self.url = (url or DEFAULT_INDEX_URL).rstrip("/")
+        self.pool = pool or ConnectionPool(maxsize=max_workers)
+        self.max_workers = max_workers
+
+    def project_url(self, name):
+        raise NotImplementedError
+
+    def parse_releases(self, data):
+        raise NotImplementedError
+
+    def get(self, url, etag=None):
+        headers = {"Accept": self.accept}
+        if etag:
+            headers["If-None-Match"] = etag
+        for _ in range(MAX_REDIRECTS):
+            status, response_headers, body = self.pool.request("GET", url, headers)
+            if status in (301, 302, 303, 307, 308) and response_headers.get("Location"):
+                url = urljoin(url, response_headers["Location"])
+                continue
+            return url, status, response_headers, body
+        raise IndexServerError(url, status)
+
+    def fetch_releases(self, name, etag=None):
+        """Return ``(versions, etag)`` for ``name``, newest version first.
+
+        ``versions`` is None when the index does not know the project. Raises
+        :class:`NotModified` when ``etag`` is still current.
+        """
+        url, status, headers, body = self.get(self.project_url(name), etag)
+        if status == 304:
+            raise NotModified(name)
+        if status == 404:
+            return None, None
+        if status != 200:
+            raise IndexServerError(url, status)
+        versions = self.parse_releases(json.loads(body.decode("utf-8")))
+        return sort_versions(versions, reverse=True), headers.get("ETag")
+
+    def fetch_many(self, names, fetch=None):
+        """Run ``fetch(name)`` (default :meth:`fetch_releases`) concurrently.
+
+        Returns a ``{name: result}`` map; an exception raised for one name is
+        stored as its result instead of aborting the others.
+        """
+        fetch = fetch or self.fetch_releases
+        names = list(dict.fromkeys(names))
+
+        def call(name):
+            try:
+                return fetch(name)
+            except Exception as err:
+                return err
+
+        if len(names) <= 1:
+            return {name: call(name) for name in names}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(names, executor.map(call, names)))
+
+    @staticmethod
+    def select_latest(versions, prereleases=False):
+        return select_latest(versions, prereleases)
+
+    def close(self):
+        self.pool.close()
+
+
+class JsonIndexClient(IndexClient):
+    """Client for the warehouse JSON API (``/pypi/<name>/json``)."""
+
+    def project_url(self, name):
+        return "{0}/pypi/{1}/json".format(self.url, quote(normalize_name(name)))
+
+    def parse_releases(self, data):
+        releases = data.get("releases") or {}
+        return [
+            version
+            for version, files in releases.items()
+            if not files or not all(f.get("yanked") for f in files)
+        ]
+
+
+class SimpleIndexClient(IndexClient):
+    """Client for the PEP 691 JSON flavour of the simple repository API."""
+
+    accept = "application/vnd.pypi.simple.v1+json"
+
+    def project_url(self, name):
+        return "{0}/simple/{1}/".format(self.url, quote(normalize_name(name)))
+
+    def parse_releases(self, data):
+        name = data.get("name")
+        files = {}
+        for info in data.get("files") or []:
+            parsed = parse_filename(info.get("filename", ""), name)
+            if parsed is not None:
+                files.setdefault(parsed[1], []).append(bool(info.get("yanked")))
+        versions = data.get("versions") or list(files)
+        return [v for v in versions if not files.get(v) or not all(files[v])]
+
+
+INDEX_CLIENTS = {"json": JsonIndexClient, "simple": SimpleIndexClient}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_index_client(url=None, api=None):
+    """Return a shared client for the configured index.
+
+    ``PYVERSION_INDEX_URL`` selects the index (e.g. an internal mirror) and
+    ``PYVERSION_INDEX_API`` the API flavour, one of :data:`INDEX_CLIENTS`.
+    """
+    url = url or os.environ.get("PYVERSION_INDEX_URL") or DEFAULT_INDEX_URL
+    api = api or os.environ.get("PYVERSION_INDEX_API") or DEFAULT_INDEX_API
+    if api not in INDEX_CLIENTS:
+        raise ValueError(
+            "unknown index api '%s', expected one of %s"
+            % (api, ", ".join(sorted(INDEX_CLIENTS)))
+        )
+    with _clients_lock:
+        client = _clients.get((url, api))
+        if client is None:
+            client = _clients[(url, api)] = INDEX_CLIENTS[api](url)
+        return client
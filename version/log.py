@@ -0,0 +1,13 @@
+__all__ = ["logger"]
+
+
+class _LazyLogger(object):
+    """Stand-in for ``loguru.logger`` that only imports loguru on first use."""
+
+    def __getattr__(self, name):
+        from loguru import logger
+
+        return getattr(logger, name)
+
+
+logger = _LazyLogger()
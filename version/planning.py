@@ -0,0 +1,93 @@
+"""Planning the next releases of many packages, without side effects."""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .version import VersionUtils
+
+__all__ = ["PlannedRelease", "plan_releases"]
+
+DEFAULT_TAG_FORMAT = "{version}"
+MAX_WORKERS = 16
+
+
+class PlannedRelease(
+    namedtuple(
+        "PlannedRelease", "name release_type version next_version tag tag_exists"
+    )
+):
+    """The next release of one package.
+
+    ``tag`` is the tag the release would create and ``tag_exists`` whether
+    the repository already has it.
+    """
+
+    __slots__ = ()
+
+    def as_dict(self):
+        return dict(self._asdict())
+
+
+def _pairs(requests):
+    if hasattr(requests, "items"):
+        requests = requests.items()
+    return [(name, release_type) for name, release_type in requests]
+
+
+def plan_releases(
+    requests,
+    sources=None,
+    repo=None,
+    tag_format=DEFAULT_TAG_FORMAT,
+    current=None,
+    release_versions=None,
+    max_workers=MAX_WORKERS,
+):
+    """Return a PlannedRelease per ``(name, release type)`` of ``requests``.
+
+    ``requests`` is a ``{name: release type}`` mapping or a list of pairs.
+    The current versions not given in ``current`` are resolved at once
+    (see VersionUtils.get_versions), ``release_versions`` maps names to an
+    explicit next version (their release type is not used), and ``tag_format`` is formatted with ``name``
+    and ``version`` to name the tags, looked up concurrently in ``repo`` (a
+    version.git.GitRepository) when given.
+
+    Nothing is read from or written to the environment apart from the
+    version sources, so plans can be computed from many threads at once.
+    """
+    from .bump import increment_many
+
+    pairs = _pairs(requests)
+    current = dict(current or {})
+    release_versions = release_versions or {}
+    missing = [name for name, _ in pairs if current.get(name) is None]
+    if missing:
+        current.update(VersionUtils.get_versions(missing, sources))
+    versions = [str(current[name]) for name, _ in pairs]
+    # packages with an explicit next version are not incremented at all
+    bumped = [
+        (version, release_type)
+        for (name, release_type), version in zip(pairs, versions)
+        if not release_versions.get(name)
+    ]
+    incremented = iter(
+        increment_many(
+            [version for version, _ in bumped],
+            [release_type for _, release_type in bumped],
+        )
+    )
+    following = [release_versions.get(name) or next(incremented) for name, _ in pairs]
+    tags = [
+        tag_format.format(name=name, version=next_version)
+        for (name, _), next_version in zip(pairs, following)
+    ]
+    if repo is not None and tags:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tags))) as executor:
+            exists = list(executor.map(repo.has_tag, tags))
+    else:
+        exists = [False] * len(tags)
+    return [
+        PlannedRelease(name, release_type, version, next_version, tag, tag_exists)
+        for (name, release_type), version, next_version, tag, tag_exists in zip(
+            pairs, versions, following, tags, exists
+        )
+    ]
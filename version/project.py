@@ -0,0 +1,108 @@
+"""Reading the name a project declares, without running its setup.py."""
+
+import os
+import re
+from .log import logger
+
+__all__ = ["PROJECT_FILES", "read_pbr_name", "read_project_name"]
+
+PROJECT_FILES = ("pyproject.toml", "setup.cfg", "setup.py")
+_SECTION_RE = re.compile(r"^\s*\[([^\]]+)\]\s*$")
+_TOML_NAME_RE = re.compile(r"""^\s*name\s*=\s*(['"])(?P<name>[^'"]+)\1""")
+_INI_NAME_RE = re.compile(r"^name\s*[=:]\s*(?P<name>\S.*?)\s*$")
+
+
+def _read_ini_name(path, section):
+    """Return ``name`` from ``section`` of an ini or toml like file."""
+    current = None
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            match = _SECTION_RE.match(line)
+            if match:
+                current = match.group(1).strip()
+                continue
+            if current != section:
+                continue
+            pattern = _TOML_NAME_RE if path.endswith(".toml") else _INI_NAME_RE
+            match = pattern.match(line)
+            if match:
+                return match.group("name")
+    return None
+
+
+def _read_setup_py_name(path):
+    """Return the literal ``name=`` passed to ``setup()`` in a setup.py."""
+    import ast
+    from .static import _constant
+
+    with open(path, "rb") as fh:
+        try:
+            tree = ast.parse(fh.read(), path)
+        except (SyntaxError, ValueError):
+            return None
+    # module level NAME = "..." assignments, for setup(name=NAME)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and _constant(node.value):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = _constant(node.value)
+    for node in ast.walk(tree):
+        func = getattr(node, "func", None)
+        # setup(...) as well as setuptools.setup(...)
+        if "setup" not in (getattr(func, "id", None), getattr(func, "attr", None)):
+            continue
+        for keyword in node.keywords:
+            if keyword.arg != "name":
+                continue
+            if _constant(keyword.value):
+                return _constant(keyword.value)
+            if isinstance(keyword.value, ast.Name):
+                return constants.get(keyword.value.id)
+    return None
+
+
+# (file name, reader) pairs, the first name found wins
+_PROJECT_READERS = (
+    ("pyproject.toml", lambda path: _read_ini_name(path, "project")),
+    ("pyproject.toml", lambda path: _read_ini_name(path, "tool.poetry")),
+    ("setup.cfg", lambda path: _read_ini_name(path, "metadata")),
+    ("setup.py", _read_setup_py_name),
+)
+_PBR_READERS = (
+    ("setup.cfg", lambda path: _read_ini_name(path, "metadata")),
+    ("pyproject.toml", lambda path: _read_ini_name(path, "project")),
+)
+
+
+def _read_name(directory, readers):
+    for filename, reader in readers:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            try:
+                name = reader(path)
+            except (OSError, UnicodeDecodeError) as err:
+                logger.warning(f"unable to read {path}: {err}")
+                continue
+            if name:
+                return name
+    return None
+
+
+def read_project_name(directory):
+    """Return the project name declared in ``directory``, without running anything.
+
+    ``pyproject.toml`` (``[project]`` then ``[tool.poetry]``) wins over the
+    ``[metadata]`` of ``setup.cfg``, as used by setuptools and PBR, and a
+    literal ``name=`` in ``setup.py``. Returns None when none declares it.
+    """
+    return _read_name(directory, _PROJECT_READERS)
+
+
+def read_pbr_name(directory=os.curdir):
+    """Return the name of a PBR project: ``[metadata]`` of ``setup.cfg``.
+
+    Only that one setting is read, falling back to ``[project]`` of
+    ``pyproject.toml``. Returns None when neither declares it.
+    """
+    return _read_name(directory, _PBR_READERS)
@@ -0,0 +1,292 @@
+"""Sorted, queryable release histories of packages."""
+
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from .compact import InvalidVersion, parse, parse_many
+from .config import get_cache_dir
+from .distributions import get_distribution_index, normalize_name
+from .log import logger
+from .version import VersionUtils
+
+__all__ = ["ReleaseIndex", "get_release_index", "versions_from_tags"]
+
+# sources knowing more than one release of a package
+RELEASE_SOURCES = ("pip", "git", "pypi")
+# sorts after every local version segment
+_MAX_LOCAL = ((2,),)
+_INFINITY = float("inf")
+# the post and dev segments of a normalized version
+_RELEASE_RE = re.compile(r"(\.post[0-9]+)?(\.dev[0-9]+)?$")
+_TAG_RE = re.compile(r"^(?:(?P<name>[A-Za-z][^/]*?)[-/])?(?P<version>v?[0-9].*)$")
+
+
+def _upper_prefix(release):
+    """The release prefix right after ``release``, e.g. ``(1, 5)`` for ``(1, 4)``."""
+    return tuple(release[:-1]) + (release[-1] + 1,)
+
+
+def _strip_zeros(release):
+    release = list(release)
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    return tuple(release)
+
+
+def _bounds(specifier):
+    """Return ``(lower, upper)`` keys enclosing every match of ``specifier``.
+
+    Either is None when unbounded. The bounds may be loose, matches are
+    still checked against the specifier itself.
+    """
+    lower = upper = None
+
+    def narrow(low, high):
+        nonlocal lower, upper
+        if low is not None and (lower is None or low > lower):
+            lower = low
+        if high is not None and (upper is None or high < upper):
+            upper = high
+
+    for spec in specifier:
+        operator, string = spec.operator, spec.version
+        if operator == "==" and string.endswith(".*"):
+            prefix = parse(string[:-2])
+            narrow(
+                (prefix.epoch, _strip_zeros(prefix.release)),
+                (prefix.epoch, _upper_prefix(prefix.release)),
+            )
+            continue
+        if operator in ("===", "!="):
+            continue
+        try:
+            key = parse(string).key
+        except InvalidVersion:
+            continue
+        if operator in (">=", ">"):
+            narrow(key, None)
+        elif operator == "<":
+            narrow(None, key)
+        elif operator in ("<=", "=="):
+            # local versions of the upper bound still match
+            narrow(key if operator == "==" else None, key[:5] + (_MAX_LOCAL,))
+        elif operator == "~=":
+            version = parse(string)
+            narrow(key, (version.epoch, _upper_prefix(version.release[:-1])))
+    return lower, upper
+
+
+class ReleaseIndex(object):
+    """The releases of a package, sorted by PEP 440 precedence.
+
+    Lookups bisect the sorted version keys, so range and specifier queries
+    cost O(log n) plus the size of the answer, whatever the number of
+    releases. Versions are version.compact.CompactVersion instances;
+    unparsable ones are dropped.
+    """
+
+    def __init__(self, versions=()):
+        unique = {}
+        for version in parse_many(versions, strict=False):
+            # the first of equal versions (1.0, 1.0.0) wins
+            if version is not None:
+                unique.setdefault(version.key, version)
+        self._versions = sorted(unique.values())
+        self._keys = [version.key for version in self._versions]
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __iter__(self):
+        return iter(self._versions)
+
+    def __reversed__(self):
+        return reversed(self._versions)
+
+    def __contains__(self, version):
+        try:
+            key = parse(version).key
+        except InvalidVersion:
+            return False
+        index = bisect_left(self._keys, key)
+        return index < len(self._keys) and self._keys[index] == key
+
+    def __repr__(self):
+        return "<ReleaseIndex of %d versions>" % len(self)
+
+    def _slice(self, lower, upper):
+        start = 0 if lower is None else bisect_left(self._keys, lower)
+        stop = len(self._keys) if upper is None else bisect_left(self._keys, upper)
+        return self._versions[start:stop]
+
+    def range(self, lower=None, upper=None, include_lower=True, include_upper=False):
+        """Return the versions between ``lower`` and ``upper``, in order.
+
+        Bounds are version strings (or versions), None for unbounded.
+        """
+        start, stop = 0, len(self._keys)
+        if lower is not None:
+            search = bisect_left if include_lower else bisect_right
+            start = search(self._keys, parse(lower).key)
+        if upper is not None:
+            search = bisect_right if include_upper else bisect_left
+            stop = search(self._keys, parse(upper).key)
+        return self._versions[start:stop]
+
+    def filter(self, specifier, prereleases=None):
+        """Return the versions matching a PEP 440 ``specifier``, in order.
+
+        ``specifier`` is a string like ``">=2,<3"`` or a
+        ``packaging.specifiers.SpecifierSet``; pre-releases follow its
+        rules (only matched when asked for, or when nothing else matches).
+        """
+        from packaging.specifiers import SpecifierSet
+
+        if isinstance(specifier, str):
+            specifier = SpecifierSet(specifier)
+        candidates = self._slice(*_bounds(specifier))
+        by_string = {str(version): version for version in candidates}
+        matches = specifier.filter(list(by_string), prereleases=prereleases)
+        return [by_string[match] for match in matches]
+
+    def latest(self, specifier=None, prereleases=False):
+        """Return the highest version, matching ``specifier`` if given, or None.
+
+        Pre and dev releases only count with ``prereleases`` or when no
+        final release qualifies. Walks back from the top of the matching
+        range, so ``latest("==2.*")`` does not look at the other series.
+        """
+        if isinstance(specifier, str):
+            from packaging.specifiers import SpecifierSet
+
+            specifier = SpecifierSet(specifier)
+        if specifier is None:
+            candidates = self._versions
+        else:
+            candidates = self._slice(*_bounds(specifier))
+        fallback = None
+        for version in reversed(candidates):
+            if specifier is not None and not specifier.contains(
+                str(version), prereleases=True
+            ):
+                continue
+            if prereleases or not version.is_prerelease:
+                return version
+            fallback = fallback or version
+        return fallback
+
+    def next_post(self, version):
+        """Return the first post-release of ``version`` not released yet."""
+        version = parse(version)
+        key = version.key
+        # every post-release of the same release and pre-release segment
+        candidates = self._slice(key[:3] + (0,), key[:3] + (_INFINITY,))
+        posts = [candidate.post for candidate in candidates]
+        number = max(posts) + 1 if posts else 1
+        return parse("%s.post%d" % (_RELEASE_RE.sub("", version.public), number))
+
+
+def versions_from_tags(package, repo=None):
+    """Return the versions tagged in ``repo`` (default: the current checkout).
+
+    Tags prefixed with the project name (``name-1.2``, ``name/v1.2``), as
+    created by version.workspace, count for that project. Plain version
+    tags (``1.2``, ``v1.2``) only count for the project of the checkout
+    itself, see version.project.read_project_name.
+    """
+    from .git import GitRepository, find_git_dir
+    from .project import read_project_name
+
+    if repo is None:
+        if find_git_dir() is None:
+            return []
+        repo = GitRepository.discover()
+    name = normalize_name(package)
+    project = read_project_name(repo.work_tree) if repo.work_tree else None
+    own = project is not None and normalize_name(project) == name
+    versions = []
+    for tag in repo.tag_index():
+        match = _TAG_RE.match(tag)
+        if match is None:
+            continue
+        prefix = match.group("name")
+        if prefix:
+            if normalize_name(prefix) != name:
+                continue
+        elif not own:
+            continue
+        versions.append(match.group("version"))
+    return versions
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _collect(package, sources):
+    from .cache import get_release_cache
+    from .index import get_index_client
+
+    versions = []
+    for source in sources:
+        try:
+            if source == "pip":
+                installed = VersionUtils.get_version_from_pip(package)
+                versions += [installed] if installed else []
+            elif source == "git":
+                versions += versions_from_tags(package)
+            elif source == "pypi":
+                client = get_index_client()
+                found = get_release_cache().lookup(package, client.fetch_releases)
+                versions += found or []
+        except Exception as err:
+            logger.error(f"{package}: releases from {source}: {err}")
+    return versions
+
+
+def _stamp(sources):
+    """Cheap snapshot of what the releases of ``sources`` are collected from."""
+    stamp = []
+    if "pip" in sources:
+        index = get_distribution_index()
+        stamp.append(index.fingerprint(index.path))
+    if "git" in sources:
+        from .git import GitRepository, find_repository
+
+        work_tree, git_dir = find_repository()
+        if git_dir is not None:
+            stamp.append((git_dir, GitRepository(git_dir, work_tree).tags_stamp()))
+    if "pypi" in sources:
+        stamp.append(get_cache_dir())
+    return tuple(stamp)
+
+
+def get_release_index(package, sources=None):
+    """Return the ReleaseIndex of ``package``.
+
+    Releases come from the ``pypi`` (through the persistent release cache,
+    so offline mode applies), ``git`` and ``pip`` sources among ``sources``
+    (see VersionUtils.get_sources). The index is kept and only collected
+    again when the installed distributions or the tags changed, or, with
+    ``pypi``, once the release cache TTL has passed.
+    """
+    from .cache import get_release_cache
+
+    sources = tuple(
+        s for s in VersionUtils.get_sources(sources) if s in RELEASE_SOURCES
+    )
+    key = (normalize_name(package), sources)
+    stamp = _stamp(sources)
+    now = time.monotonic()
+    with _indexes_lock:
+        found = _indexes.get(key)
+    if found is not None:
+        built, found_stamp, index = found
+        expired = "pypi" in sources and now - built >= get_release_cache().ttl
+        if found_stamp == stamp and not expired:
+            return index
+    index = ReleaseIndex(_collect(package, sources))
+    with _indexes_lock:
+        _indexes[key] = (now, stamp, index)
+    return index
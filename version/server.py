@@ -0,0 +1,261 @@
+"""A long running resolver answering queries over a Unix socket.
+
+``pyversion serve`` keeps the distribution index, the release cache and the
+parsed modules warm between builds. Clients send one JSON object per line::
+
+    {"id": 1, "method": "versions", "params": {"names": ["pip"]}}
+
+and get one JSON object per line back, either ``{"id": 1, "result": ...}``
+or ``{"id": 1, "error": "..."}``.
+"""
+
+import json
+import os
+import socket
+import sys
+from .config import get_cache_dir
+from .log import logger
+
+__all__ = [
+    "Client",
+    "ServerError",
+    "VersionServer",
+    "connect",
+    "get_socket_path",
+    "query_versions",
+    "serve",
+]
+
+# sources whose answer depends on the caller's working directory
+LOCAL_SOURCES = ("git",)
+CLIENT_TIMEOUT = 30
+
+
+class ServerError(Exception):
+    """The server could not answer a query, it should be answered in-process."""
+
+
+def get_socket_path():
+    """Return the socket the server listens on (``PYVERSION_SOCKET``)."""
+    path = os.environ.get("PYVERSION_SOCKET")
+    if not path:
+        base = os.environ.get("XDG_RUNTIME_DIR") or get_cache_dir()
+        path = os.path.join(base, "pyversion.sock")
+    return path
+
+
+def _environment():
+    """What the answers depend on, besides the query, for client and server."""
+    settings = {
+        key: value
+        for key, value in os.environ.items()
+        if key.startswith("PYVERSION_") and key != "PYVERSION_SOCKET"
+    }
+    return {"executable": sys.executable, "path": list(sys.path), "env": settings}
+
+
+class Client(object):
+    """A connection to a running server, see connect."""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+        self._id = 0
+
+    def call(self, method, **params):
+        self._id += 1
+        request = {"id": self._id, "method": method, "params": params}
+        try:
+            self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+            if not line:
+                raise ServerError("connection closed by the server")
+            response = json.loads(line.decode("utf-8"))
+        except (OSError, ValueError) as err:
+            raise ServerError(str(err))
+        if "error" in response:
+            raise ServerError(response["error"])
+        return response["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def connect(path=None, timeout=CLIENT_TIMEOUT):
+    """Return a Client for the server at ``path``, or None if none is running."""
+    path = path or get_socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return Client(sock)
+
+
+def query_versions(names, sources, increment=False, release_type=None, path=None):
+    """Ask a running server for ``{name: (version, next version)}``.
+
+    Returns None when no server is running or it cannot answer for this
+    process, e.g. because it runs in another environment, in which case the
+    caller resolves the versions itself.
+    """
+    if any(source in LOCAL_SOURCES for source in sources):
+        return None
+    client = connect(path)
+    if client is None:
+        return None
+    params = {
+        "names": list(names),
+        "sources": list(sources),
+        "environment": _environment(),
+    }
+    if increment:
+        params["release_type"] = release_type
+    try:
+        with client:
+            result = client.call("versions", **params)
+    except ServerError as err:
+        logger.debug(f"pyversion server did not answer: {err}")
+        return None
+    return {name: tuple(versions) for name, versions in result.items()}
+
+
+def _handle_versions(names, sources, release_type=None):
+    from .version import VersionUtils
+
+    versions = VersionUtils.get_versions(names, sources)
+    if release_type is None:
+        return {name: (str(v), None) for name, v in versions.items()}
+    from .bump import increment
+
+    return {
+        name: (str(v), str(increment(v, release_type))) for name, v in versions.items()
+    }
+
+
+def _handle_resolve(name, sources=None):
+    from .version import VersionUtils
+
+    return VersionUtils.resolve(name, sources).as_dict()
+
+
+def _handle_increment(versions, release_type="micro"):
+    from .bump import increment_many
+
+    return increment_many(versions, release_type)
+
+
+def _handle_ping():
+    return {"pid": os.getpid(), **_environment()}
+
+
+METHODS = {
+    "increment": _handle_increment,
+    "ping": _handle_ping,
+    "resolve": _handle_resolve,
+    "versions": _handle_versions,
+}
+
+
+def handle(line, environment=None):
+    """Answer one request line, returning the response line.
+
+    Requests depending on the environment pass the client's ``environment``
+    in their params and are refused unless it is the server's ``environment``.
+    """
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        method = METHODS.get(request.get("method"))
+        if method is None:
+            raise ServerError("unknown method %s" % request.get("method"))
+        params = request.get("params", {})
+        client_environment = params.pop("environment", None)
+        if client_environment not in (None, environment or _environment()):
+            raise ServerError("the server runs in a different environment")
+        response = {"id": request_id, "result": method(**params)}
+    except Exception as err:
+        response = {"id": request_id, "error": "%s: %s" % (type(err).__name__, err)}
+    return json.dumps(response).encode("utf-8") + b"\n"
+
+
+def _server_classes():
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    response = handle(line.decode("utf-8"), self.server.environment)
+                    self.wfile.write(response)
+                    self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    return Handler, Server
+
+
+class VersionServer(object):
+    """Serves METHODS on a Unix socket, one thread per connection."""
+
+    def __init__(self, path=None):
+        self.path = path or get_socket_path()
+        client = connect(self.path)
+        if client is not None:
+            client.close()
+            raise ServerError("a server is already listening on %s" % self.path)
+        if os.path.exists(self.path):
+            # left over by a server that did not shut down cleanly
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(self.path) or os.curdir, exist_ok=True)
+        handler, server = _server_classes()
+        umask = os.umask(0o077)
+        try:
+            self._server = server(self.path, handler)
+        finally:
+            os.umask(umask)
+        # what the answers are valid for, fixed at startup
+        self._server.environment = _environment()
+
+    def serve_forever(self):
+        logger.info(f"pyversion server listening on {self.path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        """Stop serve_forever, from another thread."""
+        self._server.shutdown()
+
+    def close(self):
+        self._server.server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def serve(path=None):
+    """Run a server until interrupted or terminated."""
+    import signal
+
+    server = VersionServer(path)
+    # exit through serve_forever's cleanup, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
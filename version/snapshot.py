@@ -0,0 +1,210 @@
+"""Incremental snapshots of installed versions and the differences between them."""
+
+import json
+import os
+import sys
+import tempfile
+from collections import namedtuple
+from .environments import find_site_dirs
+from .log import logger
+from .version import VersionUtils
+
+__all__ = ["Change", "Snapshot", "default_roots", "take_snapshot"]
+
+SNAPSHOT_FORMAT = 1
+
+
+class Change(namedtuple("Change", "root name old new")):
+    """A distribution added (``old`` is None), removed (``new`` is None) or changed.
+
+    ``kind`` is ``changed`` for versions that are not comparable or only
+    respelled, e.g. ``1.0`` and ``1.0.0``.
+    """
+
+    __slots__ = ()
+
+    @property
+    def kind(self):
+        if self.old is None:
+            return "added"
+        if self.new is None:
+            return "removed"
+        from .compact import InvalidVersion, parse
+
+        try:
+            old, new = parse(self.old), parse(self.new)
+        except InvalidVersion:
+            return "changed"
+        if new > old:
+            return "upgraded"
+        if new < old:
+            return "downgraded"
+        # equal under PEP 440, only spelled differently (1.0 and 1.0.0)
+        return "changed"
+
+    def as_dict(self):
+        return dict(self._asdict(), kind=self.kind)
+
+
+def default_roots():
+    """The site directories of the running interpreter."""
+    names = ("site-packages", "dist-packages")
+    return [
+        entry
+        for entry in sys.path
+        if os.path.basename(entry) in names and os.path.isdir(entry)
+    ]
+
+
+def _refresh_site_dir(path, previous):
+    """Return the snapshot of a site directory, reusing ``previous`` entries.
+
+    Nothing is listed when the directory did not change (installing or
+    removing a distribution changes its mtime) and only the entries with
+    a new mtime are read again.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError as err:
+        logger.warning(f"unable to read {path}: {err}")
+        return None
+    if previous is not None and previous["mtime_ns"] == mtime:
+        return previous
+    known = previous["entries"] if previous is not None else None
+    entries = VersionUtils.get_distributions_from_site_dir(path, known)
+    return {"mtime_ns": mtime, "entries": entries}
+
+
+class Snapshot(object):
+    """The installed versions of some environments, with what is needed to update them.
+
+    ``environments`` maps each root (see version.environments.find_site_dirs)
+    to its site directories, in import order, each holding its mtime and
+    ``{entry: [mtime, normalized name, version]}`` for its .dist-info and
+    .egg-info entries.
+    """
+
+    def __init__(self, environments=None):
+        self.environments = environments or {}
+
+    @property
+    def roots(self):
+        return list(self.environments)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("%s: unsupported snapshot format" % path)
+        return cls(data["environments"])
+
+    def save(self, path):
+        """Write the snapshot to ``path``, atomically."""
+        data = {"format": SNAPSHOT_FORMAT, "environments": self.environments}
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".pyversion-snapshot-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(data, fh, separators=(",", ":"))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def versions(self):
+        """Return ``{root: {normalized name: version}}``.
+
+        The first site directory holding a distribution wins, as on import.
+        """
+        return {root: self._root_versions(root) for root in self.environments}
+
+    def _root_versions(self, root):
+        versions = {}
+        for site in self.environments[root].values():
+            for entry in sorted(site["entries"]):
+                _, name, version = site["entries"][entry]
+                versions.setdefault(name, version)
+        return versions
+
+    def refresh(self, roots=None):
+        """Return a new Snapshot of ``roots`` (default: the same roots).
+
+        Only site directories with a new mtime are listed again, and only
+        their changed entries read.
+        """
+        environments = {}
+        for root in self.roots if roots is None else roots:
+            previous = self.environments.get(root, {})
+            sites = {}
+            for site_dir in find_site_dirs(root):
+                site = _refresh_site_dir(site_dir, previous.get(site_dir))
+                if site is not None:
+                    sites[site_dir] = site
+            environments[root] = sites
+        return Snapshot(environments)
+
+    def diff(self, other):
+        """Return the Changes from this snapshot to ``other``, sorted.
+
+        Environments whose site directories all kept their mtimes are
+        skipped, in the others only the distributions whose entries were
+        added, removed or have a new mtime are compared.
+        """
+        changes = []
+        for root in list(dict.fromkeys(self.roots + other.roots)):
+            before = self.environments.get(root, {})
+            after = other.environments.get(root, {})
+            if _mtimes(before) == _mtimes(after):
+                continue
+            names = _changed_names(before, after)
+            old = _versions_of(before, names)
+            new = _versions_of(after, names)
+            for name in sorted(names):
+                if old.get(name) != new.get(name):
+                    changes.append(Change(root, name, old.get(name), new.get(name)))
+        return changes
+
+
+def _mtimes(sites):
+    return [(path, site["mtime_ns"]) for path, site in sites.items()]
+
+
+def _changed_names(before, after):
+    """Names of the distributions with an entry added, removed or rewritten."""
+    names = set()
+    for path in set(before) | set(after):
+        old, new = before.get(path), after.get(path)
+        if old is not None and new is not None and old["mtime_ns"] == new["mtime_ns"]:
+            continue
+        old = old["entries"] if old is not None else {}
+        new = new["entries"] if new is not None else {}
+        for entry in set(old) | set(new):
+            found = old.get(entry), new.get(entry)
+            if None in found or found[0][0] != found[1][0]:
+                names.update(item[1] for item in found if item is not None)
+    return names
+
+
+def _versions_of(sites, names):
+    """Return ``{name: version}`` for ``names``, the first site directory winning."""
+    versions = {}
+    for site in sites.values():
+        found = sorted(
+            (entry, value)
+            for entry, value in site["entries"].items()
+            if value[1] in names
+        )
+        for _, (_, name, version) in found:
+            versions.setdefault(name, version)
+    return versions
+
+
+def take_snapshot(roots=None, previous=None):
+    """Return a Snapshot of ``roots`` (default: this interpreter's site directories).
+
+    With a ``previous`` snapshot only what changed since is read again.
+    """
+    if roots is None:
+        roots = previous.roots if previous is not None else default_roots()
+    return (previous or Snapshot()).refresh(roots)
@@ -0,0 +1,154 @@
+"""Reading ``__version__`` from a module's source without importing it."""
+
+import ast
+import os
+import re
+import sys
+import threading
+
+__all__ = ["find_module_file", "get_module_version", "read_version"]
+
+_VERSION_RE = re.compile(
+    r"""^__version__\s*(?::\s*str\s*)?=\s*(?P<q>['"])(?P<version>[^'"\n]+)(?P=q)""",
+    re.MULTILINE,
+)
+# how many ``from .x import __version__`` hops are followed
+_MAX_HOPS = 3
+
+_lock = threading.Lock()
+# path -> ((mtime, size), version)
+_versions = {}
+
+
+def find_module_file(name):
+    """Return the source file of module ``name`` without importing anything.
+
+    ``importlib.util.find_spec`` imports the parents of dotted names, so only
+    the top level package is looked up with it and the submodules are then
+    searched in its package directories. Returns None when the module is
+    not found or has no Python source, e.g. an extension module.
+    """
+    import importlib.machinery
+    import importlib.util
+
+    top, _, rest = name.partition(".")
+    try:
+        spec = importlib.util.find_spec(top)
+        for part in rest.split(".") if rest else ():
+            if spec is None or not spec.submodule_search_locations:
+                return None
+            spec = importlib.machinery.PathFinder.find_spec(
+                part, list(spec.submodule_search_locations)
+            )
+    except (ImportError, ValueError):
+        return None
+    origin = spec and spec.origin
+    if origin and origin.endswith(".py") and os.path.isfile(origin):
+        return origin
+    return None
+
+
+def _constant(node):
+    """Return the string literal ``node`` holds, or None.
+
+    ``ast.literal_eval`` handles both ``ast.Constant`` and the ``ast.Str``
+    nodes Python < 3.8 parses string literals to.
+    """
+    try:
+        value = ast.literal_eval(node)
+    except (TypeError, ValueError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _from_ast(path, source, hops):
+    try:
+        tree = ast.parse(source, path)
+    except (SyntaxError, ValueError):
+        return None
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        elif isinstance(node, ast.ImportFrom) and node.level and hops < _MAX_HOPS:
+            # from ._version import __version__ (as is most common)
+            for alias in node.names:
+                if alias.name == "__version__" and alias.asname in (None, alias.name):
+                    base = os.path.dirname(path)
+                    for _ in range(node.level - 1):
+                        base = os.path.dirname(base)
+                    module = os.path.join(base, *(node.module or "").split("."))
+                    for candidate in (
+                        module + ".py",
+                        os.path.join(module, "__init__.py"),
+                    ):
+                        if os.path.isfile(candidate):
+                            return read_version(candidate, hops + 1)
+            continue
+        else:
+            continue
+        value = _constant(value) or (
+            names.get(value.id) if isinstance(value, ast.Name) else None
+        )
+        for target in targets:
+            if isinstance(target, ast.Name) and value:
+                names[target.id] = value
+    return names.get("__version__")
+
+
+def read_version(path, hops=0):
+    """Return the ``__version__`` string assigned in the source file ``path``.
+
+    A plain ``__version__ = "..."`` line is matched with a regular
+    expression, anything else (annotations, ``__version__ = VERSION``,
+    ``from ._version import __version__``) is found by walking the AST. The
+    module is never executed. Results are cached on the file's path,
+    modification time and size.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _versions.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, "rb") as fh:
+            source = fh.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    match = _VERSION_RE.search(source)
+    if match:
+        version = match.group("version")
+    else:
+        version = _from_ast(path, source, hops)
+    with _lock:
+        _versions[path] = (stamp, version)
+    return version
+
+
+def get_module_version(name):
+    """Return the ``__version__`` of module ``name``, without importing it.
+
+    An already imported module is asked directly, otherwise its source is
+    located and read, see read_version. ``-`` in project names is taken as
+    ``_``, the usual module spelling.
+    """
+    name = name.replace("-", "_")
+    if not all(part.isidentifier() for part in name.split(".")):
+        return None
+    module = sys.modules.get(name)
+    if module is not None:
+        version = getattr(module, "__version__", None)
+        if isinstance(version, str):
+            return version
+    path = find_module_file(name)
+    return read_version(path) if path else None
+
+
+def cache_clear():
+    with _lock:
+        _versions.clear()
@@ -1,68 +1,123 @@
 import os
+import shutil
 from distutils.core import Command
-from loguru import logger
-from .version import VersionUtils
+from .git import GitRepository, TagAction
+from .log import logger
+from .planning import plan_releases
 
-__all__ = ["tag"]
+__all__ = ["read_tag_pairs", "tag", "tag_many"]
+
+
+def read_tag_pairs(path):
+    """Read ``tag object`` pairs, one per line, from ``path``."""
+    pairs = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].split()
+            if line:
+                pairs.append((line[0], line[1] if len(line) > 1 else "HEAD"))
+    return pairs
+
+
+def tag_many(repo, pairs, remote="origin", dry_run=False, allow_non_atomic=False):
+    """Create the ``(tag, object)`` pairs at once and push them in one go.
+
+    The tags are created in a single transaction (see
+    GitRepository.create_tags) and pushed with one ``git push``, atomic for
+    several tags; ``allow_non_atomic`` is passed on to
+    GitRepository.push_tags. ``pairs`` may also be an existing plan of
+    TagActions.
+    With ``dry_run`` nothing is changed. Returns the plan, a list of
+    version.git.TagAction, which is also logged.
+    """
+    pairs = list(pairs)
+    if pairs and all(isinstance(pair, TagAction) for pair in pairs):
+        actions = pairs
+    else:
+        actions = repo.plan_tags(pairs)
+    for action in actions:
+        logger.info("{0} tag {1} for {2}".format(action.action, action.tag, action.sha))
+    if dry_run:
+        return actions
+    repo.create_tags(actions)
+    tags = [action.tag for action in actions if action.action == "create"]
+    if tags:
+        logger.info("Pushing {0} tag(s) to remote {1}".format(len(tags), remote))
+        repo.push_tags(remote, tags, allow_non_atomic=allow_non_atomic)
+    return actions
 
 
 class tag(Command):
     """ """
 
     description = "Will add a git tag corresponding to the version"
-    user_options = [("remote=", "r", "Git Remote Name (default: origin)")]
+    user_options = [
+        ("remote=", "r", "Git Remote Name (default: origin)"),
+        (
+            "tags-file=",
+            None,
+            "File of 'tag [sha]' lines to create and push at once instead",
+        ),
+        (
+            "allow-non-atomic",
+            None,
+            "Push the tags anyway when the remote does not support atomic pushes",
+        ),
+    ]
+    boolean_options = ["allow-non-atomic"]
 
     def initialize_options(self):
         self.remote = os.environ.get("GIT_REMOTE", "origin")
+        self.tags_file = None
+        self.allow_non_atomic = False
 
     def finalize_options(self):
         """ """
-        if not VersionUtils.git_is_installed():
+        # shutil.which instead of running 'git --version': one fork less
+        if not shutil.which("git"):
             raise Exception(
                 "Unable to run git commandline, please make sure git is installed!"
             )
-        self.git_dir = VersionUtils.get_git_directory()
+        self.repo = GitRepository.discover()
+        self.git_dir = self.repo.git_dir
 
     def get_tags(self):
         """ """
-        tags = VersionUtils.run_git_command(["tag"], self.git_dir)
-        return sorted(tags.splitlines())
+        return sorted(self.repo.tags())
 
     def has_tag(self, tag_name=None, sha=None):
         """ """
-        for tag in self.get_tags():
-            if tag_name == tag:
-                return True
-        return False
+        return self.repo.has_tag(tag_name)
 
     def run(self):
         """Will tag the currently active git commit id with the next release tag id"""
-        sha = VersionUtils.run_git_command(["rev-parse", "HEAD"], self.git_dir)
-        tag = self.distribution.get_version()
-
-        if self.has_tag(tag, sha):
-            tags_sha = VersionUtils.run_git_command(["rev-parse", tag], self.git_dir)
-            if sha != tags_sha:
-                logger.error(
-                    "git tag {0} sha does not match the sha requesting to be tagged, you need to increment the version number, Skipped Tagging!".format(
-                        tag
-                    )
-                )
-                return
-            else:
-                logger.info(
-                    "git tag {0} already exists for this repo, Skipped Tagging!".format(
-                        tag
-                    )
+        if self.tags_file:
+            tag_many(
+                self.repo,
+                read_tag_pairs(self.tags_file),
+                self.remote,
+                self.dry_run,
+                self.allow_non_atomic,
+            )
+            return
+        name = self.distribution.get_name()
+        version = self.distribution.get_version()
+        # the version being built is the release, it is not incremented
+        planned = plan_releases(
+            [(name, None)], current={name: version}, release_versions={name: version}
+        )
+        tag = planned[0].tag
+        action = self.repo.plan_tags([(tag, self.repo.head())])[0]
+        if action.action == "conflict":
+            logger.error(
+                "git tag {0} sha does not match the sha requesting to be tagged, you need to increment the version number, Skipped Tagging!".format(
+                    tag
                 )
-                return
-
-        logger.info("Adding tag {0} for commit {1}".format(tag, sha))
-        if not self.dry_run:
-            VersionUtils.run_git_command(
-                ["tag", "-m", '""', tag, sha], self.git_dir, throw_on_error=True
             )
-            logger.info("Pushing tag {0} to remote {1}".format(tag, self.remote))
-            VersionUtils.run_git_command(
-                ["push", self.remote, tag], self.git_dir, throw_on_error=True
+            return
+        if action.action == "exists":
+            logger.info(
+                "git tag {0} already exists for this repo, Skipped Tagging!".format(tag)
             )
+            return
+        tag_many(self.repo, [action], self.remote, self.dry_run)
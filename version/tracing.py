@@ -0,0 +1,187 @@
+"""Instrumentation of version resolution: per-source timings, hooks and spans."""
+
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+__all__ = [
+    "Resolution",
+    "SourceAttempt",
+    "add_hook",
+    "record_cache",
+    "remove_hook",
+    "set_tracer",
+    "use_opentelemetry",
+]
+
+_hooks = []
+_tracer = None
+_state = threading.local()
+
+
+class SourceAttempt(namedtuple("SourceAttempt", "source version elapsed cache error")):
+    """One source asked during a resolution.
+
+    ``elapsed`` is in seconds, ``cache`` is the cache status the source
+    reported (``hit``, ``miss``, ``revalidated``, ...) or None when it has no
+    cache, ``error`` the exception it raised, if any.
+    """
+
+    __slots__ = ()
+
+
+class Resolution(object):
+    """The outcome of resolving one package and how it was obtained."""
+
+    def __init__(self, package):
+        self.package = package
+        self.version = None
+        self.source = None
+        self.elapsed = 0.0
+        self.attempts = []
+
+    @property
+    def found(self):
+        """Whether a source answered, rather than falling back to the default."""
+        return self.source is not None
+
+    def as_dict(self):
+        return {
+            "package": self.package,
+            "version": str(self.version),
+            "source": self.source,
+            "elapsed": self.elapsed,
+            "attempts": [
+                {
+                    "source": attempt.source,
+                    "version": attempt.version,
+                    "elapsed": attempt.elapsed,
+                    "cache": attempt.cache,
+                    "error": None if attempt.error is None else str(attempt.error),
+                }
+                for attempt in self.attempts
+            ],
+        }
+
+    def format(self):
+        """Return a human readable breakdown, one line per source."""
+        lines = [
+            "{0} {1} from {2} in {3:.2f}ms".format(
+                self.package,
+                self.version,
+                self.source or "default",
+                self.elapsed * 1000,
+            )
+        ]
+        for attempt in self.attempts:
+            details = [attempt.version or "miss"]
+            if attempt.cache:
+                details.append("cache " + attempt.cache)
+            if attempt.error is not None:
+                details.append("error: {0}".format(attempt.error))
+            lines.append(
+                "  {0:<14} {1:>9.2f}ms  {2}".format(
+                    attempt.source, attempt.elapsed * 1000, ", ".join(details)
+                )
+            )
+        return "\n".join(lines)
+
+
+def add_hook(hook):
+    """Call ``hook(resolution)`` after every resolution."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def set_tracer(tracer):
+    """Emit spans through ``tracer``, or stop emitting them when None.
+
+    Any object with an OpenTelemetry compatible ``start_as_current_span``
+    works; a ``pyversion.resolve`` span is opened per package with a
+    ``pyversion.source`` child span per source asked.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def use_opentelemetry(name="pyversion"):
+    """Emit spans through the globally configured OpenTelemetry tracer provider."""
+    from opentelemetry import trace
+
+    set_tracer(trace.get_tracer(name))
+
+
+def record_cache(status):
+    """Let the running source report how its cache answered."""
+    _state.cache = status
+
+
+@contextmanager
+def _span(name, attributes):
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+def _set_attributes(span, attributes):
+    if span is not None:
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+
+
+def run_source(resolution, source, func):
+    """Call ``func(package)`` for ``source``, recording it on ``resolution``."""
+    _state.cache = None
+    attributes = {"pyversion.package": resolution.package, "pyversion.source": source}
+    with _span("pyversion.source", attributes) as span:
+        start = time.perf_counter()
+        version, error = None, None
+        try:
+            version = func(resolution.package)
+        except Exception as err:
+            error = err
+            raise
+        finally:
+            attempt = SourceAttempt(
+                source, version, time.perf_counter() - start, _state.cache, error
+            )
+            resolution.attempts.append(attempt)
+            _set_attributes(
+                span,
+                {
+                    "pyversion.version": version and str(version),
+                    "pyversion.cache": attempt.cache,
+                },
+            )
+    return version
+
+
+def record_attempt(resolution, source, elapsed, error):
+    """Record a source that did not run to completion, e.g. timed out."""
+    resolution.attempts.append(SourceAttempt(source, None, elapsed, None, error))
+
+
+@contextmanager
+def resolving(package):
+    """Context of one resolution, yields the Resolution to fill in."""
+    resolution = Resolution(package)
+    with _span("pyversion.resolve", {"pyversion.package": package}) as span:
+        start = time.perf_counter()
+        yield resolution
+        resolution.elapsed = time.perf_counter() - start
+        _set_attributes(
+            span,
+            {
+                "pyversion.version": str(resolution.version),
+                "pyversion.source": resolution.source,
+            },
+        )
+    for hook in list(_hooks):
+        hook(resolution)
@@ -1,15 +1,42 @@
 import os
-import subprocess
-import pkg_resources
-from configparser import ConfigParser
-from packaging.version import parse as parse_version
-from packaging.version import LegacyVersion
-from loguru import logger
-
-try:
-    import xmlrpclib
-except ImportError:
-    import xmlrpc.client as xmlrpclib
+from .distributions import get_distribution_index, normalize_name
+from . import tracing
+from .config import env_flag
+from .log import logger
+
+# pkg_resources, packaging, subprocess and the index client are imported where
+# they are used: this module is loaded by every setup.py through the
+# auto_version keyword and most runs only need a fraction of it.
+
+DEFAULT_VERSION = "0.0.1"
+
+# version source name -> VersionUtils method answering for a single package
+SOURCES = {
+    "pip": "get_version_from_pip",
+    "pkg_resources": "get_version_from_pkg_resources",
+    "git": "get_version_from_git",
+    "wheelhouse": "get_version_from_wheelhouse",
+    "pypi": "get_version_from_pypi",
+}
+# sources that can answer for many packages at once more cheaply
+BULK_SOURCES = {
+    "pip": "get_versions_from_pip",
+    "git": "get_versions_from_git",
+    "wheelhouse": "get_versions_from_wheelhouse",
+    "pypi": "get_versions_from_pypi",
+}
+# sources that need the network, tried after the local ones
+NETWORK_SOURCES = ("pypi",)
+DEFAULT_SOURCES = ("pip", "pkg_resources", "pypi")
+# the default when PYVERSION_WHEELHOUSE lists local wheelhouses
+WHEELHOUSE_SOURCES = ("pip", "pkg_resources", "wheelhouse", "pypi")
+
+
+def parse_version(version):
+    """Proxy for ``packaging.version.parse``"""
+    from packaging.version import parse
+
+    return parse(version)
 
 
 def version_keyword(dist, attr, value):
@@ -17,54 +44,145 @@ def version_keyword(dist, attr, value):
     Implements the actual version setup() keyword.
     """
     if value == "PBR":
-        from pbr.util import setup_cfg_to_setup_kwargs
-
-        path = "setup.cfg"
-        parser = ConfigParser()
-        if not os.path.exists(path):
-            raise ValueError("file '%s' does not exist" % os.path.abspath(path))
-        parser.read(path)
-        config = {}
-        for section in parser.sections():
-            config[section] = dict(parser.items(section))
-        attrs = setup_cfg_to_setup_kwargs(config)
-        version = str(Version(attrs["name"]))
+        from .project import read_pbr_name
+
+        name = read_pbr_name()
+        if name is None:
+            raise ValueError(
+                "no [metadata] name in setup.cfg (or [project] name in "
+                "pyproject.toml) of %s" % os.path.abspath(os.curdir)
+            )
+        version = str(build_version(name))
         os.environ["PBR_VERSION"] = version
     else:
-        version = str(Version(dist.metadata.get_name()))
+        version = str(build_version(dist.metadata.get_name()))
     dist.metadata.version = version
 
 
+# the versions resolved for the projects built by this process, see build_version
+_build_versions = {}
+
+
+def build_version(name):
+    """Return the current version of the project ``name`` being built.
+
+    It is resolved once per process and shared by every setup() keyword
+    call and setuptools command (e.g. increment) of the build.
+    """
+    key = normalize_name(name)
+    version = _build_versions.get(key)
+    if version is None:
+        version = _build_versions[key] = Version(name)
+    return version
+
+
 class VersionUtils(object):
     @staticmethod
-    def run_shell_command(cmd, throw_on_error=False, buffer=True, env=None):
+    def _command_env(env):
+        # None lets the child inherit os.environ without copying it
+        if not env:
+            return None
+        newenv = os.environ.copy()
+        newenv.update(env)
+        return newenv
+
+    @staticmethod
+    def run_shell_command(
+        cmd, throw_on_error=False, buffer=True, env=None, timeout=None, input=None
+    ):
+        """Run ``cmd`` and return its stripped standard output.
+
+        ``env`` is added to the environment of the command, ``input`` (bytes
+        or str) is fed to its standard input and ``timeout`` seconds kill it,
+        raising subprocess.TimeoutExpired. Standard error is only kept to
+        report the failure when ``throw_on_error`` is set. Without ``buffer``
+        the output goes straight to ours and nothing is returned.
+        """
+        import subprocess
+
         if buffer:
             out_location = subprocess.PIPE
-            err_location = subprocess.PIPE
+            err_location = subprocess.PIPE if throw_on_error else subprocess.DEVNULL
         else:
             out_location = None
             err_location = None
-
-        newenv = os.environ.copy()
-        if env:
-            newenv.update(env)
-
-        output = subprocess.Popen(
-            cmd, stdout=out_location, stderr=err_location, env=newenv
+        if isinstance(input, str):
+            input = input.encode("utf-8")
+
+        output = subprocess.run(
+            cmd,
+            stdout=out_location,
+            stderr=err_location,
+            env=VersionUtils._command_env(env),
+            timeout=timeout,
+            input=input,
         )
-        out = output.communicate()
         if output.returncode and throw_on_error:
-            raise Exception("%s returned %d" % (cmd, output.returncode))
-        if len(out) == 0 or not out[0] or not out[0].strip():
+            message = "%s returned %d" % (cmd, output.returncode)
+            if output.stderr:
+                message += ": " + output.stderr.decode("utf-8", "replace").strip()
+            raise Exception(message)
+        if not output.stdout:
             return ""
-        return out[0].strip().decode("utf-8")
+        return output.stdout.decode("utf-8").strip()
+
+    @staticmethod
+    def iter_shell_command(cmd, throw_on_error=False, env=None, timeout=None):
+        """Run ``cmd``, yielding its output lines as they are written.
+
+        Large outputs (e.g. listing thousands of tags) are never held in
+        memory at once. The command is killed after ``timeout`` seconds, or
+        when the generator is closed before the end of the output.
+        """
+        import subprocess
+        import threading
+
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=VersionUtils._command_env(env),
+        )
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            process.kill()
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+        try:
+            for line in process.stdout:
+                yield line.decode("utf-8").rstrip("\r\n")
+            process.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if process.returncode is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        if expired.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if process.returncode and throw_on_error:
+            raise Exception("%s returned %d" % (cmd, process.returncode))
 
     @staticmethod
     def run_git_command(cmd, git_dir, **kwargs):
         if not isinstance(cmd, (list, tuple)):
             cmd = [cmd]
         return VersionUtils.run_shell_command(
-            ["git", "--git-dir=%s" % git_dir] + cmd, **kwargs
+            ["git", "--git-dir=%s" % git_dir] + list(cmd), **kwargs
+        )
+
+    @staticmethod
+    def iter_git_command(cmd, git_dir, **kwargs):
+        """Streaming run_git_command, see iter_shell_command."""
+        return VersionUtils.iter_shell_command(
+            ["git", "--git-dir=%s" % git_dir] + list(cmd), **kwargs
         )
 
     @staticmethod
@@ -96,82 +214,28 @@ class VersionUtils(object):
             logger.exception(f"Unexpected exception: {err}")
             return default_name, default
 
-    @staticmethod  # noqa: C901
-    def increment(version):
-        """Return an incremented version string."""
+    @staticmethod
+    def increment(version, release_type=None):
+        """Return an incremented version string.
+
+        ``RELEASE_VERSION`` overrides the result and ``RELEASE_TYPE`` is the
+        default ``release_type``, see version.bump for the environment free API.
+        """
         release_version = os.environ.get("RELEASE_VERSION", None)
         if release_version is not None:
             return release_version
-        if isinstance(version, LegacyVersion):
-            msg = """{0} is considered a legacy version and does not
-            support automatic incrementing.  Please bring your version
-            numbering into PEP440 standards and then it can be
-            automatically incremented.
-            """
-            raise Exception(msg.format(version))
-        release_type = os.environ.get("RELEASE_TYPE", "micro")
-        v = version._version
-        # epoch
-        epoch_name, epoch = VersionUtils.get_version_number(v, 0, None, "!")
-        pre_name, pre = VersionUtils.get_version_number(v, 3, None, "pre")
-        post_name, post = VersionUtils.get_version_number(v, 4, None, "post")
-        dev_name, dev = VersionUtils.get_version_number(v, 2, None, "dev")
-        _, major = VersionUtils.get_version_number(v[1], 0, 0)
-        _, minor = VersionUtils.get_version_number(v[1], 1, None)
-        _, micro = VersionUtils.get_version_number(v[1], 2, None)
-
-        # Handle dev/pre/post
-        if release_type == "pre":
-            micro, post, pre = VersionUtils.process_pre(micro, post, pre)
-
-        if release_type == "post":
-            dev, post = VersionUtils.process_post(dev, post)
-
-        if release_type == "dev":
-            dev = VersionUtils.process_dev(dev)
-
-        if release_type == "micro":
-            dev, micro, minor, post, pre = VersionUtils.process_micro(
-                dev, micro, minor, post, pre
-            )
-
-        if release_type == "minor":
-            dev, micro, minor, post, pre = VersionUtils.process_minor(
-                dev, micro, minor, post, pre
-            )
-
-        if release_type == "major":
-            dev, major, micro, minor, post, pre = VersionUtils.process_major(
-                dev, major, micro, minor, post, pre
-            )
-
-        # Handle Epoch
-        if release_type == "epoch":
-            dev, epoch, major, micro, minor, post, pre = VersionUtils.process_epoch(
-                dev, epoch, major, micro, minor, post, pre
-            )
+        if release_type is None:
+            release_type = os.environ.get("RELEASE_TYPE", "micro")
+        from .bump import _increment
 
-        local = "".join(v[5] or []) or None
+        return _increment(str(version), release_type)
 
-        version_list = [major, minor, micro]
-        if release_type not in ["epoch", "major", "minor", "micro", "pre"]:
-            version_list += list(v[1][3:])
-        version_string = ".".join([str(x) for x in version_list if x or x == 0])
-
-        if epoch:
-            version_string = str(epoch) + epoch_name + version_string
-        if pre is not None:
-            version_string = VersionUtils.calc_pre_version_string(
-                pre, pre_name, version_string
-            )
-        if post is not None:
-            version_string += "." + post_name + str(post)
-        if dev is not None:
-            version_string += "." + dev_name + str(dev)
-        if local is not None:
-            version_string += "." + str(local)
+    @staticmethod
+    def increment_many(versions, release_type="micro"):
+        """Increment many versions at once, see version.bump.increment_many"""
+        from .bump import increment_many
 
-        return version_string
+        return increment_many(versions, release_type)
 
     @staticmethod
     def calc_pre_version_string(pre, pre_name, version_string):
@@ -263,6 +327,8 @@ class VersionUtils(object):
     @staticmethod
     def get_version_from_pkg_resources(package):
         try:
+            import pkg_resources
+
             requirement = pkg_resources.Requirement.parse(package)
             provider = pkg_resources.get_provider(requirement)
             return provider.version
@@ -272,60 +338,279 @@ class VersionUtils(object):
 
     @staticmethod
     def get_version_from_pip(package):
+        """Return the installed version of ``package``.
+
+        Distribution metadata is asked first, then the ``__version__`` of the
+        module of the same name is read from its source without importing it,
+        which covers packages on the path without metadata.
+        """
         try:
-            versions = eval(f"{package}.__version__")
-        except Exception:
+            versions = get_distribution_index().get(package)
+        except Exception as err:
+            logger.exception(f"get_version() failed:{err}")
             versions = None
 
         if versions is None:
-            try:
+            from .static import get_module_version
 
-                def get_ver(pkg):
-                    pkg = pkg.lower()
-                    return next(
-                        (
-                            p.version
-                            for p in pkg_resources.working_set
-                            if p.project_name.lower() == pkg
-                        ),
-                        None,
-                    )
-
-                versions = get_ver(package)
-            except Exception as err:
-                logger.exception(f"get_version() failed:{err}")
-                versions = None
+            versions = get_module_version(package)
         return versions
 
     @staticmethod
     def get_version_from_pypi(package):
+        from .cache import get_release_cache
+        from .index import get_index_client
+
         try:
-            with xmlrpclib.ServerProxy("https://pypi.python.org/pypi") as client:
-                versions = client.package_releases(package)
-                if len(versions) >= 1:
-                    return versions[0]
-                else:
-                    return None
+            client = get_index_client()
+            versions = get_release_cache().lookup(package, client.fetch_releases)
         except Exception as err:
             logger.exception(f"get_version_from_pypi: {err}")
             return None
+        if versions:
+            return client.select_latest(versions)
+        return None
+
+    @staticmethod
+    def get_versions_from_pypi(packages):
+        """Concurrently look up many packages on the index, see get_version_from_pypi"""
+        from .cache import get_release_cache
+        from .index import get_index_client
+
+        client = get_index_client()
+        cache = get_release_cache()
+        results = client.fetch_many(
+            packages, lambda package: cache.lookup(package, client.fetch_releases)
+        )
+        versions = {}
+        for package, result in results.items():
+            if isinstance(result, Exception):
+                logger.error(f"get_versions_from_pypi: {package}: {result}")
+                result = None
+            versions[package] = client.select_latest(result) if result else None
+        return versions
+
+    @staticmethod
+    def get_version_from_wheelhouse(package):
+        """Return the latest version of ``package`` in the local wheelhouses.
+
+        The directories come from ``PYVERSION_WHEELHOUSE``, see
+        version.wheelhouse; without any this source always misses.
+        """
+        from .wheelhouse import get_wheelhouse_dirs, get_wheelhouse_index
+
+        if not get_wheelhouse_dirs():
+            return None
+        from .index import select_latest
+
+        versions = get_wheelhouse_index().get(package)
+        return select_latest(versions) if versions else None
+
+    @staticmethod
+    def get_versions_from_wheelhouse(packages):
+        """Bulk version of get_version_from_wheelhouse"""
+        from .wheelhouse import get_wheelhouse_dirs, get_wheelhouse_index
+
+        if not get_wheelhouse_dirs():
+            return dict.fromkeys(packages)
+        from .index import select_latest
+
+        # one freshness check for all the names
+        indexed = get_wheelhouse_index().refresh()
+        versions = {}
+        for package in packages:
+            found = indexed.get(normalize_name(package))
+            versions[package] = select_latest(found) if found else None
+        return versions
+
+    @staticmethod
+    def get_version_from_git(package):
+        """Derive the version of ``package`` from the tags of the current checkout.
+
+        The project of the checkout is versioned by the nearest PEP 440 tag,
+        other packages only by their own ``{name}-{version}`` tags, see
+        version.git.GitRepository.package_versions.
+        """
+        return VersionUtils.get_versions_from_git([package])[package]
+
+    @staticmethod
+    def get_versions_from_git(packages):
+        """Bulk version of get_version_from_git, reading the refs once"""
+        from .git import GitRepository, find_repository
+        from .project import read_project_name
+
+        work_tree, git_dir = find_repository()
+        if git_dir is None:
+            return dict.fromkeys(packages)
+        try:
+            repo = GitRepository(git_dir, work_tree)
+            return repo.package_versions(packages, read_project_name(work_tree))
+        except Exception as err:
+            logger.exception(f"get_version_from_git: {err}")
+            return dict.fromkeys(packages)
+
+    @staticmethod
+    def get_versions_from_pip(packages):
+        """Bulk version of get_version_from_pip, a single pass over the environment"""
+        from .static import get_module_version
+
+        installed = get_distribution_index().refresh()
+        versions = {}
+        for package in packages:
+            version = installed.get(normalize_name(package))
+            versions[package] = version or get_module_version(package)
+        return versions
+
+    @staticmethod
+    def get_sources(sources=None):
+        """Return the names of the sources to resolve versions from, in order.
+
+        ``sources`` is a list or a comma separated string of names from
+        SOURCES, by default read from ``PYVERSION_SOURCES``. Without it the
+        local wheelhouses are asked before the index when
+        ``PYVERSION_WHEELHOUSE`` is set.
+        """
+        if sources is None:
+            sources = os.environ.get("PYVERSION_SOURCES")
+            if not sources and os.environ.get("PYVERSION_WHEELHOUSE"):
+                sources = WHEELHOUSE_SOURCES
+            sources = sources or DEFAULT_SOURCES
+        if isinstance(sources, str):
+            sources = [s.strip() for s in sources.split(",") if s.strip()]
+        unknown = [s for s in sources if s not in SOURCES]
+        if unknown:
+            raise ValueError(
+                "unknown version source(s) %s, expected some of %s"
+                % (", ".join(unknown), ", ".join(SOURCES))
+            )
+        return list(sources)
+
+    @staticmethod
+    def resolve(package, sources=None, parallel=None, **kwargs):
+        """Resolve ``package``, returning a version.tracing.Resolution.
+
+        Besides the version it records which source answered and how long
+        each source took, and it is passed to the hooks registered with
+        version.tracing.add_hook.
+
+        With ``parallel`` (default: ``PYVERSION_PARALLEL``) all sources are
+        asked at once and the first one in order with an answer wins, other
+        keyword arguments (``timeout``, ``source_timeouts``, ``deadline``)
+        are passed on to version.fanout.race and imply ``parallel``.
+        """
+        if parallel is None:
+            parallel = bool(kwargs) or env_flag("PYVERSION_PARALLEL")
+        if parallel:
+            from .fanout import race
+
+            return race(package, sources, **kwargs)
+        with tracing.resolving(package) as resolution:
+            version = None
+            for source in VersionUtils.get_sources(sources):
+                method = getattr(VersionUtils, SOURCES[source])
+                try:
+                    version = tracing.run_source(resolution, source, method)
+                except Exception as err:
+                    # a failing source is a miss, as in version.fanout.race
+                    logger.warning(f"{source} lookup of {package} failed: {err}")
+                    continue
+                if version:
+                    resolution.source = source
+                    break
+            # probably could add a few more methods here to try
+            resolution.version = parse_version(version or DEFAULT_VERSION)
+        return resolution
+
+    @staticmethod
+    def get_version(package, sources=None, **kwargs):
+        return VersionUtils.resolve(package, sources, **kwargs).version
 
     @staticmethod
-    def get_version(package):
-        version = VersionUtils.get_version_from_pip(package)
-        if not version:
-            version = VersionUtils.get_version_from_pkg_resources(package)
-        if not version:
-            version = VersionUtils.get_version_from_pypi(package)
-        # probably could add a few more methods here to try
-        if not version:
-            version = "0.0.1"
-        version = parse_version(version)
-        return version
+    def _lookup_each(source, packages):
+        """Ask ``source`` about each package, a failure being a miss."""
+        method = getattr(VersionUtils, SOURCES[source])
+        found = {}
+        for package in packages:
+            try:
+                found[package] = method(package)
+            except Exception as err:
+                logger.warning(f"{source} lookup of {package} failed: {err}")
+        return found
+
+    @staticmethod
+    def get_versions(packages, sources=None):
+        """Return a ``{package: version}`` map resolving many packages at once.
+
+        Each source is asked about all the names still unresolved in one go:
+        installed packages are answered from a single pass over the
+        environment and the index is queried concurrently.
+        """
+        versions = dict.fromkeys(packages)
+        for source in VersionUtils.get_sources(sources):
+            missing = [package for package, version in versions.items() if not version]
+            if not missing:
+                break
+            if source in BULK_SOURCES:
+                try:
+                    found = getattr(VersionUtils, BULK_SOURCES[source])(missing)
+                except Exception as err:
+                    logger.warning(f"{source} lookup failed: {err}")
+                    continue
+            else:
+                found = VersionUtils._lookup_each(source, missing)
+            versions.update((package, v) for package, v in found.items() if v)
+        return {
+            package: parse_version(version or DEFAULT_VERSION)
+            for package, version in versions.items()
+        }
+
+    @staticmethod
+    def get_versions_from_environments(roots, packages=None, max_workers=None):
+        """Return ``{root: {package: version}}`` for other environments.
+
+        ``roots`` are virtualenvs, prefixes, site directories or unpacked
+        image layers; their distribution metadata is read directly, see
+        version.environments.scan_environments. Without ``packages`` every
+        installed distribution is listed under its normalized name.
+        """
+        from .environments import scan_environments
+
+        scanned = scan_environments(roots, max_workers)
+        if packages is None:
+            return scanned
+        return {
+            root: {package: found.get(normalize_name(package)) for package in packages}
+            for root, found in scanned.items()
+        }
+
+    @staticmethod
+    def get_distributions_from_site_dir(path, known=None):
+        """Return ``{entry: [mtime, name, version]}`` for a site directory.
+
+        Only the entries not in ``known`` with the same mtime are read, see
+        version.environments.read_site_dir.
+        """
+        from .environments import read_site_dir
+
+        return read_site_dir(path, known)
+
+    @staticmethod
+    async def aget_version(package, **kwargs):
+        """asyncio counterpart of get_version, see version.aio.aget_version"""
+        from .aio import aget_version
+
+        return await aget_version(package, **kwargs)
+
+    @staticmethod
+    async def aget_versions(packages, **kwargs):
+        """asyncio counterpart of get_versions, see version.aio.aget_versions"""
+        from .aio import aget_versions
+
+        return await aget_versions(packages, **kwargs)
 
 
 class Version(str):
     """Proxy for the pip packaging version class"""
 
-    def __new__(cls, package):
-        return VersionUtils.get_version(package)
+    def __new__(cls, package, sources=None, **kwargs):
+        return VersionUtils.get_version(package, sources, **kwargs)
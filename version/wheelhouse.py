@@ -0,0 +1,134 @@
+"""Versions available in local wheelhouses and PEP 503 directory trees."""
+
+import os
+import threading
+import time
+from .distributions import normalize_name
+from .index import parse_filename
+from .tracing import record_cache
+
+__all__ = ["WheelhouseIndex", "get_wheelhouse_dirs", "get_wheelhouse_index"]
+
+# seconds during which the directories are not checked again for changes
+CHECK_INTERVAL = 1.0
+
+
+def get_wheelhouse_dirs():
+    """Return the directories listed in ``PYVERSION_WHEELHOUSE`` (``os.pathsep`` separated)."""
+    value = os.environ.get("PYVERSION_WHEELHOUSE") or ""
+    return [path for path in value.split(os.pathsep) if path]
+
+
+def _scan_dir(path, project=None, versions=None):
+    """Add the distributions in ``path`` to ``versions``, return its subdirectories."""
+    subdirs = []
+    try:
+        scanner = os.scandir(path)
+    except OSError:
+        return subdirs
+    with scanner:
+        for entry in scanner:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                subdirs.append(entry)
+                continue
+            parsed = parse_filename(entry.name, project)
+            if parsed is None and project is not None:
+                parsed = parse_filename(entry.name)
+            if parsed is not None:
+                name, version = parsed
+                versions.setdefault(normalize_name(name), set()).add(version)
+    return subdirs
+
+
+class WheelhouseIndex(object):
+    """Maps normalized project names to the versions found in local directories.
+
+    A directory is either a flat wheelhouse (``pip wheel -w``, ``pip
+    download -d``) or a PEP 503 tree with one directory per project; only
+    file names are parsed, nothing is opened. The index is built once and
+    rebuilt when the directories (or their project directories) change, so
+    lookups are dictionary accesses. Checking for changes stats every
+    project directory, so it is done at most once per ``check_interval``
+    seconds.
+    """
+
+    def __init__(self, directories, check_interval=CHECK_INTERVAL):
+        self.directories = list(directories)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked = None
+        self._versions = {}
+
+    def fingerprint(self):
+        """Return the mtimes of the directories and of their project directories."""
+        key = []
+        for directory in self.directories:
+            try:
+                key.append((directory, os.stat(directory).st_mtime_ns))
+                with os.scandir(directory) as scanner:
+                    for entry in scanner:
+                        if entry.is_dir() and not entry.name.startswith("."):
+                            key.append((entry.path, entry.stat().st_mtime_ns))
+            except OSError:
+                key.append((directory, None))
+        return tuple(key)
+
+    def scan(self):
+        versions = {}
+        for directory in self.directories:
+            for subdir in _scan_dir(directory, versions=versions):
+                # PEP 503: the directory is named after the project
+                _scan_dir(subdir.path, subdir.name, versions)
+        return versions
+
+    def refresh(self):
+        """Return the index, rebuilt if a directory changed since it was built."""
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.check_interval:
+            record_cache("hit")
+            return self._versions
+        fingerprint = self.fingerprint()
+        if fingerprint != self._fingerprint:
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._versions = self.scan()
+                    self._fingerprint = fingerprint
+                    self._checked = now
+                    record_cache("miss")
+                    return self._versions
+        self._checked = now
+        record_cache("hit")
+        return self._versions
+
+    def invalidate(self):
+        with self._lock:
+            self._fingerprint = None
+            self._checked = None
+
+    def get(self, name):
+        """Return the versions of ``name`` found, unsorted, or None."""
+        found = self.refresh().get(normalize_name(name))
+        return list(found) if found else None
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.refresh()
+
+    def __len__(self):
+        return len(self.refresh())
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_wheelhouse_index(directories=None):
+    """Return the shared index over ``directories`` (default: see get_wheelhouse_dirs)."""
+    directories = tuple(get_wheelhouse_dirs() if directories is None else directories)
+    with _indexes_lock:
+        index = _indexes.get(directories)
+        if index is None:
+            index = _indexes[directories] = WheelhouseIndex(directories)
+        return index
@@ -0,0 +1,112 @@
+"""Planning version increments for every Python project under a directory."""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .log import logger
+from .project import PROJECT_FILES, read_project_name
+
+__all__ = [
+    "PlanEntry",
+    "discover_projects",
+    "plan",
+    "read_project_name",
+    "tag_plan",
+]
+
+DEFAULT_TAG_FORMAT = "{name}-{version}"
+MAX_WORKERS = 16
+# directories never holding workspace projects
+_SKIP_DIRS = {"__pycache__", "build", "dist", "node_modules", "site-packages"}
+
+
+class PlanEntry(
+    namedtuple("PlanEntry", "path name version next_version tag tag_exists")
+):
+    """What a release train does to one project.
+
+    ``path`` is the project directory, ``tag`` the tag the release would
+    create and ``tag_exists`` whether the repository already has it.
+    """
+
+    __slots__ = ()
+
+    def as_dict(self):
+        return dict(self._asdict())
+
+
+def _skip(dirpath, dirname):
+    if dirname.startswith(".") or dirname in _SKIP_DIRS:
+        return True
+    # virtual environments
+    return os.path.isfile(os.path.join(dirpath, dirname, "pyvenv.cfg"))
+
+
+def discover_projects(root):
+    """Return the sorted directories under ``root`` holding a Python project."""
+    projects = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not _skip(dirpath, d))
+        if any(name in filenames for name in PROJECT_FILES):
+            projects.append(dirpath)
+    return projects
+
+
+def plan(
+    root,
+    release_type="micro",
+    sources=None,
+    tag_format=DEFAULT_TAG_FORMAT,
+    repo=None,
+    max_workers=MAX_WORKERS,
+):
+    """Return a PlanEntry per project under ``root``, sorted by path.
+
+    Project names are read concurrently and the releases planned at once,
+    see version.planning.plan_releases, each incremented by
+    ``release_type``. ``tag_format`` is formatted with ``name`` and
+    ``version`` to name the tags, which are looked up in ``repo`` (a
+    version.git.GitRepository, by default the one ``root`` is in, if any).
+    """
+    from .planning import plan_releases
+
+    directories = discover_projects(root)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        names = list(executor.map(read_project_name, directories))
+    projects = [(path, name) for path, name in zip(directories, names) if name]
+    for path, name in zip(directories, names):
+        if not name:
+            logger.warning(f"no project name found in {path}, skipped")
+
+    if repo is None:
+        from .git import GitRepository, find_git_dir
+
+        git_dir = find_git_dir(root)
+        repo = GitRepository(git_dir) if git_dir else None
+    planned = plan_releases(
+        [(name, release_type) for _, name in projects],
+        sources,
+        repo,
+        tag_format,
+        max_workers=max_workers,
+    )
+    return [
+        PlanEntry(path, r.name, r.version, r.next_version, r.tag, r.tag_exists)
+        for (path, _), r in zip(projects, planned)
+    ]
+
+
+def tag_plan(entries, repo, remote="origin", sha=None, dry_run=False):
+    """Tag ``sha`` (default: HEAD) with the tags of ``entries`` not created yet.
+
+    The tags are created and pushed to ``remote`` at once, see
+    version.tag_command.tag_many. Returns the list of version.git.TagAction,
+    only planned with ``dry_run``.
+    """
+    from .tag_command import tag_many
+
+    sha = sha or "HEAD"
+    pairs = [(entry.tag, sha) for entry in entries if not entry.tag_exists]
+    if not pairs:
+        return []
+    return tag_many(repo, pairs, remote, dry_run)
@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_cache_dir(tmp_path_factory):
+    """Keep the release cache (and server socket) out of the user's cache."""
+    path = str(tmp_path_factory.mktemp("pyversion-cache"))
+    previous = os.environ.get("PYVERSION_CACHE_DIR")
+    os.environ["PYVERSION_CACHE_DIR"] = path
+    yield path
+    if previous is None:
+        os.environ.pop("PYVERSION_CACHE_DIR", None)
+    else:
+        os.environ["PYVERSION_CACHE_DIR"] = previous
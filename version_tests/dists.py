@@ -0,0 +1,34 @@
+"""Helpers writing fake installed distributions for the tests."""
+
+import os
+
+METADATA = "Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\n{body}"
+
+
+def dist_path(site, name, version, kind="dist-info"):
+    """Return where write_dist puts the metadata directory (or file) of ``name``."""
+    if kind == "egg-info-file":
+        kind = "egg-info"
+    return os.path.join(
+        site, "{0}-{1}.{2}".format(name.replace("-", "_"), version, kind)
+    )
+
+
+def write_dist(site, name, version, kind="dist-info", body=""):
+    """Install a fake ``name`` ``version`` in ``site``, return its dist_path.
+
+    ``kind`` is ``dist-info`` (``METADATA``), ``egg-info`` (``PKG-INFO``) or
+    ``egg-info-file``, a distutils egg-info file; ``body`` follows the
+    headers.
+    """
+    path = dist_path(site, name, version, kind)
+    metadata = path
+    if kind != "egg-info-file":
+        os.makedirs(path)
+        filename = "METADATA" if kind == "dist-info" else "PKG-INFO"
+        metadata = os.path.join(path, filename)
+    else:
+        os.makedirs(site, exist_ok=True)
+    with open(metadata, "w") as fh:
+        fh.write(METADATA.format(name=name, version=version, body=body))
+    return path
@@ -0,0 +1,31 @@
+"""Helpers creating throw-away git repositories for the tests."""
+
+import os
+import subprocess
+import tempfile
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "pyversion",
+    "GIT_AUTHOR_EMAIL": "pyversion@example.com",
+    "GIT_COMMITTER_NAME": "pyversion",
+    "GIT_COMMITTER_EMAIL": "pyversion@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "HOME": tempfile.gettempdir(),
+}
+
+
+def git(path, *args):
+    env = dict(os.environ, **GIT_ENV)
+    return (
+        subprocess.check_output(["git", "-C", path] + list(args), env=env)
+        .decode("utf-8")
+        .strip()
+    )
+
+
+def make_repo(path, commits=1):
+    """Initialise a repository in ``path`` with ``commits`` empty commits."""
+    git(path, "init", "-q")
+    for number in range(commits):
+        git(path, "commit", "-q", "--allow-empty", "-m", "commit %d" % number)
+    return os.path.join(path, ".git")
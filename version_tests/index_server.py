@@ -0,0 +1,117 @@
+"""A local stand-in for a package index, used to test index lookups offline."""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.index.lock:
+            self.server.index.connections += 1
+
+    def do_GET(self):
+        index = self.server.index
+        with index.lock:
+            index.requests.append(self.path)
+        parts = [p for p in self.path.split("/") if p]
+        if len(parts) == 3 and parts[0] == "pypi" and parts[2] == "json":
+            render = index.render_json
+        elif len(parts) == 2 and parts[0] == "simple":
+            render = index.render_simple
+        else:
+            return self.send_error(404)
+        versions = index.projects.get(parts[1])
+        if versions is None:
+            return self.send_error(404)
+        content_type, body = render(parts[1], versions)
+        body = json.dumps(body).encode("utf-8")
+        etag = '"{0}"'.format(hashlib.sha1(body).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandInIndex(object):
+    """Serve ``projects`` (``{name: [versions]}``) over HTTP on localhost.
+
+    Both the JSON API and the PEP 691 simple API are available; releases
+    listed in ``yanked`` (``{(name, version)}``) are marked as yanked.
+    """
+
+    def __init__(self, projects=None, yanked=()):
+        self.projects = dict(projects or {})
+        self.yanked = set(yanked)
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.index = self
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{0}".format(self._server.server_port)
+
+    def filename(self, name, version):
+        return "{0}-{1}-py3-none-any.whl".format(name.replace("-", "_"), version)
+
+    def render_json(self, name, versions):
+        return (
+            "application/json",
+            {
+                "info": {"name": name, "version": versions[-1]},
+                "releases": {
+                    v: [
+                        {
+                            "filename": self.filename(name, v),
+                            "yanked": (name, v) in self.yanked,
+                        }
+                    ]
+                    for v in versions
+                },
+            },
+        )
+
+    def render_simple(self, name, versions):
+        return (
+            "application/vnd.pypi.simple.v1+json",
+            {
+                "meta": {"api-version": "1.0"},
+                "name": name,
+                "files": [
+                    {
+                        "filename": self.filename(name, v),
+                        "url": "../../files/" + self.filename(name, v),
+                        "hashes": {},
+                        "yanked": (name, v) in self.yanked,
+                    }
+                    for v in versions
+                ],
+            },
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,52 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from version import aio
+from version.version import Version, VersionUtils, parse_version
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncVersion(unittest.TestCase):
+    def test_aget_version_installed(self):
+        self.assertEqual(run(VersionUtils.aget_version("pytest")), Version("pytest"))
+
+    def test_aget_versions(self):
+        versions = run(VersionUtils.aget_versions(["pytest", "loguru", "pytest"]))
+        self.assertEqual(list(versions), ["pytest", "loguru"])
+        self.assertEqual(versions["loguru"], Version("loguru"))
+
+    def test_slow_source_times_out(self):
+        def slow(package):
+            time.sleep(1)
+            return "9.9.9"
+
+        with mock.patch.multiple(
+            VersionUtils,
+            get_version_from_pip=staticmethod(lambda package: None),
+            get_version_from_pkg_resources=staticmethod(lambda package: None),
+            get_version_from_pypi=staticmethod(slow),
+        ):
+            start = time.monotonic()
+            version = run(aio.aget_version("slow", source_timeouts={"pypi": 0.05}))
+        self.assertEqual(version, parse_version("0.0.1"))
+        self.assertLess(time.monotonic() - start, 0.9)
+        # lookups run on the module's own bounded pool, not the loop's default
+        self.assertEqual(aio._get_executor()._max_workers, aio.MAX_WORKERS)
+
+    def test_run_shell_command(self):
+        out = run(aio.run_shell_command(["git", "--version"]))
+        self.assertTrue(out.startswith("git version"))
+        with self.assertRaisesRegex(Exception, "not a git command"):
+            run(aio.run_shell_command(["git", "nope"], throw_on_error=True))
+        self.assertEqual(run(aio.run_shell_command(["git", "nope"])), "")
+        with self.assertRaises(asyncio.TimeoutError):
+            run(aio.run_shell_command(["sleep", "5"], timeout=0.05))
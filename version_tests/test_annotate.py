@@ -0,0 +1,140 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version import annotate
+from version.cli import main
+from version.version import VersionUtils
+
+REQUIREMENTS = """\
+# generated by pip-compile
+requests==2.22.0 \\
+    --hash=sha256:abc \\
+    --hash=sha256:def
+six[extra]>=1.12  # via something
+-e git+https://example.com/repo.git#egg=repo
+-r other.txt
+Django===2.2.4 ; python_version >= "3"
+https://example.com/pkg.tar.gz
+
+unknown-project==0.1
+"""
+INSTALLED = {"requests": "2.22.0", "six": "1.12.0"}
+LATEST = {"requests": "2.31.0", "six": "1.16.0", "Django": "4.2"}
+
+
+class TestAnnotate(unittest.TestCase):
+    def setUp(self):
+        self.lookups = []
+        lock = threading.Lock()
+
+        def pypi(name):
+            with lock:
+                self.lookups.append(name)
+            return LATEST.get(name)
+
+        patcher = mock.patch.multiple(
+            VersionUtils,
+            get_version_from_pip=staticmethod(INSTALLED.get),
+            get_version_from_pkg_resources=staticmethod(lambda name: None),
+            get_version_from_pypi=staticmethod(pypi),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_requirements(self):
+        pins = list(annotate.read_pins(io.StringIO(REQUIREMENTS)))
+        self.assertEqual(
+            pins,
+            [
+                ("requests", "2.22.0", 2),
+                ("six", None, 5),
+                ("Django", "2.2.4", 8),
+                ("unknown-project", "0.1", 11),
+            ],
+        )
+
+    def test_read_pipfile_lock(self):
+        lock = {
+            "_meta": {},
+            "default": {"requests": {"version": "==2.22.0", "hashes": []}},
+            "develop": {"pytest": {"version": "==5.2.1"}, "local": {"path": "."}},
+        }
+        expected = [("requests", "2.22.0"), ("pytest", "5.2.1"), ("local", None)]
+        # detected from the content, e.g. on stdin, whatever the layout
+        for text in (json.dumps(lock), "\n  \n" + json.dumps(lock, indent=4)):
+            pins = annotate.read_pins(io.StringIO(text))
+            self.assertEqual([pin[:2] for pin in pins], expected)
+
+    def test_annotate(self):
+        pins = annotate.read_pins(io.StringIO(REQUIREMENTS))
+        records = list(annotate.annotate(pins, release_type="minor"))
+        self.assertEqual(
+            [record[:5] for record in records],
+            [
+                ("requests", "2.22.0", "2.22.0", "2.31.0", "2.23.0"),
+                ("six", None, "1.12.0", "1.16.0", "1.13.0"),
+                ("Django", "2.2.4", None, "4.2", "4.3"),
+                ("unknown-project", "0.1", None, None, None),
+            ],
+        )
+        self.assertEqual(records[0].as_dict()["line"], 2)
+
+    def test_configured_sources(self):
+        pins = annotate.read_pins(io.StringIO(REQUIREMENTS))
+        with mock.patch.dict(os.environ, {"PYVERSION_SOURCES": "pkg_resources"}):
+            records = list(annotate.annotate(pins))
+        self.assertEqual([record[2:4] for record in records], [(None, None)] * 4)
+        self.assertEqual(self.lookups, [])
+
+    def test_workers_capped_at_index_pool(self):
+        from version.index import MAX_WORKERS
+
+        pins = annotate.read_pins(io.StringIO(REQUIREMENTS))
+        with mock.patch.object(
+            annotate, "ThreadPoolExecutor", wraps=annotate.ThreadPoolExecutor
+        ) as executor:
+            list(annotate.annotate(pins, max_workers=64))
+        executor.assert_called_once_with(max_workers=MAX_WORKERS)
+
+    def test_streaming_is_bounded(self):
+        def pins():
+            for number in range(1000):
+                yield annotate.Pin("requests" if number % 2 else "six", None, number)
+
+        records = annotate.annotate(pins(), sources="pip", window=8, max_workers=2)
+        first = next(records)
+        self.assertEqual(first.name, "six")
+        self.assertEqual(len(list(records)), 999)
+        # the index is not asked when pypi is not a source
+        self.assertEqual(self.lookups, [])
+
+    def test_cli(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "requirements.txt")
+        with open(path, "w") as fh:
+            fh.write(REQUIREMENTS)
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["annotate", path])
+        self.assertEqual(
+            stdout.getvalue().splitlines()[:2],
+            ["requests 2.22.0 2.22.0 2.31.0 2.22.1", "six - 1.12.0 1.16.0 1.12.1"],
+        )
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["annotate", "--format", "json", path])
+        lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(lines[2]["latest"], "4.2")
+        self.assertEqual(
+            sorted(set(self.lookups)), sorted(LATEST) + ["unknown-project"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+from unittest import mock
+
+from version import bump
+from version.version import VersionUtils, parse_version
+
+
+class TestBump(unittest.TestCase):
+    def test_increment_is_independent_of_environment(self):
+        env = {"RELEASE_TYPE": "major", "RELEASE_VERSION": "9.9.9"}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(bump.increment("1.2.3"), "1.2.4")
+            self.assertEqual(bump.increment(parse_version("1.2.3"), "minor"), "1.3.0")
+
+    def test_release_types(self):
+        expected = {
+            "epoch": "1!1.0.0",
+            "major": "2.0.0",
+            "minor": "1.3.0",
+            "micro": "1.2.4",
+            "pre": "1.2.4.pre1",
+            "post": "1.2.3.4.post2",
+            "dev": "1.2.3.4.post1.dev1",
+        }
+        for release_type, version in expected.items():
+            self.assertEqual(bump.increment("1.2.3.4.post1", release_type), version)
+
+    def test_unknown_release_type(self):
+        with self.assertRaises(ValueError):
+            bump.increment("1.0", "huge")
+
+    def test_results_are_memoized(self):
+        bump.cache_clear()
+        bump.increment("4.5.6", "minor")
+        bump.increment(parse_version("4.5.6"), "minor")
+        self.assertEqual(bump.cache_info().hits, 1)
+
+    def test_increment_many(self):
+        self.assertEqual(
+            VersionUtils.increment_many(["1.0", "1.0", "2.0.0b1"]),
+            ["1.0.1", "1.0.1", "2.0.0"],
+        )
+        self.assertEqual(
+            bump.increment_many(["1.0", "1.0"], ["major", "dev"]), ["2.0", "1.0.dev1"]
+        )
+        with self.assertRaises(ValueError):
+            bump.increment_many(["1.0"], ["major", "dev"])
+
+    def test_version_utils_explicit_release_type(self):
+        with mock.patch.dict(os.environ, {"RELEASE_TYPE": "major"}):
+            os.environ.pop("RELEASE_VERSION", None)
+            self.assertEqual(VersionUtils.increment(parse_version("1.2.3")), "2.0.0")
+            self.assertEqual(
+                VersionUtils.increment(parse_version("1.2.3"), "micro"), "1.2.4"
+            )
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from version.cache import NotModified, ReleaseCache, get_release_cache
+from version.version import VersionUtils
+from version_tests.index_server import StandInIndex
+
+
+class TestReleaseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ReleaseCache(":memory:", ttl=60, negative_ttl=10)
+        self.calls = []
+
+    def fetch(self, name, etag):
+        self.calls.append((name, etag))
+        if name == "missing":
+            return None, None
+        if etag == "v1":
+            raise NotModified(name)
+        return ["1.0"], "v1"
+
+    def test_fresh_entries_are_served_from_cache(self):
+        self.assertEqual(self.cache.lookup("Foo_Bar", self.fetch), ["1.0"])
+        self.assertEqual(self.cache.lookup("foo-bar", self.fetch), ["1.0"])
+        self.assertEqual(self.calls, [("Foo_Bar", None)])
+
+    def test_negative_caching(self):
+        self.assertIsNone(self.cache.lookup("missing", self.fetch))
+        self.assertIsNone(self.cache.lookup("missing", self.fetch))
+        self.assertEqual(len(self.calls), 1)
+        self.assertFalse(self.cache.get("missing").found)
+
+    def test_stale_entries_are_revalidated(self):
+        self.cache.set("foo", ["1.0"], "v1", fetched=0)
+        self.assertEqual(self.cache.lookup("foo", self.fetch), ["1.0"])
+        self.assertEqual(self.calls, [("foo", "v1")])
+        self.assertTrue(self.cache.get("foo").is_fresh(60, 10))
+
+    def test_offline_serves_only_the_cache(self):
+        self.cache.set("foo", ["1.0"], "v1", fetched=0)
+        self.assertEqual(self.cache.lookup("foo", self.fetch, offline=True), ["1.0"])
+        self.assertIsNone(self.cache.lookup("bar", self.fetch, offline=True))
+        self.assertEqual(self.calls, [])
+
+    def test_stale_entry_served_when_fetch_fails(self):
+        def broken(name, etag):
+            raise OSError("unreachable")
+
+        self.cache.set("foo", ["1.0"], "v1", fetched=0)
+        self.assertEqual(self.cache.lookup("foo", broken), ["1.0"])
+        with self.assertRaises(OSError):
+            self.cache.lookup("bar", broken)
+
+
+class TestPypiLookup(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_lookup_against_stand_in_index(self):
+        with StandInIndex({"foo": ["0.9", "1.10", "1.2"]}) as index:
+            env = {
+                "PYVERSION_INDEX_URL": index.url,
+                "PYVERSION_CACHE_DIR": self.cache_dir,
+                "PYVERSION_CACHE_TTL": "0",
+            }
+            with mock.patch.dict(os.environ, env):
+                self.assertEqual(VersionUtils.get_version_from_pypi("foo"), "1.10")
+                self.assertIsNone(VersionUtils.get_version_from_pypi("bar"))
+                self.assertIsNone(VersionUtils.get_version_from_pypi("bar"))
+                # ttl of 0: revalidated with the etag, answered by a 304
+                self.assertEqual(VersionUtils.get_version_from_pypi("foo"), "1.10")
+                self.assertTrue(
+                    os.path.exists(os.path.join(self.cache_dir, "releases.sqlite"))
+                )
+                get_release_cache().close()
+        self.assertEqual(
+            index.requests, ["/pypi/foo/json", "/pypi/bar/json", "/pypi/foo/json"]
+        )
@@ -0,0 +1,81 @@
+import pickle
+import unittest
+
+from packaging.version import Version
+
+from version import compact
+
+ORDERED = [
+    "0.9",
+    "1.0.dev0",
+    "1.0a1.dev1",
+    "1.0a1",
+    "1.0b2.post1",
+    "1.0rc1",
+    "1.0",
+    "1.0+abc",
+    "1.0+1",
+    "1.0.post1.dev0",
+    "1.0.post1",
+    "1.1",
+    "1!0.1",
+]
+
+
+class TestCompactVersion(unittest.TestCase):
+    def test_interned_and_normalized(self):
+        version = compact.parse("1.0-Alpha.2")
+        self.assertEqual(str(version), "1.0a2")
+        self.assertIs(compact.parse("1.0a2"), version)
+        self.assertIs(compact.parse("v1.0.alpha2"), version)
+        self.assertEqual(compact.parse("1.0"), compact.parse("1.0.0"))
+        self.assertEqual(hash(compact.parse("1.0")), hash(compact.parse("1.0.0")))
+
+    def test_ordering_matches_packaging(self):
+        parsed = [compact.parse(v) for v in ORDERED]
+        self.assertEqual(sorted(reversed(parsed)), parsed)
+        self.assertEqual(
+            sorted(ORDERED, key=compact.sort_key), sorted(ORDERED, key=Version)
+        )
+        self.assertTrue(compact.parse("1.0") < compact.parse("1.0.post1"))
+        self.assertTrue(compact.parse("1.0") >= compact.parse("1.0.0"))
+
+    def test_attributes(self):
+        version = compact.parse("2!1.2.3rc4.post5.dev6+local.7")
+        expected = Version(str(version))
+        for name in ("epoch", "release", "pre", "post", "dev", "local", "public"):
+            self.assertEqual(getattr(version, name), getattr(expected, name), name)
+        self.assertTrue(version.is_prerelease)
+        self.assertTrue(version.is_postrelease)
+        self.assertFalse(compact.parse("1.0").is_prerelease)
+
+    def test_round_trip(self):
+        version = compact.parse("1.2.3b1")
+        self.assertEqual(version.to_packaging(), Version("1.2.3b1"))
+        self.assertIs(
+            compact.CompactVersion.from_packaging(Version("1.2.3b1")), version
+        )
+        self.assertIs(pickle.loads(pickle.dumps(version)), version)
+
+    def test_invalid(self):
+        with self.assertRaises(compact.InvalidVersion):
+            compact.parse("not a version")
+        with self.assertRaises(ValueError):
+            compact.parse_many(["1.0", "nope"])
+        self.assertEqual(
+            compact.parse_many(["1.0", "nope"], strict=False),
+            [compact.parse("1.0"), None],
+        )
+
+    def test_sort_versions(self):
+        self.assertEqual(
+            compact.sort_versions(["1.0", "junk", "0.9", "1.0rc1"]),
+            ["0.9", "1.0rc1", "1.0"],
+        )
+        self.assertEqual(
+            compact.sort_versions(["1.0", "0.9"], reverse=True), ["1.0", "0.9"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
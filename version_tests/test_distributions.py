@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from version.distributions import DistributionIndex, normalize_name
+from version_tests.dists import write_dist
+
+
+class TestDistributionIndex(unittest.TestCase):
+    def setUp(self):
+        self.site = tempfile.mkdtemp()
+        write_dist(self.site, "Foo_Bar", "1.2.3")
+        self.index = DistributionIndex([self.site])
+
+    def tearDown(self):
+        shutil.rmtree(self.site)
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("Foo_Bar"), "foo-bar")
+        self.assertEqual(normalize_name("foo.-_bar"), "foo-bar")
+
+    def test_lookup_is_normalized(self):
+        self.assertEqual(self.index.get("foo-bar"), "1.2.3")
+        self.assertEqual(self.index.get("FOO.BAR"), "1.2.3")
+        self.assertIn("foo_bar", self.index)
+        self.assertIsNone(self.index.get("missing"))
+
+    def test_rebuilt_when_path_changes(self):
+        self.assertEqual(len(self.index), 1)
+        write_dist(self.site, "baz", "0.1")
+        os.utime(self.site, ns=(0, os.stat(self.site).st_mtime_ns + 10**9))
+        self.assertEqual(self.index.get("baz"), "0.1")
+        self.assertEqual(len(self.index), 2)
+
+    def test_first_path_entry_wins(self):
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other)
+        write_dist(other, "foo-bar", "9.9")
+        index = DistributionIndex([self.site, other])
+        self.assertEqual(index.get("foo-bar"), "1.2.3")
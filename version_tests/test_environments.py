@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version import environments
+from version.cli import main
+from version.version import VersionUtils
+from version_tests.dists import METADATA, write_dist
+
+
+class TestEnvironments(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write(self, relpath, content=""):
+        path = os.path.join(self.tmp, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(content)
+        return path
+
+    def install(self, site, name, version, kind="dist-info"):
+        site = os.path.join(self.tmp, site)
+        write_dist(site, name, version, kind, body="x" * 10000)
+
+    def make_venv(self, name, packages):
+        self.write(name + "/pyvenv.cfg", "home = /usr/bin\n")
+        site = name + "/lib/python3.11/site-packages"
+        for package, version, kind in packages:
+            self.install(site, package, version, kind)
+        return os.path.join(self.tmp, name)
+
+    def test_read_metadata_header(self):
+        path = self.write(
+            "METADATA",
+            METADATA.format(name="Foo-Bar", version="1.0", body="Version: 9\n" * 1000),
+        )
+        with mock.patch.object(environments, "_CHUNK_SIZE", 16):
+            self.assertEqual(
+                environments.read_metadata_header(path), ("Foo-Bar", "1.0")
+            )
+        path = self.write("PKG-INFO", "Name: foo\r\nSummary: no version\r\n")
+        self.assertEqual(environments.read_metadata_header(path), ("foo", None))
+
+    def test_scan_root(self):
+        venv = self.make_venv(
+            "venv",
+            [
+                ("requests", "2.22.0", "dist-info"),
+                ("six", "1.12.0", "egg-info"),
+                ("Old_Style", "0.1", "egg-info-file"),
+            ],
+        )
+        # a directory without METADATA falls back to its name
+        os.makedirs(
+            os.path.join(venv, "lib/python3.11/site-packages/broken-3.0.dist-info")
+        )
+        expected = {
+            "broken": "3.0",
+            "old-style": "0.1",
+            "requests": "2.22.0",
+            "six": "1.12.0",
+        }
+        self.assertEqual(environments.scan_root(venv), expected)
+        site = environments.find_site_dirs(venv)
+        self.assertEqual(site, [os.path.join(venv, "lib/python3.11/site-packages")])
+        self.assertEqual(environments.scan_root(site[0]), expected)
+
+    def test_image_layer(self):
+        self.install("layer/usr/lib/python3/dist-packages", "six", "1.11.0")
+        self.install("layer/usr/local/lib/python3.8/dist-packages", "six", "1.16.0")
+        layer = os.path.join(self.tmp, "layer")
+        self.assertEqual(environments.scan_root(layer), {"six": "1.11.0"})
+        self.assertEqual(environments.scan_root(os.path.join(self.tmp, "nowhere")), {})
+
+    def test_scan_environments(self):
+        roots = [
+            self.make_venv("env%d" % number, [("six", "1.%d" % number, "dist-info")])
+            for number in range(3)
+        ]
+        scanned = VersionUtils.get_versions_from_environments(
+            roots, ["six", "nope"], max_workers=2
+        )
+        self.assertEqual(list(scanned), roots)
+        self.assertEqual(scanned[roots[2]], {"six": "1.2", "nope": None})
+
+    def test_cli(self):
+        root = self.make_venv("venv", [("six", "1.12.0", "dist-info")])
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["scan", root, "-p", "six", "-p", "nope"])
+        self.assertEqual(
+            stdout.getvalue().splitlines(), [root + " nope -", root + " six 1.12.0"]
+        )
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["scan", root, "--format", "json"])
+        self.assertEqual(json.loads(stdout.getvalue()), {root: {"six": "1.12.0"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
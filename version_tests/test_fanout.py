@@ -0,0 +1,81 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from version.version import VersionUtils
+
+
+def slow(delay, result=None, error=None):
+    def source(package):
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return staticmethod(source)
+
+
+class TestFanout(unittest.TestCase):
+    def patch_sources(self, pip, pkg_resources, pypi):
+        patcher = mock.patch.multiple(
+            VersionUtils,
+            get_version_from_pip=pip,
+            get_version_from_pkg_resources=pkg_resources,
+            get_version_from_pypi=pypi,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_misses_cost_the_slowest_source(self):
+        self.patch_sources(slow(0.3), slow(0.3), slow(0.3, "2.0"))
+        start = time.perf_counter()
+        resolution = VersionUtils.resolve("foo", parallel=True)
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual(str(resolution.version), "2.0")
+        self.assertEqual(resolution.source, "pypi")
+        self.assertEqual(
+            [a.source for a in resolution.attempts], ["pip", "pkg_resources", "pypi"]
+        )
+
+    def test_higher_priority_answer_wins(self):
+        self.patch_sources(slow(0.2, "1.0"), slow(0, "1.1"), slow(0, "1.2"))
+        resolution = VersionUtils.resolve("foo", parallel=True)
+        self.assertEqual(str(resolution.version), "1.0")
+        self.assertEqual(resolution.source, "pip")
+        self.assertEqual([a.source for a in resolution.attempts], ["pip"])
+
+    def test_failing_source_is_a_miss(self):
+        self.patch_sources(slow(0, error=RuntimeError("boom")), slow(0, "1.1"), slow(0))
+        resolution = VersionUtils.resolve("foo", parallel=True)
+        self.assertEqual(resolution.source, "pkg_resources")
+        self.assertIsInstance(resolution.attempts[0].error, RuntimeError)
+
+    def test_source_timeout(self):
+        self.patch_sources(slow(2, "1.0"), slow(0), slow(0, "1.2"))
+        start = time.perf_counter()
+        resolution = VersionUtils.resolve("foo", source_timeouts={"pip": 0.1})
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(resolution.source, "pypi")
+        self.assertIsInstance(resolution.attempts[0].error, TimeoutError)
+
+    def test_deadline(self):
+        self.patch_sources(slow(0), slow(2, "1.1"), slow(2, "1.2"))
+        start = time.perf_counter()
+        resolution = VersionUtils.resolve("foo", deadline=0.2)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertFalse(resolution.found)
+        self.assertEqual(str(resolution.version), "0.0.1")
+        self.assertEqual(
+            [a.error is None for a in resolution.attempts], [True, False, False]
+        )
+
+    def test_environment(self):
+        self.patch_sources(slow(0), slow(2, "1.1"), slow(0, "1.2"))
+        env = {"PYVERSION_PARALLEL": "1", "PYVERSION_SOURCE_TIMEOUT": "0.1"}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(str(VersionUtils.get_version("foo")), "1.2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,322 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+
+from setuptools.dist import Distribution
+
+from version import git as git_module
+from version.git import GitRepository, describe_to_version, find_git_dir
+from version.planning import plan_releases
+from version.tag_command import read_tag_pairs, tag, tag_many
+from version.version import Version, VersionUtils
+from version_tests.git_repo import GIT_ENV, git, make_repo
+
+
+class TestGitRepository(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.git_dir = make_repo(self.path, commits=2)
+        self.head = git(self.path, "rev-parse", "HEAD")
+        self.first = git(self.path, "rev-parse", "HEAD~1")
+        git(self.path, "tag", "light", "HEAD~1")
+        git(self.path, "tag", "-m", "annotated", "v1.0")
+        git(self.path, "tag", "-m", "nested", "release/1.0", self.first)
+
+    def check_tags(self, repo):
+        self.assertEqual(repo.head(), self.head)
+        self.assertEqual(repo.tags(), {"light", "v1.0", "release/1.0"})
+        self.assertTrue(repo.has_tag("v1.0"))
+        self.assertFalse(repo.has_tag("v2.0"))
+        self.assertEqual(repo.resolve_tag("light"), self.first)
+        self.assertEqual(repo.resolve_tag("v1.0"), self.head)
+        self.assertEqual(repo.resolve_tag("release/1.0"), self.first)
+        self.assertIsNone(repo.resolve_tag("v2.0"))
+
+    def test_loose_refs(self):
+        self.check_tags(GitRepository(self.git_dir))
+
+    def test_packed_refs(self):
+        git(self.path, "pack-refs", "--all")
+        git(self.path, "gc", "-q")
+        self.check_tags(GitRepository(self.git_dir))
+
+    def test_object_reader(self):
+        with GitRepository(self.git_dir) as repo:
+            self.assertEqual(repo.objects.info("v1.0^{commit}"), (self.head, "commit"))
+            sha, kind, content = repo.objects.read("v1.0")
+            self.assertEqual(kind, "tag")
+            self.assertIn(b"annotated", content)
+            self.assertIsNone(repo.objects.info("no-such-ref"))
+            self.assertEqual(repo.peel(sha), self.head)
+            process = repo.objects._process
+        self.assertIsNotNone(process.returncode)
+
+    def test_reftable_scan_streams(self):
+        repo = GitRepository(self.git_dir)
+        self.assertEqual(repo._scan_tags_with_git()["light"], (self.first, self.first))
+
+    def test_find_git_dir(self):
+        sub = os.path.join(self.path, "a", "b")
+        os.makedirs(sub)
+        self.assertEqual(find_git_dir(sub), self.git_dir)
+        self.assertEqual(GitRepository.discover(sub).git_dir, self.git_dir)
+
+
+class TestPackedRefs(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.git_dir = make_repo(self.path, commits=2)
+        self.head = git(self.path, "rev-parse", "HEAD")
+        self.first = git(self.path, "rev-parse", "HEAD~1")
+        git(self.path, "tag", "-m", "annotated", "v1.0")
+        git(self.path, "tag", "v0.9", self.first)
+        git(self.path, "tag", "both", self.first)
+        git(self.path, "tag", "old-v1.0", self.first)
+        git(self.path, "pack-refs", "--all")
+        # a loose ref overrides the packed one of the same name
+        git(self.path, "tag", "-f", "both", self.head)
+        self.tag_object = git(self.path, "rev-parse", "v1.0")
+
+    def test_single_lookups(self):
+        repo = GitRepository(self.git_dir)
+        self.assertEqual(
+            repo.packed_ref("refs/tags/v1.0"), (self.tag_object, self.head)
+        )
+        self.assertEqual(repo.packed_ref("refs/tags/v0.9")[0], self.first)
+        self.assertEqual(repo.packed_ref("refs/tags/both")[0], self.first)
+        self.assertIsNone(repo.packed_ref("refs/tags/v1"))
+        self.assertEqual(repo.resolve_tag("v1.0"), self.head)
+        self.assertEqual(repo.resolve_tag("old-v1.0"), self.first)
+        self.assertEqual(repo.resolve_tag("both"), self.head)
+        self.assertTrue(repo.has_tag("both"))
+        self.assertFalse(repo.has_tag("1.0"))
+        # the single lookups agree with the full parse
+        self.assertEqual(
+            repo.packed_ref("refs/tags/v1.0"), repo.packed_refs()["refs/tags/v1.0"]
+        )
+        self.assertEqual(repo.tag_index()["both"], (self.head, None))
+
+    def test_peeled_lines_without_fully_peeled(self):
+        path = os.path.join(self.git_dir, "packed-refs")
+        with open(path) as fh:
+            lines = fh.read().splitlines()
+        with open(path, "w") as fh:
+            # an older git: no header, last line without a newline
+            fh.write("\n".join(lines[1:]))
+        repo = GitRepository(self.git_dir)
+        self.assertEqual(
+            repo.packed_ref("refs/tags/v1.0"), (self.tag_object, self.head)
+        )
+        self.assertEqual(repo.packed_ref("refs/tags/v0.9"), (self.first, None))
+        self.assertEqual(repo.resolve_tag("v0.9"), self.first)
+        self.assertEqual(repo.packed_refs()["refs/tags/v0.9"], (self.first, None))
+
+    def test_missing_packed_refs(self):
+        os.remove(os.path.join(self.git_dir, "packed-refs"))
+        repo = GitRepository(self.git_dir)
+        self.assertIsNone(repo.packed_ref("refs/tags/v1.0"))
+        self.assertEqual(repo.packed_refs(), {})
+        self.assertFalse(repo.has_tag("v1.0"))
+        self.assertTrue(repo.has_tag("both"))
+        self.assertIsNone(repo.resolve_tag("v0.9"))
+        self.assertEqual(repo.tags(), {"both"})
+
+
+class TestTagCommand(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        make_repo(self.path)
+        self.remote = os.path.join(self.path, "remote.git")
+        git(self.path, "init", "-q", "--bare", self.remote)
+        git(self.path, "remote", "add", "origin", self.remote)
+        cwd = os.getcwd()
+        os.chdir(self.path)
+        self.addCleanup(os.chdir, cwd)
+        patcher = mock.patch.dict(os.environ, GIT_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_tag(self, version):
+        command = tag(Distribution({"name": "foo", "version": version}))
+        command.ensure_finalized()
+        command.run()
+        return command
+
+    def test_tag_and_push(self):
+        with mock.patch(
+            "version.tag_command.plan_releases", wraps=plan_releases
+        ) as planned:
+            command = self.run_tag("1.0")
+        planned.assert_called_once()
+        self.assertEqual(command.get_tags(), ["1.0"])
+        self.assertEqual(git(self.remote, "tag"), "1.0")
+        # tagging the same commit again is a no-op
+        self.run_tag("1.0")
+        self.assertEqual(git(self.path, "tag"), "1.0")
+
+    def test_tag_many(self):
+        git(self.path, "commit", "-q", "--allow-empty", "-m", "second")
+        first = git(self.path, "rev-parse", "HEAD~1")
+        head = git(self.path, "rev-parse", "HEAD")
+        repo = GitRepository.discover(self.path)
+        pairs = [("a-1.0", first[:8]), ("b-2.0", "HEAD"), ("c-3.0", head)]
+        plan = tag_many(repo, pairs, dry_run=True)
+        self.assertEqual(
+            [tuple(action) for action in plan],
+            [
+                ("a-1.0", first, "create"),
+                ("b-2.0", head, "create"),
+                ("c-3.0", head, "create"),
+            ],
+        )
+        self.assertEqual(git(self.path, "tag"), "")
+
+        tag_many(repo, pairs)
+        self.assertEqual(
+            git(self.remote, "tag").splitlines(), ["a-1.0", "b-2.0", "c-3.0"]
+        )
+        self.assertEqual(git(self.path, "rev-parse", "a-1.0^{commit}"), first)
+        self.assertEqual(git(self.path, "cat-file", "-t", "b-2.0"), "tag")
+        self.assertEqual(
+            git(self.path, "for-each-ref", "--format=%(contents)", "refs/tags/c-3.0"),
+            '""',
+        )
+        self.assertTrue(repo.has_tag("c-3.0"))
+        # existing tags are skipped, conflicting ones stop everything
+        self.assertEqual(repo.plan_tags([("a-1.0", first)])[0].action, "exists")
+        with self.assertRaises(Exception):
+            repo.create_tags([("d-4.0", head), ("a-1.0", head)])
+        self.assertFalse(repo.has_tag("d-4.0"))
+
+    def test_plan_is_not_read_again(self):
+        repo = GitRepository.discover(self.path)
+        plan = repo.plan_tags([("a-1.0", "HEAD"), ("b-1.0", "HEAD")])
+        with mock.patch.object(repo, "_plan_tags", side_effect=AssertionError):
+            self.assertEqual(tag_many(repo, plan), plan)
+        self.assertEqual(git(self.remote, "tag").splitlines(), ["a-1.0", "b-1.0"])
+
+    def test_push_atomic_only_for_batches(self):
+        repo = GitRepository.discover(self.path)
+        calls = []
+
+        def run_git(cmd, **kwargs):
+            calls.append(cmd)
+            if "--atomic" in cmd:
+                raise Exception("the receiving end does not support --atomic push")
+
+        with mock.patch.object(repo, "git", side_effect=run_git):
+            repo.push_tags("origin", ["a-1.0"])
+            with self.assertRaisesRegex(Exception, "nothing was pushed"):
+                repo.push_tags("origin", ["a-1.0", "b-1.0"])
+            with mock.patch.object(git_module, "logger") as logger:
+                repo.push_tags("origin", ["a-1.0", "b-1.0"], allow_non_atomic=True)
+        logger.warning.assert_called_once()
+        self.assertEqual(
+            calls,
+            [
+                ["push", "origin", "refs/tags/a-1.0"],
+                ["push", "--atomic", "origin", "refs/tags/a-1.0", "refs/tags/b-1.0"],
+                ["push", "--atomic", "origin", "refs/tags/a-1.0", "refs/tags/b-1.0"],
+                ["push", "origin", "refs/tags/a-1.0", "refs/tags/b-1.0"],
+            ],
+        )
+
+    def test_tags_file(self):
+        path = os.path.join(self.path, "tags.txt")
+        with open(path, "w") as fh:
+            fh.write("# release train\nx-1.0\ny-1.0 HEAD\n")
+        self.assertEqual(read_tag_pairs(path), [("x-1.0", "HEAD"), ("y-1.0", "HEAD")])
+        command = tag(Distribution({"name": "foo", "version": "1.0"}))
+        command.tags_file = path
+        command.ensure_finalized()
+        command.run()
+        self.assertEqual(git(self.remote, "tag").splitlines(), ["x-1.0", "y-1.0"])
+
+
+class TestDescribe(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        make_repo(self.path)
+        git(self.path, "tag", "-m", "release", "v1.2.3")
+        git(self.path, "tag", "not-a-version")
+        self.repo = GitRepository.discover(self.path)
+
+    def test_describe_to_version(self):
+        self.assertEqual(describe_to_version("1.2"), "1.2")
+        self.assertEqual(describe_to_version("v1.2", 3, "abc"), "1.2.1.dev3+gabc")
+        self.assertEqual(describe_to_version("1!2.0rc1", 1), "1!2.0rc2.dev1")
+        self.assertEqual(
+            describe_to_version("1.2.3", 0, "abc", True), "1.2.4.dev0+gabc.dirty"
+        )
+        self.assertIsNone(describe_to_version("release-one"))
+
+    def test_describe_version(self):
+        self.assertEqual(self.repo.describe_version(), "1.2.3")
+        git(self.path, "commit", "-q", "--allow-empty", "-m", "next")
+        sha = git(self.path, "rev-parse", "--short=7", "HEAD")
+        self.assertEqual(self.repo.describe_version(), "1.2.4.dev1+g" + sha)
+        with open(os.path.join(self.path, "file"), "w") as fh:
+            fh.write("change")
+        git(self.path, "add", "file")
+        self.assertEqual(self.repo.describe_version(), "1.2.4.dev1+g%s.dirty" % sha)
+
+    def test_git_source(self):
+        cwd = os.getcwd()
+        os.chdir(self.path)
+        self.addCleanup(os.chdir, cwd)
+        with open(os.path.join(self.path, "setup.cfg"), "w") as fh:
+            fh.write("[metadata]\nname = foo\n")
+        git(self.path, "tag", "my_tool-2.0")
+        self.assertEqual(str(VersionUtils.get_version("foo", sources=["git"])), "1.2.3")
+        self.assertEqual(VersionUtils.get_version_from_git("My-Tool"), "2.0")
+        self.assertIsNone(VersionUtils.get_version_from_git("pytest"))
+        with mock.patch.dict(os.environ, {"PYVERSION_SOURCES": "git,pip"}):
+            # unrelated packages fall through to the installed version
+            self.assertEqual(str(Version("pytest")), pytest.__version__)
+            self.assertEqual(VersionUtils.get_sources(), ["git", "pip"])
+        with self.assertRaises(ValueError):
+            VersionUtils.get_sources("pip,nowhere")
+
+    def test_git_source_describes_once_per_head(self):
+        git(self.path, "tag", "bar-0.1")
+        with mock.patch.object(
+            GitRepository, "describe", autospec=True, side_effect=GitRepository.describe
+        ) as describe:
+            cwd = os.getcwd()
+            os.chdir(self.path)
+            self.addCleanup(os.chdir, cwd)
+            versions = VersionUtils.get_versions(["bar", "baz", "Bar"], ["git"])
+            self.assertEqual(VersionUtils.get_version_from_git("bar"), "0.1")
+        self.assertEqual(
+            {name: str(version) for name, version in versions.items()},
+            {"bar": "0.1", "baz": "0.0.1", "Bar": "0.1"},
+        )
+        self.assertEqual(describe.call_count, 1)
+        # a new tag on the same commit
+        git(self.path, "tag", "-m", "release", "bar-0.2")
+        self.assertEqual(VersionUtils.get_version_from_git("bar"), "0.2")
+        git(self.path, "commit", "-q", "--allow-empty", "-m", "next")
+        self.assertTrue(
+            VersionUtils.get_version_from_git("bar").startswith("0.2.1.dev1")
+        )
+
+    def test_describe_cache_is_bounded(self):
+        with mock.patch.object(git_module, "DESCRIBE_CACHE_SIZE", 2):
+            for pattern in ("[0-9]*", "v[0-9]*", "x[0-9]*"):
+                self.repo.describe_cached((pattern,))
+            keys = [
+                key for key in git_module._described if key[0] == self.repo.common_dir
+            ]
+            self.assertEqual([key[-1] for key in keys], [("v[0-9]*",), ("x[0-9]*",)])
+        self.repo.invalidate()
+        self.assertFalse(
+            [key for key in git_module._described if key[0] == self.repo.common_dir]
+        )
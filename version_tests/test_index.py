@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from version.cache import NotModified
+from version.index import (
+    JsonIndexClient,
+    SimpleIndexClient,
+    get_index_client,
+    parse_filename,
+    select_latest,
+)
+from version.version import VersionUtils
+from version_tests.index_server import StandInIndex
+
+PROJECTS = {
+    "foo": ["0.9", "1.10", "1.2", "2.0b1"],
+    "bar-baz": ["1.0", "1.1"],
+}
+
+
+class TestHelpers(unittest.TestCase):
+    def test_select_latest(self):
+        self.assertEqual(select_latest(["1.2", "1.10", "0.9"]), "1.10")
+        self.assertEqual(select_latest(["1.0", "2.0rc1"]), "1.0")
+        self.assertEqual(select_latest(["1.0", "2.0rc1"], prereleases=True), "2.0rc1")
+        self.assertEqual(select_latest(["1.0a1", "1.0a2"]), "1.0a2")
+        self.assertIsNone(select_latest([]))
+
+    def test_parse_filename(self):
+        self.assertEqual(
+            parse_filename("foo_bar-1.0-py3-none-any.whl"), ("foo_bar", "1.0")
+        )
+        self.assertEqual(
+            parse_filename("foo-bar-1.0.post1.tar.gz", "foo-bar"),
+            ("foo-bar", "1.0.post1"),
+        )
+        self.assertEqual(parse_filename("foo-bar-2-1.0.zip"), ("foo-bar", "2-1.0"))
+        self.assertEqual(
+            parse_filename("foo-bar-2-1.0.zip", "foo-bar-2"), ("foo-bar-2", "1.0")
+        )
+        self.assertIsNone(parse_filename("README.rst"))
+
+
+class TestIndexClients(unittest.TestCase):
+    def check_client(self, cls):
+        with StandInIndex(PROJECTS, yanked=[("bar-baz", "1.1")]) as index:
+            client = cls(index.url)
+            versions, etag = client.fetch_releases("foo")
+            self.assertEqual(versions, ["2.0b1", "1.10", "1.2", "0.9"])
+            self.assertEqual(client.select_latest(versions), "1.10")
+            with self.assertRaises(NotModified):
+                client.fetch_releases("foo", etag)
+            self.assertEqual(client.fetch_releases("Bar_Baz")[0], ["1.0"])
+            self.assertEqual(client.fetch_releases("missing"), (None, None))
+            client.close()
+        return index
+
+    def test_json_client(self):
+        index = self.check_client(JsonIndexClient)
+        self.assertEqual(index.requests[0], "/pypi/foo/json")
+
+    def test_simple_client(self):
+        index = self.check_client(SimpleIndexClient)
+        self.assertEqual(index.requests[0], "/simple/foo/")
+
+    def test_connections_are_reused(self):
+        with StandInIndex(PROJECTS) as index:
+            client = JsonIndexClient(index.url, max_workers=2)
+            for _ in range(5):
+                client.fetch_releases("foo")
+            client.close()
+        self.assertEqual(len(index.requests), 5)
+        self.assertEqual(index.connections, 1)
+
+    def test_fetch_many(self):
+        with StandInIndex(PROJECTS) as index:
+            client = JsonIndexClient(index.url)
+            results = client.fetch_many(["foo", "bar-baz", "missing", "foo"])
+            client.close()
+        self.assertEqual(list(results), ["foo", "bar-baz", "missing"])
+        self.assertEqual(results["bar-baz"], (["1.1", "1.0"], mock.ANY))
+        self.assertEqual(results["missing"], (None, None))
+
+    def test_get_index_client(self):
+        with mock.patch.dict(os.environ, {"PYVERSION_INDEX_API": "simple"}):
+            client = get_index_client("http://mirror.invalid")
+        self.assertIsInstance(client, SimpleIndexClient)
+        self.assertIs(client, get_index_client("http://mirror.invalid", "simple"))
+        with self.assertRaises(ValueError):
+            get_index_client(api="xmlrpc")
+
+
+class TestVersionsFromIndex(unittest.TestCase):
+    def test_get_versions_from_pypi(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        with StandInIndex(PROJECTS) as index:
+            env = {"PYVERSION_INDEX_URL": index.url, "PYVERSION_CACHE_DIR": cache_dir}
+            with mock.patch.dict(os.environ, env):
+                versions = VersionUtils.get_versions_from_pypi(
+                    ["foo", "bar-baz", "nope"]
+                )
+                self.assertEqual(
+                    versions, {"foo": "1.10", "bar-baz": "1.1", "nope": None}
+                )
+                get_index_client().close()
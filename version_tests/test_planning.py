@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from setuptools import Distribution
+
+from version import version as version_module
+from version.bump import RELEASE_TYPES
+from version.git import GitRepository
+from version.increment_command import increment
+from version.planning import plan_releases
+from version.version import VersionUtils, parse_version
+
+from .git_repo import git, make_repo
+
+VERSIONS = {"alpha": "1.0", "beta": "2.1.3", "gamma": "0.4rc1"}
+
+
+class TestPlanReleases(unittest.TestCase):
+    def setUp(self):
+        self.resolved = []
+
+        def get_versions(packages, sources=None):
+            self.resolved.extend(packages)
+            return {name: parse_version(VERSIONS[name]) for name in packages}
+
+        patcher = mock.patch.object(
+            VersionUtils, "get_versions", staticmethod(get_versions)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plan(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        make_repo(path)
+        git(path, "tag", "beta-2.2.0")
+        plan = plan_releases(
+            {"alpha": "major", "beta": "minor", "gamma": "pre"},
+            repo=GitRepository.discover(path),
+            tag_format="{name}-{version}",
+        )
+        self.assertEqual(
+            [tuple(release) for release in plan],
+            [
+                ("alpha", "major", "1.0", "2.0", "alpha-2.0", False),
+                ("beta", "minor", "2.1.3", "2.2.0", "beta-2.2.0", True),
+                ("gamma", "pre", "0.4rc1", "0.4rc2", "gamma-0.4rc2", False),
+            ],
+        )
+        self.assertEqual(plan[0].as_dict()["next_version"], "2.0")
+
+    def test_current_and_release_versions(self):
+        plan = plan_releases(
+            [
+                ("alpha", "micro"),
+                ("beta", "micro"),
+                ("alpha", "minor"),
+                ("gamma", None),
+            ],
+            current={"alpha": "3.0"},
+            release_versions={"beta": "9.9", "gamma": "0.4"},
+        )
+        self.assertEqual(
+            [(r.version, r.next_version, r.tag) for r in plan],
+            [
+                ("3.0", "3.0.1", "3.0.1"),
+                ("2.1.3", "9.9", "9.9"),
+                ("3.0", "3.1", "3.1"),
+                ("0.4rc1", "0.4", "0.4"),
+            ],
+        )
+        self.assertEqual(self.resolved, ["beta", "gamma"])
+
+    def test_thread_safe(self):
+        def run(release_type):
+            plan = plan_releases({name: release_type for name in VERSIONS})
+            return [release.next_version for release in plan]
+
+        # "pre" cannot increment alpha's 1.0
+        release_types = [t for t in RELEASE_TYPES if t != "pre"]
+        expected = {release_type: run(release_type) for release_type in release_types}
+        with mock.patch.dict(os.environ, {"RELEASE_TYPE": "major"}):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                types = release_types * 20
+                results = list(executor.map(run, types))
+            self.assertEqual(os.environ["RELEASE_TYPE"], "major")
+        self.assertEqual(results, [expected[release_type] for release_type in types])
+
+    def test_increment_command(self):
+        command = increment(Distribution({"name": "alpha", "version": "1.0"}))
+        command.release_type = "minor"
+        built = {"alpha": parse_version("1.0")}
+        with mock.patch.dict(os.environ), mock.patch.dict(
+            version_module._build_versions, built, clear=True
+        ):
+            os.environ.pop("RELEASE_TYPE", None)
+            self.assertEqual(command.tagged_version(), "1.1")
+            self.assertNotIn("RELEASE_TYPE", os.environ)
+            # unknown release types leave the version alone, as they always did
+            command.release_version = None
+            command.release_type = "nope"
+            self.assertEqual(command.tagged_version(), "1.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
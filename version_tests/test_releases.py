@@ -0,0 +1,162 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+from version import releases
+from version.git import GitRepository
+from version.cache import get_release_cache
+from version.index import get_index_client
+from version_tests.index_server import StandInIndex
+
+from .git_repo import git, make_repo
+
+HISTORY = [
+    "0.9",
+    "1.0rc1",
+    "1.0",
+    "1.0+local",
+    "1.0.post1",
+    "1.0.post2.dev0",
+    "1.1",
+    "1.4.5",
+    "1.4.9",
+    "1.5",
+    "2.0a1",
+    "2.0",
+    "2.1",
+    "2.2b1",
+    "3.0.dev1",
+    "1!0.1",
+]
+
+
+class TestReleaseIndex(unittest.TestCase):
+    def setUp(self):
+        shuffled = HISTORY + ["not a version"]
+        random.Random(4).shuffle(shuffled)
+        self.index = releases.ReleaseIndex(shuffled + ["1.0.0"])
+
+    def strings(self, versions):
+        return [str(version) for version in versions]
+
+    def test_sorted_and_deduplicated(self):
+        self.assertEqual(self.strings(self.index), HISTORY)
+        self.assertEqual(len(self.index), len(HISTORY))
+        self.assertIn("1.0.0", self.index)
+        self.assertNotIn("1.2", self.index)
+        self.assertNotIn("garbage", self.index)
+
+    def test_latest(self):
+        self.assertEqual(str(self.index.latest()), "1!0.1")
+        self.assertEqual(str(self.index.latest("==2.*")), "2.1")
+        self.assertEqual(str(self.index.latest("<3", prereleases=True)), "2.2b1")
+        self.assertEqual(str(self.index.latest(">2.1,<4")), "3.0.dev1")
+        self.assertIsNone(self.index.latest("==4.*"))
+
+    def test_range(self):
+        self.assertEqual(
+            self.strings(self.index.range("1.4", "2.0")),
+            ["1.4.5", "1.4.9", "1.5", "2.0a1"],
+        )
+        self.assertEqual(
+            self.strings(self.index.range("1.5", "2.0a1", False, True)), ["2.0a1"]
+        )
+        after = [v for v in self.index.range("1.5", include_lower=False)]
+        self.assertEqual(
+            self.strings(v for v in after if v.is_prerelease),
+            ["2.0a1", "2.2b1", "3.0.dev1"],
+        )
+
+    def test_filter_matches_packaging(self):
+        specifiers = [
+            ">=1.0,<2",
+            "~=1.4.5",
+            "~=1.4",
+            "==1.0",
+            "==1.*",
+            "!=1.0,<=1.0.post1",
+            ">1.0",
+            "<=2.0",
+            "===1.5",
+            ">=2.0a1",
+        ]
+        for spec in specifiers:
+            for prereleases in (None, True, False):
+                expected = SpecifierSet(spec).filter(HISTORY, prereleases)
+                found = self.index.filter(spec, prereleases)
+                self.assertEqual(
+                    self.strings(found),
+                    sorted(expected, key=Version),
+                    "%s, prereleases=%s" % (spec, prereleases),
+                )
+
+    def test_next_post(self):
+        self.assertEqual(str(self.index.next_post("1.0")), "1.0.post3")
+        self.assertEqual(str(self.index.next_post("1.0.post1")), "1.0.post3")
+        self.assertEqual(str(self.index.next_post("2.1")), "2.1.post1")
+        self.assertEqual(str(self.index.next_post("1.0rc1.dev2")), "1.0rc1.post1")
+
+
+class TestGetReleaseIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_versions_from_tags(self):
+        make_repo(self.tmp)
+        with open(os.path.join(self.tmp, "setup.cfg"), "w") as fh:
+            fh.write("[metadata]\nname = foo-bar\n")
+        for tag in ("1.0", "v1.1", "foo-1.2", "Foo_Bar/v1.3", "bar-2.0", "latest"):
+            git(self.tmp, "tag", tag)
+        repo = GitRepository.discover(self.tmp)
+        self.assertEqual(
+            sorted(releases.versions_from_tags("foo-bar", repo)),
+            ["1.0", "v1.1", "v1.3"],
+        )
+        # plain version tags belong to the checkout's project only
+        self.assertEqual(releases.versions_from_tags("bar", repo), ["2.0"])
+        self.assertEqual(releases.versions_from_tags("requests", repo), [])
+
+    def test_kept_until_stale(self):
+        make_repo(self.tmp)
+        git(self.tmp, "tag", "foo-1.0")
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+        with mock.patch.object(
+            releases, "_collect", side_effect=releases._collect
+        ) as collect:
+            first = releases.get_release_index("foo", "git")
+            self.assertIs(releases.get_release_index("foo", "git"), first)
+            self.assertEqual(collect.call_count, 1)
+            git(self.tmp, "tag", "foo-1.1")
+            second = releases.get_release_index("foo", "git")
+        self.assertEqual(collect.call_count, 2)
+        self.assertEqual(str(second.latest()), "1.1")
+
+    def test_from_index_and_cache(self):
+        projects = {"foo": ["0.9", "1.10", "1.2", "2.0b1"]}
+        with StandInIndex(projects) as index:
+            env = {"PYVERSION_INDEX_URL": index.url, "PYVERSION_CACHE_DIR": self.tmp}
+            with mock.patch.dict(os.environ, env):
+                first = releases.get_release_index("foo", "pypi")
+                self.assertEqual(str(first.latest("<2")), "1.10")
+                self.assertIs(releases.get_release_index("foo", "pypi"), first)
+                with mock.patch.object(get_release_cache(), "ttl", 0):
+                    self.assertIsNot(releases.get_release_index("foo", "pypi"), first)
+                get_index_client().close()
+            with mock.patch.dict(os.environ, dict(env, PYVERSION_OFFLINE="1")):
+                cached = releases.get_release_index("foo", "pip,pypi")
+        # fetched once, revalidated once the TTL passed, nothing offline
+        self.assertEqual(len(index.requests), 2)
+        self.assertEqual(str(cached.latest(prereleases=True)), "2.0b1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version import server
+from version.cli import main
+from version.version import VersionUtils, parse_version
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, "pyversion.sock")
+        patcher = mock.patch.dict(os.environ, {"PYVERSION_SOCKET": self.path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+        def get_versions(packages, sources=None):
+            self.calls.append(list(packages))
+            return {name: parse_version("1.2") for name in packages}
+
+        patcher = mock.patch.object(
+            VersionUtils, "get_versions", staticmethod(get_versions)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_server(self):
+        instance = server.VersionServer()
+        thread = threading.Thread(target=instance.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(instance.shutdown)
+        return instance
+
+    def test_protocol(self):
+        self.start_server()
+        with server.connect() as client:
+            self.assertEqual(client.call("ping")["pid"], os.getpid())
+            self.assertEqual(
+                client.call("increment", versions=["1.0", "2.0"]), ["1.0.1", "2.0.1"]
+            )
+            with self.assertRaises(server.ServerError):
+                client.call("nope")
+            # the connection stays usable after an error
+            self.assertEqual(client.call("increment", versions=["1.0"]), ["1.0.1"])
+
+    def test_query_versions(self):
+        self.start_server()
+        self.assertEqual(
+            server.query_versions(
+                ["foo"], ["pip"], increment=True, release_type="minor"
+            ),
+            {"foo": ("1.2", "1.3")},
+        )
+        # the git source depends on the working directory of the client
+        self.assertIsNone(server.query_versions(["foo"], ["git"]))
+        with mock.patch.dict(os.environ, {"PYVERSION_OFFLINE": "1"}):
+            self.assertIsNone(server.query_versions(["foo"], ["pip"]))
+
+    def test_no_server(self):
+        self.assertIsNone(server.connect())
+        self.assertIsNone(server.query_versions(["foo"], ["pip"]))
+
+    def test_stale_socket_is_replaced(self):
+        open(self.path, "w").close()
+        self.assertIsNone(server.connect())
+        self.start_server()
+        with self.assertRaises(server.ServerError):
+            server.VersionServer()
+
+    def test_cli_uses_server(self):
+        self.start_server()
+        with mock.patch("version.cli.resolve_rows", side_effect=AssertionError):
+            with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+                main(["foo", "bar", "--increment"])
+        self.assertEqual(stdout.getvalue(), "foo 1.2 1.2.1\nbar 1.2 1.2.1\n")
+        with mock.patch.dict(os.environ, {"RELEASE_VERSION": "9.0"}):
+            with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+                main(["foo", "increment"])
+        self.assertEqual(stdout.getvalue(), "9.0\n")
+
+    def test_cli_falls_back(self):
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["foo"])
+        self.assertEqual(stdout.getvalue(), "1.2\n")
+        self.assertEqual(self.calls, [["foo"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
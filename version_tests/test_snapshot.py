@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version import environments, snapshot
+from version.cli import main
+from version.environments import read_distribution
+from version_tests.dists import dist_path, write_dist
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.root = os.path.join(self.tmp, "venv")
+        self.site = os.path.join(self.root, "lib", "python3.11", "site-packages")
+        os.makedirs(self.site)
+        for name, version in (("requests", "2.22.0"), ("six", "1.12.0")):
+            self.install(name, version)
+        self.reads = []
+
+        def counting(path):
+            self.reads.append(os.path.basename(path))
+            return read_distribution(path)
+
+        patcher = mock.patch.object(environments, "read_distribution", counting)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def install(self, name, version):
+        write_dist(self.site, name, version)
+        self.touch()
+
+    def uninstall(self, name, version):
+        shutil.rmtree(dist_path(self.site, name, version))
+        self.touch()
+
+    def touch(self):
+        # directory mtimes may not tick between quick changes
+        stat = os.stat(self.site)
+        os.utime(self.site, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    def test_incremental_refresh(self):
+        first = snapshot.take_snapshot([self.root])
+        self.assertEqual(
+            first.versions(), {self.root: {"requests": "2.22.0", "six": "1.12.0"}}
+        )
+        self.assertEqual(len(self.reads), 2)
+        self.reads = []
+        unchanged = first.refresh()
+        self.assertEqual(self.reads, [])
+        self.assertEqual(first.diff(unchanged), [])
+
+        self.install("six", "1.16.0")
+        self.install("idna", "2.8")
+        self.uninstall("six", "1.12.0")
+        self.uninstall("requests", "2.22.0")
+        second = snapshot.take_snapshot(previous=first)
+        self.assertEqual(
+            sorted(self.reads), ["idna-2.8.dist-info", "six-1.16.0.dist-info"]
+        )
+        changes = first.diff(second)
+        self.assertEqual(
+            [(c.kind, c.name, c.old, c.new) for c in changes],
+            [
+                ("added", "idna", None, "2.8"),
+                ("removed", "requests", "2.22.0", None),
+                ("upgraded", "six", "1.12.0", "1.16.0"),
+            ],
+        )
+        self.assertEqual(
+            second.diff(first)[2].as_dict(),
+            {
+                "root": self.root,
+                "name": "six",
+                "old": "1.16.0",
+                "new": "1.12.0",
+                "kind": "downgraded",
+            },
+        )
+
+    def test_diff_compares_changed_entries_only(self):
+        first = snapshot.take_snapshot([self.root])
+        self.install("idna", "2.8")
+        self.uninstall("six", "1.12.0")
+        self.install("six", "1.16.0")
+        second = first.refresh()
+        sites = first.environments[self.root], second.environments[self.root]
+        self.assertEqual(snapshot._changed_names(*sites), {"idna", "six"})
+        self.assertEqual(
+            [(c.kind, c.name) for c in first.diff(second)],
+            [("added", "idna"), ("upgraded", "six")],
+        )
+
+    def test_change_kinds(self):
+        kinds = [
+            snapshot.Change(self.root, "six", old, new).kind
+            for old, new in [
+                ("1.0", "1.0.0"),
+                ("1.0.0", "1.0"),
+                ("1.0", "1.0.1"),
+                ("1.0.1", "1.0"),
+                ("1.0", "not a version"),
+            ]
+        ]
+        self.assertEqual(
+            kinds, ["changed", "changed", "upgraded", "downgraded", "changed"]
+        )
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmp, "snapshot.json")
+        taken = snapshot.take_snapshot([self.root])
+        taken.save(path)
+        loaded = snapshot.Snapshot.load(path)
+        self.assertEqual(loaded.versions(), taken.versions())
+        self.reads = []
+        self.assertEqual(loaded.diff(loaded.refresh()), [])
+        self.assertEqual(self.reads, [])
+        with open(path, "w") as fh:
+            json.dump({"format": 99}, fh)
+        with self.assertRaises(ValueError):
+            snapshot.Snapshot.load(path)
+
+    def test_cli(self):
+        path = os.path.join(self.tmp, "snapshot.json")
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["snapshot", self.root, "-o", path])
+        self.assertEqual(
+            stdout.getvalue(), "%s: 1 environment(s), 2 distribution(s)\n" % path
+        )
+        old = os.path.join(self.tmp, "old.json")
+        shutil.copy(path, old)
+        self.install("idna", "2.8")
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["diff", old])
+        self.assertEqual(stdout.getvalue(), "added %s idna - 2.8\n" % self.root)
+        with mock.patch("sys.stdout", new_callable=StringIO):
+            main(["snapshot", "-o", path])
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["diff", old, path, "--format", "json"])
+        self.assertEqual(json.loads(stdout.getvalue())[0]["name"], "idna")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import ast
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from version import static
+from version.version import VersionUtils
+
+
+class TestStaticVersion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        sys.path.insert(0, self.tmp)
+        self.addCleanup(sys.path.remove, self.tmp)
+        static.cache_clear()
+
+    def write(self, relpath, content):
+        path = os.path.join(self.tmp, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(content)
+        return path
+
+    def test_plain_assignment(self):
+        self.write(
+            "plainmod.py", "import os\n__version__ = '1.2.3'\nraise SystemExit\n"
+        )
+        self.assertEqual(static.get_module_version("plainmod"), "1.2.3")
+        self.assertNotIn("plainmod", sys.modules)
+
+    def test_ast_forms(self):
+        self.write("annotated.py", "__version__: str = '2.0'\n")
+        self.write("indirect.py", "VERSION = '3.0'\n__version__ = VERSION\n")
+        self.assertEqual(static.get_module_version("annotated"), "2.0")
+        self.assertEqual(static.get_module_version("indirect"), "3.0")
+
+    def test_string_literals(self):
+        # ast.Str before Python 3.8, ast.Constant after
+        for source, expected in (
+            ("'1.0'", "1.0"),
+            ("'1' '.0'", "1.0"),
+            ("1.0", None),
+            ("VERSION", None),
+        ):
+            node = ast.parse(source, mode="eval").body
+            self.assertEqual(static._constant(node), expected, source)
+
+    def test_relative_import(self):
+        self.write("relpkg/__init__.py", "from ._version import __version__\n")
+        self.write("relpkg/_version.py", "__version__ = '4.1'\n")
+        self.write("relpkg/sub/__init__.py", "from .. import __version__\n")
+        self.assertEqual(static.get_module_version("relpkg"), "4.1")
+        self.assertEqual(static.get_module_version("relpkg.sub"), "4.1")
+        self.assertNotIn("relpkg", sys.modules)
+
+    def test_dash_and_missing(self):
+        self.write("dash_mod.py", "__version__ = '0.9'\n")
+        self.assertEqual(static.get_module_version("dash-mod"), "0.9")
+        self.assertIsNone(static.get_module_version("not_a_module_here"))
+        self.assertIsNone(static.get_module_version("not valid"))
+        self.write("noversion.py", "x = 1\n")
+        self.assertIsNone(static.get_module_version("noversion"))
+
+    def test_cache_follows_mtime(self):
+        path = self.write("cachedmod.py", "__version__ = '1.0'\n")
+        self.assertEqual(static.read_version(path), "1.0")
+        with open(path, "w") as fh:
+            fh.write("__version__ = '1.10'\n")
+        self.assertEqual(static.read_version(path), "1.10")
+
+    def test_pip_source_falls_back_to_source(self):
+        self.write("nometadata.py", "__version__ = '5.5'\n")
+        self.assertEqual(VersionUtils.get_version_from_pip("nometadata"), "5.5")
+        self.assertEqual(
+            VersionUtils.get_versions_from_pip(["nometadata"]), {"nometadata": "5.5"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import sys
+import unittest
+from contextlib import contextmanager
+from io import StringIO
+from unittest import mock
+
+from version import tracing
+from version.cli import main
+from version.version import VersionUtils
+
+
+class FakeSpan(object):
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = FakeSpan(name, attributes or {})
+        self.spans.append(span)
+        yield span
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            VersionUtils,
+            get_version_from_pip=staticmethod(lambda package: None),
+            get_version_from_pkg_resources=staticmethod(lambda package: "1.2"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolution_records_sources(self):
+        resolution = VersionUtils.resolve("foo")
+        self.assertEqual(str(resolution.version), "1.2")
+        self.assertEqual(resolution.source, "pkg_resources")
+        self.assertEqual(
+            [a.source for a in resolution.attempts], ["pip", "pkg_resources"]
+        )
+        self.assertTrue(all(a.elapsed >= 0 for a in resolution.attempts))
+        self.assertIn("foo 1.2 from pkg_resources", resolution.format())
+        self.assertEqual(resolution.as_dict()["attempts"][1]["version"], "1.2")
+
+    def test_failing_source_is_a_miss_in_every_mode(self):
+        from version.aio import aget_version
+        from version_tests.test_aio import run
+
+        def broken(package):
+            raise RuntimeError("boom")
+
+        modes = {
+            "sequential": lambda: VersionUtils.get_version("foo"),
+            "parallel": lambda: VersionUtils.get_version("foo", parallel=True),
+            "bulk": lambda: VersionUtils.get_versions(["foo"], "pkg_resources,pip")[
+                "foo"
+            ],
+            "bulk, single lookups": lambda: VersionUtils.get_versions(
+                ["foo"], "pkg_resources"
+            )["foo"],
+            "asyncio": lambda: run(aget_version("foo")),
+        }
+        with mock.patch.multiple(
+            VersionUtils,
+            get_version_from_pip=staticmethod(broken),
+            get_versions_from_pip=staticmethod(broken),
+        ):
+            for mode, resolve in modes.items():
+                with self.subTest(mode):
+                    self.assertEqual(str(resolve()), "1.2")
+            resolution = VersionUtils.resolve("foo")
+        self.assertIsInstance(resolution.attempts[0].error, RuntimeError)
+        self.assertEqual(resolution.source, "pkg_resources")
+
+    def test_bad_index_api_is_a_miss(self):
+        with mock.patch.dict("os.environ", {"PYVERSION_INDEX_API": "nope"}):
+            self.assertIsNone(VersionUtils.get_version_from_pypi("foo"))
+
+    def test_hooks(self):
+        seen = []
+        tracing.add_hook(seen.append)
+        self.addCleanup(tracing.remove_hook, seen.append)
+        VersionUtils.get_version("foo")
+        self.assertEqual([r.package for r in seen], ["foo"])
+
+    def test_spans(self):
+        tracer = FakeTracer()
+        tracing.set_tracer(tracer)
+        self.addCleanup(tracing.set_tracer, None)
+        VersionUtils.get_version("foo")
+        self.assertEqual(
+            [span.name for span in tracer.spans],
+            ["pyversion.resolve", "pyversion.source", "pyversion.source"],
+        )
+        self.assertEqual(
+            tracer.spans[0].attributes["pyversion.source"], "pkg_resources"
+        )
+        self.assertEqual(tracer.spans[2].attributes["pyversion.version"], "1.2")
+
+    def test_cache_status(self):
+        with mock.patch.object(
+            VersionUtils,
+            "get_version_from_pip",
+            staticmethod(lambda package: tracing.record_cache("hit")),
+        ):
+            resolution = VersionUtils.resolve("foo")
+        self.assertEqual(resolution.attempts[0].cache, "hit")
+        self.assertIsNone(resolution.attempts[1].cache)
+
+    def test_cli_profile(self):
+        out, err = StringIO(), StringIO()
+        with mock.patch.object(sys, "stdout", out), mock.patch.object(
+            sys, "stderr", err
+        ):
+            main(["foo", "--profile"])
+        self.assertEqual(out.getvalue(), "1.2\n")
+        self.assertTrue(err.getvalue().startswith("foo 1.2 from pkg_resources in "))
+        self.assertIn("  pip ", err.getvalue())
@@ -1,11 +1,17 @@
+import json
 import os
+import subprocess
+import tempfile
 import unittest as unittest
 import sys
 from contextlib import contextmanager
 from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
+from version import version as version_module
 from version.version import Version, VersionUtils, parse_version
-from version.cli import main
+from version.cli import main, read_requirement_names
 
 
 class TestSemanticVersion(unittest.TestCase):
@@ -157,3 +163,111 @@ class TestSemanticVersion(unittest.TestCase):
             output.split("\n")[0],
             f"get_version_from_pkg_resources: The '{test_package}' distribution was not found and is required by the application",
         )
+
+    def test_get_versions(self):
+        versions = VersionUtils.get_versions(["pytest", "PyTest", "pytest"])
+        self.assertEqual(list(versions), ["pytest", "PyTest"])
+        self.assertEqual(versions["pytest"], versions["PyTest"])
+        self.assertEqual(versions["pytest"], Version("pytest"))
+
+    def test_cli_many_packages_json(self):
+        with self.capture_output() as (out, err):
+            main(["pytest", "loguru", "--format", "json"])
+        data = json.loads(out.getvalue())
+        self.assertEqual(list(data), ["pytest", "loguru"])
+        self.assertEqual(data["loguru"], str(Version("loguru")))
+
+    def test_cli_package_named_like_a_command(self):
+        rows = [("diff", "1.0", "1.0.1")]
+        with mock.patch(
+            "version.cli.resolve_rows", return_value=rows
+        ) as resolve, mock.patch.dict(os.environ, {"PYVERSION_NO_SERVER": "1"}):
+            with self.capture_output() as (out, err):
+                main(["--", "diff"])
+                main(["diff", "increment"])
+        self.assertEqual(out.getvalue().splitlines(), ["1.0", "1.0.1"])
+        self.assertEqual(
+            resolve.call_args_list,
+            [mock.call(["diff"], False, False), mock.call(["diff"], True, False)],
+        )
+
+    def test_cli_from_file_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as fh:
+            fh.write(
+                "-i https://pypi.org/simple\n# comment\npytest>=5.0 ; python_version > '3'\n"
+            )
+        self.addCleanup(os.remove, fh.name)
+        self.assertEqual(read_requirement_names(fh.name), ["pytest"])
+        with self.capture_output() as (out, err):
+            main(["--from-file", fh.name, "--format", "csv"])
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "name,version")
+        self.assertEqual(lines[1], "pytest,{0}".format(Version("pytest")))
+
+    def test_run_shell_command(self):
+        cmd = [sys.executable, "-c", "import os; print(os.environ.get('PV_X'))"]
+        self.assertEqual(VersionUtils.run_shell_command(cmd), "None")
+        self.assertEqual(VersionUtils.run_shell_command(cmd, env={"PV_X": "1"}), "1")
+        cat = [sys.executable, "-c", "import sys; print(sys.stdin.read().upper())"]
+        self.assertEqual(VersionUtils.run_shell_command(cat, input="abc"), "ABC")
+        fail = [sys.executable, "-c", "import sys; sys.exit('boom')"]
+        self.assertEqual(VersionUtils.run_shell_command(fail), "")
+        with self.assertRaisesRegex(Exception, "returned 1: boom"):
+            VersionUtils.run_shell_command(fail, throw_on_error=True)
+        with self.assertRaises(subprocess.TimeoutExpired):
+            VersionUtils.run_shell_command(["sleep", "5"], timeout=0.1)
+
+    def test_iter_shell_command(self):
+        cmd = [sys.executable, "-c", "for i in range(3): print(i)"]
+        self.assertEqual(list(VersionUtils.iter_shell_command(cmd)), ["0", "1", "2"])
+        lines = VersionUtils.iter_shell_command(["yes"])
+        self.assertEqual(next(lines), "y")
+        lines.close()
+        slow = [
+            sys.executable,
+            "-c",
+            "import time; print(1, flush=True); time.sleep(5)",
+        ]
+        lines = VersionUtils.iter_shell_command(slow, timeout=0.5)
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.assertEqual(list(lines), ["1"])
+
+    def test_version_keyword_pbr(self):
+        calls = []
+
+        def get_version(package, sources=None, **kwargs):
+            calls.append(package)
+            return parse_version("1.2.3")
+
+        dist = SimpleNamespace(metadata=SimpleNamespace(version=None))
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(
+            version_module._build_versions, clear=True
+        ), mock.patch.dict(os.environ), mock.patch.object(
+            VersionUtils, "get_version", staticmethod(get_version)
+        ):
+            os.chdir(tmp)
+            try:
+                with self.assertRaisesRegex(ValueError, "no \\[metadata\\] name"):
+                    version_module.version_keyword(dist, "auto_version", "PBR")
+                with open("setup.cfg", "w") as fh:
+                    fh.write("[metadata]\nname = my_pkg\nsummary = x\n")
+                for _ in range(3):
+                    version_module.version_keyword(dist, "auto_version", "PBR")
+                self.assertEqual(os.environ["PBR_VERSION"], "1.2.3")
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(dist.metadata.version, "1.2.3")
+            # the increment command shares the version of the build
+            self.assertEqual(str(version_module.build_version("My-Pkg")), "1.2.3")
+        self.assertEqual(calls, ["my_pkg"])
+
+    def test_import_loads_no_heavy_modules(self):
+        code = (
+            "import sys, version.version; "
+            "print([m for m in ('pkg_resources', 'packaging', 'loguru') "
+            "if m in sys.modules])"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.check_output([sys.executable, "-c", code], cwd=root)
+        self.assertEqual(out.strip(), b"[]")
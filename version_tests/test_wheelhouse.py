@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version.cli import main
+from version.version import VersionUtils, parse_version
+from version.wheelhouse import WheelhouseIndex, get_wheelhouse_dirs
+
+FILES = [
+    "six-1.12.0-py2.py3-none-any.whl",
+    "six-1.16.0-py2.py3-none-any.whl",
+    "six-2.0b1-py2.py3-none-any.whl",
+    "zope.interface-5.4.0.tar.gz",
+    "README.txt",
+]
+
+
+class TestWheelhouse(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.touch(self.path, *FILES)
+        # PEP 503 tree: one directory per project
+        self.touch(os.path.join(self.path, "my-tool"), "my-tool-1.0-1.tar.gz")
+        self.touch(os.path.join(self.path, "my-tool"), "my_tool-0.9-py3-none-any.whl")
+
+    def touch(self, directory, *names):
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            open(os.path.join(directory, name), "w").close()
+
+    def test_index(self):
+        index = WheelhouseIndex([self.path, os.path.join(self.path, "missing")])
+        self.assertEqual(sorted(index.get("SIX")), ["1.12.0", "1.16.0", "2.0b1"])
+        self.assertEqual(index.get("Zope.Interface"), ["5.4.0"])
+        self.assertEqual(sorted(index.get("my_tool")), ["0.9", "1.0-1"])
+        self.assertIsNone(index.get("requests"))
+        self.assertEqual(len(index), 3)
+
+    def test_rescanned_on_change(self):
+        index = WheelhouseIndex([self.path], check_interval=0)
+        self.assertNotIn("requests", index)
+        self.touch(self.path, "requests-2.31.0-py3-none-any.whl")
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(index.get("requests"), ["2.31.0"])
+        self.touch(os.path.join(self.path, "my-tool"), "my-tool-1.1.tar.gz")
+        os.utime(os.path.join(self.path, "my-tool"), ns=(0, 0))
+        self.assertIn("1.1", index.get("my-tool"))
+
+    def test_checked_once_per_interval(self):
+        index = WheelhouseIndex([self.path], check_interval=60)
+        self.assertEqual(len(index), 3)
+        self.touch(self.path, "requests-2.31.0-py3-none-any.whl")
+        os.utime(self.path, ns=(0, 0))
+        with mock.patch.object(index, "fingerprint") as fingerprint:
+            self.assertIsNone(index.get("requests"))
+        fingerprint.assert_not_called()
+        index.invalidate()
+        self.assertEqual(index.get("requests"), ["2.31.0"])
+
+    def test_source(self):
+        env = {"PYVERSION_WHEELHOUSE": os.pathsep.join(["", self.path])}
+        with mock.patch.dict(os.environ, env):
+            os.environ.pop("PYVERSION_SOURCES", None)
+            self.assertEqual(
+                VersionUtils.get_sources(),
+                ["pip", "pkg_resources", "wheelhouse", "pypi"],
+            )
+            self.assertEqual(get_wheelhouse_dirs(), [self.path])
+            self.assertEqual(VersionUtils.get_version_from_wheelhouse("six"), "1.16.0")
+            self.assertEqual(
+                VersionUtils.get_versions(["six", "my-tool", "nope"], ["wheelhouse"]),
+                {
+                    "six": parse_version("1.16.0"),
+                    "my-tool": parse_version("1.0-1"),
+                    "nope": parse_version("0.0.1"),
+                },
+            )
+        with mock.patch.dict(os.environ, {"PYVERSION_WHEELHOUSE": ""}):
+            self.assertIsNone(VersionUtils.get_version_from_wheelhouse("six"))
+            self.assertEqual(
+                VersionUtils.get_versions_from_wheelhouse(["six"]), {"six": None}
+            )
+
+    def test_cli_offline(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        env = {
+            "PYVERSION_WHEELHOUSE": self.path,
+            "PYVERSION_CACHE_DIR": cache_dir,
+            # nothing listens there: any request would fail
+            "PYVERSION_INDEX_URL": "http://127.0.0.1:9",
+            "PYVERSION_SOURCES": "wheelhouse,pypi",
+            "PYVERSION_NO_SERVER": "1",
+        }
+        with mock.patch.dict(os.environ, env), mock.patch(
+            "version.index.IndexClient.fetch_releases", side_effect=AssertionError
+        ), mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            os.environ.pop("PYVERSION_OFFLINE", None)
+            main(["--offline", "six", "requests"])
+            self.assertNotIn("PYVERSION_OFFLINE", os.environ)
+            os.environ["PYVERSION_OFFLINE"] = "0"
+            main(["--offline", "six"])
+            self.assertEqual(os.environ["PYVERSION_OFFLINE"], "0")
+        self.assertEqual(
+            stdout.getvalue().splitlines(), ["six 1.16.0", "requests 0.0.1", "1.16.0"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
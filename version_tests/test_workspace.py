@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from version import workspace
+from version.cli import main
+from version.git import GitRepository
+from version.version import VersionUtils, parse_version
+
+from .git_repo import GIT_ENV, git, make_repo
+
+PROJECTS = {
+    "libs/alpha/pyproject.toml": '[build-system]\nrequires = []\n\n[project]\nname = "alpha"\n',
+    "libs/beta/setup.cfg": "[bdist_wheel]\nname = wrong\n\n[metadata]\nname = beta\n",
+    "libs/gamma/setup.py": "from setuptools import setup\nNAME = 'gamma'\nsetup(name=NAME)\n",
+    "libs/delta/setup.py": "import setuptools\nsetuptools.setup(name='delta')\n",
+    "tools/unnamed/setup.py": "from setuptools import setup\nsetup()\n",
+    "venv/pyvenv.cfg": "home = /usr/bin\n",
+    "venv/lib/site/setup.py": "setup(name='vendored')\n",
+    ".tox/py/setup.py": "setup(name='hidden')\n",
+}
+VERSIONS = {"alpha": "1.0", "beta": "2.1.3", "gamma": "0.4rc1", "delta": "0.0.1"}
+
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for relpath, content in PROJECTS.items():
+            path = os.path.join(self.root, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as fh:
+                fh.write(content)
+        self.remote = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.remote)
+        make_repo(self.root)
+        git(self.root, "init", "-q", "--bare", self.remote)
+        git(self.root, "remote", "add", "origin", self.remote)
+
+        def get_versions(packages, sources=None):
+            return {name: parse_version(VERSIONS[name]) for name in packages}
+
+        patcher = mock.patch.object(
+            VersionUtils, "get_versions", staticmethod(get_versions)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_discover_and_read_names(self):
+        found = [
+            os.path.relpath(path, self.root)
+            for path in workspace.discover_projects(self.root)
+        ]
+        self.assertEqual(
+            found,
+            ["libs/alpha", "libs/beta", "libs/delta", "libs/gamma", "tools/unnamed"],
+        )
+        names = [workspace.read_project_name(os.path.join(self.root, p)) for p in found]
+        self.assertEqual(names, ["alpha", "beta", "delta", "gamma", None])
+
+    def test_setup_py_literals(self):
+        # ast.Str before Python 3.8, ast.Constant after: both must be read
+        from version.project import _read_setup_py_name
+
+        path = os.path.join(self.root, "setup.py")
+        for source, expected in (
+            ("setup(name='plain')\n", "plain"),
+            ("setup(name='split' '-name')\n", "split-name"),
+            ("NAME = 'const'\nsetup(name=NAME)\n", "const"),
+            ("NAME = 1\nsetup(name=NAME)\n", None),
+            ("setup(name=get_name())\n", None),
+        ):
+            with open(path, "w") as fh:
+                fh.write(source)
+            self.assertEqual(_read_setup_py_name(path), expected, source)
+
+    def test_plan(self):
+        git(self.root, "tag", "beta-2.2.0")
+        entries = workspace.plan(self.root, "minor")
+        self.assertEqual(
+            [(e.name, e.version, e.next_version, e.tag_exists) for e in entries],
+            [
+                ("alpha", "1.0", "1.1", False),
+                ("beta", "2.1.3", "2.2.0", True),
+                ("delta", "0.0.1", "0.1.0", False),
+                ("gamma", "0.4rc1", "0.5", False),
+            ],
+        )
+        self.assertEqual(entries[0].tag, "alpha-1.1")
+        self.assertEqual(entries[0].as_dict()["path"], entries[0].path)
+
+    def test_tag_plan(self):
+        entries = workspace.plan(self.root, tag_format="{name}/v{version}")
+        repo = GitRepository.discover(self.root)
+        self.assertEqual(len(workspace.tag_plan(entries, repo, dry_run=True)), 4)
+        self.assertEqual(git(self.root, "tag"), "")
+        with mock.patch.dict(os.environ, GIT_ENV):
+            tags = [action.tag for action in workspace.tag_plan(entries, repo)]
+        self.assertEqual(
+            tags, ["alpha/v1.0.1", "beta/v2.1.4", "delta/v0.0.2", "gamma/v0.4.1"]
+        )
+        self.assertEqual(git(self.remote, "tag").splitlines(), sorted(tags))
+        self.assertTrue(all(repo.has_tag(tag) for tag in tags))
+
+    def test_cli(self):
+        with mock.patch("sys.stdout", new_callable=StringIO) as stdout:
+            main(["workspace", self.root, "--format", "json", "-t", "major"])
+        plan = json.loads(stdout.getvalue())
+        self.assertEqual(plan[0]["path"], os.path.join("libs", "alpha"))
+        self.assertEqual(plan[0]["next"], "2.0")
+        self.assertEqual([p["name"] for p in plan], ["alpha", "beta", "delta", "gamma"])
+
+
+if __name__ == "__main__":
+    unittest.main()